@@ -0,0 +1,72 @@
+"""add tprp pipeline job
+
+Revision ID: 5d1e8a9c4b27
+Revises: 3b60cbac33a3
+Create Date: 2026-10-18 15:42:10.512334
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d1e8a9c4b27"
+down_revision = "3b60cbac33a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tprp_pipeline_job",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("session_id", sa.String(length=50), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="status", create_type=False),
+            server_default=sa.text("'QUEUED'"),
+            nullable=False,
+        ),
+        sa.Column("stage", sa.String(length=50), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("max_attempts", sa.Integer(), server_default="3", nullable=False),
+        sa.Column(
+            "available_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("worker_id", sa.String(length=100), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "create_time",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "update_time",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("session_id", name="unique_sessionid_pipeline_job"),
+    )
+    # Claim query scans queued/running jobs by due time
+    op.create_index(
+        "ix_tprp_pipeline_job_status_available_at",
+        "tprp_pipeline_job",
+        ["status", "available_at"],
+    )
+    op.create_index("ix_tprp_pipeline_job_user_id", "tprp_pipeline_job", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_tprp_pipeline_job_user_id", table_name="tprp_pipeline_job")
+    op.drop_index("ix_tprp_pipeline_job_status_available_at", table_name="tprp_pipeline_job")
+    op.drop_table("tprp_pipeline_job")
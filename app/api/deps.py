@@ -5,10 +5,12 @@ from fastapi import Depends, HTTPException, Request, WebSocket, WebSocketExcepti
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import APIKeyHeader
+from neo4j import AsyncDriver
 
 from app.api import api_messages
 from app.core import database_session
 from app.core.security.jwt import verify_jwt_token
+from app.core.utils import graph_db
 from app.models import User, Base
 from app.schemas.logger import logger
 
@@ -18,6 +20,11 @@ api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 async def get_session() -> AsyncGenerator[AsyncSession]:
     async with database_session.get_async_session() as session:
         yield session
+
+def get_graph_driver() -> AsyncDriver:
+    # Process-wide pooled driver, sessions are opened per query and connections are reused
+    return graph_db.get_graph_driver()
+
 def is_tprp_route(path: str) -> bool:
     return "tprp" in path  # Modify this based on how you match TPRP routes
 
@@ -1,24 +1,32 @@
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from neo4j import AsyncDriver
 from app.schemas.requests import *
 from app.schemas.responses import *
 from app.core.supplier.graph import *
 from app.api import deps
 from app.models import User
 from app.schemas.requests import *
+from app.core.utils.graph_cache import etag_matches
+from app.core.supplier.graph_overview import expand_graph_cluster, expand_graph_node, fetch_graph_overview
 
 router = APIRouter()
 
 @router.post("/get-network-graph")
-async def get_graph(filter_request: SupplierFilterRequest):
+async def get_graph(filter_request: SupplierFilterRequest,
+                    driver: AsyncDriver = Depends(deps.get_graph_driver),
+                    if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
 
     try:
         filter_request = filter_request.dict()
 
-        transformed_data = await run_graph_retrieval(filter_request)
+        # Cached per client and filters, the ETag lets the frontend revalidate without a body
+        etag, body = await cached_graph_retrieval(filter_request, driver)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-        # print(transformed_data)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-        return transformed_data
+        return Response(content=body, media_type="application/json", headers=headers)
 
     except HTTPException as http_err:
         # Return structured error responses for HTTP exceptions
@@ -31,6 +39,63 @@ async def get_graph(filter_request: SupplierFilterRequest):
             detail=f"Failed to generate network graph: {str(error)}"
         )
 
+@router.post("/get-network-graph-overview")
+async def get_graph_overview(request: GraphOverviewRequest,
+                             driver: AsyncDriver = Depends(deps.get_graph_driver),
+                             current_user: User = Depends(deps.get_current_user)):
+    """
+    Level-of-detail entry point: the client node and its direct suppliers clustered by `group_by`.
+    """
+    try:
+        return await fetch_graph_overview(request.dict(), driver)
+
+    except HTTPException as http_err:
+        raise http_err
+
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate network graph overview: {str(error)}"
+        )
+
+@router.post("/expand-network-graph-cluster")
+async def get_graph_cluster(request: GraphClusterRequest,
+                            driver: AsyncDriver = Depends(deps.get_graph_driver),
+                            current_user: User = Depends(deps.get_current_user)):
+    """
+    A page of the suppliers in a cluster, pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        return await expand_graph_cluster(request.dict(), driver)
+
+    except HTTPException as http_err:
+        raise http_err
+
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to expand network graph cluster: {str(error)}"
+        )
+
+@router.post("/expand-network-graph-node")
+async def get_graph_node_neighbourhood(request: GraphNodeRequest,
+                                       driver: AsyncDriver = Depends(deps.get_graph_driver),
+                                       current_user: User = Depends(deps.get_current_user)):
+    """
+    A page of the managers and corporate group of a supplier node, pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        return await expand_graph_node(request.dict(), driver)
+
+    except HTTPException as http_err:
+        raise http_err
+
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to expand network graph node: {str(error)}"
+        )
+
 @router.post("/get-submodal-profile")
 async def get_profile(request: SubModalItem,
                       session: AsyncSession = Depends(deps.get_session),
@@ -105,10 +170,11 @@ async def get_findings(request: SubModalItem,
 
 @router.get("/supplier-countries")
 async def get_supplier_countries(client_id: str = Query(..., description="UUID of the company"), session: AsyncSession = Depends(deps.get_session),
-                       current_user: User = Depends(deps.get_current_user)):
+                       current_user: User = Depends(deps.get_current_user),
+                       driver: AsyncDriver = Depends(deps.get_graph_driver)):
     try:
 
-        transformed_data = await get_distinct_supplier_countries(client_id)
+        transformed_data = await get_distinct_supplier_countries(client_id, driver)
 
         return transformed_data
 
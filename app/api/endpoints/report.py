@@ -11,7 +11,8 @@ from app.core.config import get_settings
 
 router = APIRouter()
 from fastapi import APIRouter, Query
-from fastapi.responses import Response
+from fastapi import Header
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from app.models import User
 
@@ -22,13 +23,11 @@ async def download_report(
     session_id: str = Query(..., description="Session ID"),
     ens_id: str = Query(..., description="ENS ID"),
     type_of_file: str = Query(..., description="Type of file (e.g., docx, pdf, csv)"),
+    range_header: Optional[str] = Header(None, alias="Range", description="Optional single byte range, e.g. bytes=0-1023"),
     current_user: User = Depends(deps.get_current_user)
 ):
     try:
-        file_data, result = await report_download(session_id, ens_id, type_of_file)
-
-        if file_data is None:
-            return {"error": result}
+        report = await report_download(session_id, ens_id, type_of_file, range_header)
 
         # Determine media type based on file type
         media_types = {
@@ -38,12 +37,26 @@ async def download_report(
         }
         media_type = media_types.get(type_of_file.lower(), "application/octet-stream")
 
-        return Response(
-            content=file_data,
+        headers = {
+            "Content-Disposition": f"attachment; filename={report['filename']}",
+            "Content-Length": str(report["end"] - report["start"] + 1),
+            "Accept-Ranges": "bytes",
+        }
+        if report["etag"]:
+            headers["ETag"] = report["etag"]
+        if report["partial"]:
+            headers["Content-Range"] = f"bytes {report['start']}-{report['end']}/{report['size']}"
+
+        return StreamingResponse(
+            report["chunks"],
+            status_code=206 if report["partial"] else 200,
             media_type=media_type,
-            headers={"Content-Disposition": f"attachment; filename={result}"}
+            headers=headers
         )
 
+    except HTTPException as http_err:
+        raise http_err
+
     except Exception as e:
         return {"error": str(e)}
 
@@ -52,16 +65,17 @@ async def download_report(
 async def bulk_download_report(session_id: str = Query(..., description="Session ID"),
     current_user: User = Depends(deps.get_current_user)):
     try:
-        file_data, result = await report_bulk_download(session_id)
-
-        if file_data is None:
-            return {"error": result}
+        archive = await report_bulk_download(session_id)
 
-        return Response(
-            content=file_data,
+        # The archive is built while it is sent, so there is no Content-Length
+        return StreamingResponse(
+            archive["chunks"],
             media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={result}"}
+            headers={"Content-Disposition": f"attachment; filename={archive['filename']}"}
         )
 
+    except HTTPException as http_err:
+        raise http_err
+
     except Exception as e:
         return {"error": str(e)}
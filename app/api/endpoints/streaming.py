@@ -1,22 +1,20 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-import asyncpg
 import asyncio
 import json
 from app.api import deps
 from app.models import User
-from urllib.parse import quote_plus
-from app.core.config import get_settings
+from app.core.utils.notification_hub import (
+    ENS_ID_STATUS_CHANNEL, SESSION_STATUS_CHANNEL, StatusProgress, notification_hub
+)
 from app.schemas.logger import logger
 
 router = APIRouter()
 
-encoded_password = quote_plus(get_settings().database.password.get_secret_value())
-DATABASE_URL = (
-    f"postgresql://{get_settings().database.username}:{encoded_password}@"
-    f"{get_settings().database.hostname}:{get_settings().database.port}/{get_settings().database.db}"
-)
+MAX_BATCH_WINDOW_MS = 10000
+# Distinct ens_ids buffered per batched connection before the oldest is dropped
+ENS_ID_COALESCE_LIMIT = 10000
 
 @router.websocket("/ws/session-status")
 async def websocket_session_status(
@@ -24,68 +22,61 @@ async def websocket_session_status(
     session_id: Optional[str] = Query(None, description="Session ID")
 ):
     await websocket.accept()
-    conn = None
-
-    session_notification_queue = asyncio.Queue()
-
-    async def handle_session_notification(connection, pid, channel, payload):
-        data = json.loads(payload)
-        await session_notification_queue.put(data)
+    logger.debug(f"SESSION ID ---> {session_id}")
 
     try:
-        conn = await asyncpg.connect(DATABASE_URL)
-        logger.info("CONNECTION ESTABLISHED")
-        logger.debug(f"SESSION ID ---> {session_id}")
-
-        await conn.add_listener('session_id_status_channel', handle_session_notification)
-        while True:
-            payload = await session_notification_queue.get()
-            if session_id:
-                if payload.get('session_id') == session_id:
-                    await websocket.send_text(json.dumps(payload))
-            else:
+        # Shared LISTEN connection, notifications for other sessions are filtered by the hub
+        async with notification_hub.subscribe(SESSION_STATUS_CHANNEL, session_id) as subscription:
+            while True:
+                payload = await subscription.get()
                 await websocket.send_text(json.dumps(payload))
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         await websocket.send_text(f"Error: {str(e)}")
-    finally:
-        if conn:
-            logger.info("CONNECTION CLOSING")
-            await conn.remove_listener('session_id_status_channel', handle_session_notification)
-            await conn.close()
 
 @router.websocket("/ws/ensid-status")
 async def websocket_ensid_status(
     websocket: WebSocket,
-    session_id: str = Query(..., description="Session ID")
+    session_id: str = Query(..., description="Session ID"),
+    batch_window_ms: int = Query(
+        0, ge=0, le=MAX_BATCH_WINDOW_MS,
+        description="Aggregate events over this window into batch frames, 0 sends every event as it arrives"
+    )
 ):
     await websocket.accept()
-    conn = None
-
-    ensid_notification_queue = asyncio.Queue()
-
-    async def handle_ensid_notification(connection, pid, channel, payload):
-        data = json.loads(payload)
-        await ensid_notification_queue.put(data)
 
     try:
-        conn = await asyncpg.connect(DATABASE_URL)
-        logger.info("CONNECTION ESTABLISHED")
+        if not batch_window_ms:
+            # Shared LISTEN connection, notifications for other sessions are filtered by the hub
+            async with notification_hub.subscribe(ENS_ID_STATUS_CHANNEL, session_id) as subscription:
+                while True:
+                    payload = await subscription.get()
+                    await websocket.send_text(json.dumps(payload))
 
-        await conn.add_listener('ens_id_status_channel', handle_ensid_notification)
-        while True:
-            payload = await ensid_notification_queue.get()
-            if payload.get('session_id') == session_id:
-                await websocket.send_text(json.dumps(payload))
+        # Batch mode: repeated updates per ens_id collapse to the latest one while the window is open
+        async with notification_hub.subscribe(
+            ENS_ID_STATUS_CHANNEL, session_id, maxsize=ENS_ID_COALESCE_LIMIT, coalesce_key="ens_id"
+        ) as subscription:
+            progress = StatusProgress(key="ens_id", status_field="overall_status")
+            while True:
+                await subscription.wait()
+                await asyncio.sleep(batch_window_ms / 1000)
+                received, coalesced = subscription.received, subscription.coalesced
+                events = subscription.drain()
+                progress.update(events)
+                await websocket.send_text(json.dumps({
+                    "type": "batch",
+                    "session_id": session_id,
+                    "events": events,
+                    "received": received,
+                    "coalesced": coalesced,
+                    "dropped": subscription.dropped,
+                    "progress": progress.snapshot(),
+                }))
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         await websocket.send_text(f"Error: {str(e)}")
-    finally:
-        if conn:
-            logger.info("CONNECTION CLOSING")
-            await conn.remove_listener('ens_id_status_channel', handle_ensid_notification)
-            await conn.close()
@@ -59,6 +59,8 @@ async def get_supplier_data(
     page_no: int = Query(1, ge=1),       
     rows_per_page: int = Query(10, le=1000), 
     final_validation_status: Literal["", "review", "auto_reject", "auto_accept"] = "",
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page, overrides page_no"),
+    include_count: Optional[bool] = Query(None, description="Return total_data, defaults to true unless a cursor is given"),
     session: AsyncSession = Depends(deps.get_session),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -71,7 +73,7 @@ async def get_supplier_data(
             )
 
         # Fetch data from DB
-        sheet_data = await get_session_supplier(session_id, page_no, rows_per_page, final_validation_status, session)
+        sheet_data = await get_session_supplier(session_id, page_no, rows_per_page, final_validation_status, session, cursor, include_count)
 
         return ResponseMessage(
             status="success",
@@ -178,6 +180,8 @@ async def get_main_supplier_data(
     session_id: str, 
     page_no: int = Query(1, ge=1),       
     rows_per_page: int = Query(10, le=1000), 
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page, overrides page_no"),
+    include_count: Optional[bool] = Query(None, description="Return total_data, defaults to true unless a cursor is given"),
     session: AsyncSession = Depends(deps.get_session),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -187,7 +191,7 @@ async def get_main_supplier_data(
             raise HTTPException(status_code=400, detail="No session_id provided.")
 
         # Fetch supplier data
-        sheet_data = await get_main_session_supplier(session_id, page_no, rows_per_page, session)
+        sheet_data = await get_main_session_supplier(session_id, page_no, rows_per_page, session, cursor, include_count)
 
         # If no data found, raise a 404 error
         if not sheet_data.get("data"):
@@ -251,12 +255,14 @@ async def get_session_screening_status_data(
     page_no: int = Query(1, ge=1),       
     rows_per_page: int = Query(10, le=1000), 
     screening_analysis_status: Optional[Literal["", "active", "not_started"]] = "",
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page, overrides page_no"),
+    include_count: Optional[bool] = Query(None, description="Return total_data, defaults to true unless a cursor is given"),
     session: AsyncSession = Depends(deps.get_session),
     current_user: User = Depends(deps.get_current_user)
 ):
     try:
         # Fetch screening status data
-        sheet_data = await get_session_screening_status(page_no, rows_per_page, screening_analysis_status, session)
+        sheet_data = await get_session_screening_status(page_no, rows_per_page, screening_analysis_status, session, cursor, include_count)
 
         # Ensure the data exists
         if not sheet_data["data"]:
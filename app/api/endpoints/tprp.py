@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status, BackgroundTasks
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.responses import *
 from app.core.tprp.tprp import *
+from app.core.tprp.pipeline_queue import enqueue_pipeline_job
 from app.api import deps
 from app.schemas.logger import logger
 
@@ -13,13 +14,13 @@ router = APIRouter()
     description=(
         "**Supplier Screening File Upload** 📂\n\n"
         "This endpoint allows users to upload an Excel file for supplier screening. "
-        "The file is processed asynchronously, and a background task executes the full screening pipeline. "
+        "The file is processed asynchronously, and a queued pipeline job executes the full screening pipeline. "
         "A user can have a maximum of **5 active requests** at any given time.\n\n"
         "### **Process Flow**\n"
         "1️⃣ **Upload an Excel file** containing supplier data.\n"
         "2️⃣ **System Validates the Request:** Ensures the user hasn't exceeded the max active requests.\n"
         "3️⃣ **Extract & Process Data:** Parses the Excel file for supplier screening.\n"
-        "4️⃣ **Trigger Background Task:** Initiates an asynchronous screening pipeline.\n"
+        "4️⃣ **Queue Pipeline Job:** Queues the screening pipeline for a pipeline worker.\n"
         "5️⃣ **Return Response:** Confirms successful processing or returns an error.\n\n"
         "### **Constraints & Validation**\n"
         "🔹 Only **Excel files** (`.xlsx`, `.xls`) are supported.\n"
@@ -31,7 +32,6 @@ router = APIRouter()
     ),
 )
 async def upload_excel(
-    background_tasks: BackgroundTasks,  # ✅ Move it before parameters with default values
     file: UploadFile = File(..., description="The Excel file (.xlsx or .xls) containing supplier screening data."),
     session: AsyncSession = Depends(deps.get_session),
     current_user_id: User = Depends(deps.get_current_user),
@@ -41,7 +41,7 @@ async def upload_excel(
     - **Validates**: Ensures a file is uploaded.
     - **Checks User Limit**: Maximum 5 active requests per user.
     - **Processes Excel File**: Extracts and processes supplier data.
-    - **Triggers Background Task**: Runs the screening pipeline asynchronously.
+    - **Queues Pipeline Job**: A pipeline worker runs the screening pipeline.
 
     **Responses:**
     - ✅ **201 Created**: File processed successfully.
@@ -64,7 +64,8 @@ async def upload_excel(
             message="Excel file processed successfully"
         )
         
-        background_tasks.add_task(run_full_pipeline_background, sheet_data['session_id'], session)
+        # Picked up by a pipeline worker, survives restarts and is retried from its last completed stage
+        await enqueue_pipeline_job(sheet_data['session_id'], current_user_id[1], session)
 
         return response
 
@@ -61,11 +61,25 @@ class GraphDb(BaseModel):
     uri: str
     user: str
     password: str
+    max_connection_pool_size: int = 50
+    connection_acquisition_timeout: float = 30  # Seconds to wait for a free pooled connection
+    max_connection_lifetime: float = 3600  # Seconds before a pooled connection is replaced
+    connection_timeout: float = 15
 
 class AllowedRows(BaseModel):
     general : int
     tprp : int
 
+class PipelineQueue(BaseModel):
+    run_in_api: bool = True  # Run worker loops inside the API process, disable when dedicated workers run
+    concurrency: int = 2  # Pipelines run at once per worker process
+    max_jobs_per_user: int = 5
+    max_attempts: int = 3
+    poll_interval_secs: float = 5
+    heartbeat_secs: float = 30
+    stale_after_secs: float = 180  # A running job without heartbeat for this long is claimed again
+    retry_backoff_secs: float = 60
+
 class Settings(BaseSettings):
     security: Security
     storage: Storage
@@ -73,6 +87,7 @@ class Settings(BaseSettings):
     urls: Urls
     graphdb: GraphDb
     allowedrows: AllowedRows
+    pipeline: PipelineQueue = PipelineQueue()
 
 
     @computed_field  # type: ignore[prop-decorator]
@@ -1,21 +1,29 @@
-from neo4j import AsyncGraphDatabase, exceptions as neo4j_exceptions
-import pycountry
+import itertools
+import json
+import operator
+import numpy as np
+from neo4j import READ_ACCESS, AsyncDriver, exceptions as neo4j_exceptions
 from app.core.utils.db_utils import *
+from app.core.utils.country_index import get_country_name
+from app.core.utils.graph_db import execute_query, get_graph_driver
+from app.core.utils.graph_cache import get_or_build_graph
 from collections import defaultdict
-from app.core.config import get_settings
+from functools import lru_cache
+from fastapi.encoders import jsonable_encoder
+from typing import Tuple
 
-URI = get_settings().graphdb.uri
-USER = get_settings().graphdb.user
-PASSWORD = get_settings().graphdb.password
+FALLBACK_CLIENT_ID = "5b638302-73cb-4a69-b76d-1efa5c00797a"
 
-def get_country_name(code: str) -> str:
-    country = pycountry.countries.get(alpha_2=code.upper())
-    return country.name if country else code
+def resolve_client_id(client_id: Optional[str]) -> str:
+    if client_id is None or client_id == "string":
+        print(f"No Client ID passed, using fallback {FALLBACK_CLIENT_ID}")
+        return FALLBACK_CLIENT_ID
+    return client_id
 
 # Async Neo4j function
-async def get_distinct_supplier_countries(client_id: str):
+async def get_distinct_supplier_countries(client_id: str, driver: Optional[AsyncDriver] = None):
 
-    fallback_client_id = "5b638302-73cb-4a69-b76d-1efa5c00797a"
+    fallback_client_id = FALLBACK_CLIENT_ID
     if client_id is None:
         print(f"No Client ID passed, using fallback {fallback_client_id}")
         client_id = fallback_client_id
@@ -23,17 +31,13 @@ async def get_distinct_supplier_countries(client_id: str):
     if client_id == "string":
         print(f"No Client ID passed, using fallback {fallback_client_id}")
         client_id = fallback_client_id
-    driver = None
     try:
         query = """
         MATCH (s:Supplier)-[:SUPPLIER_OF]->(c:Company {id: $client_id})
         WHERE s.country IS NOT NULL
         RETURN DISTINCT s.country AS countryCode
         """
-        driver = AsyncGraphDatabase.driver(URI, auth=(USER, PASSWORD))
-        async with driver.session() as session:
-            result = await session.run(query, client_id=client_id.strip())
-            records = await result.data()
+        records = await execute_query(query, {"client_id": client_id.strip()}, READ_ACCESS, driver)
 
         # Extract and map
         response = [
@@ -50,13 +54,9 @@ async def get_distinct_supplier_countries(client_id: str):
         logger.exception(f"Unexpected error while fetching supplier countries: {e}")
         return []
 
-    finally:
-        if driver:
-            await driver.close()
+async def run_graph_retrieval(filter_request:dict, driver: Optional[AsyncDriver] = None):
 
-async def run_graph_retrieval(filter_request:dict):
-
-    fallback_client_id = "5b638302-73cb-4a69-b76d-1efa5c00797a"
+    fallback_client_id = FALLBACK_CLIENT_ID
     fallback_client_name = "ARAMCO"
 
     client = filter_request["client"]
@@ -80,12 +80,28 @@ async def run_graph_retrieval(filter_request:dict):
         print(f"No Client Name passed, using fallback {fallback_client_name}")
         client = fallback_client_name
 
-    records = await fetch_direct_suppliers(client_id, filter_request)
-    transformed_data = await transform_graph_data(records=records, client_id = client_id)
+    driver = driver or get_graph_driver()
+    records = await fetch_direct_suppliers(client_id, filter_request, driver)
+    transformed_data = await transform_graph_data(records=records, client_id = client_id, driver=driver)
 
     return transformed_data
 
-async def fetch_direct_suppliers(client_id: str, filters:dict):
+async def cached_graph_retrieval(filter_request: dict, driver: Optional[AsyncDriver] = None) -> Tuple[str, bytes]:
+    """
+    Serve run_graph_retrieval from the graph response cache.
+
+    :return: (etag, serialized JSON body) of the graph.
+    """
+    client_id = resolve_client_id(filter_request.get("client_id"))
+
+    async def build() -> bytes:
+        # run_graph_retrieval pops fields from the request it is given
+        transformed_data = await run_graph_retrieval(dict(filter_request), driver)
+        return json.dumps(jsonable_encoder(transformed_data)).encode()
+
+    return await get_or_build_graph(client_id, filter_request, build)
+
+async def fetch_direct_suppliers(client_id: str, filters:dict, driver: Optional[AsyncDriver] = None):
     """
     Fetches all suppliers connected to the given client (company) in Neo4j.
     """
@@ -94,23 +110,38 @@ async def fetch_direct_suppliers(client_id: str, filters:dict):
     print("Generated Query:", query)
     print("Parameters:", params)
 
-    async with AsyncGraphDatabase.driver(URI, auth=(USER, PASSWORD)) as driver:
-        async with driver.session() as session:
-            result = await session.run(query,params)
-            records = await result.data()
+    records = await execute_query(query, params, READ_ACCESS, driver)
 
     return records
 
-async def transform_graph_data(records, client_id):
+# Node columns of a network graph record in the order they are added: (column, node_category, label)
+GRAPH_NODE_COLUMNS = (
+    ("suppliers", "direct", "suppliers"),
+    ("individuals", "indirect", "individuals"),
+    ("companyCorpGroup", "indirect", "CG suppliers"),
+    ("individualsCorpGroup", "indirect", "CG individuals"),
+)
+
+GRAPH_RELATIONSHIP_COLUMNS = (
+    "supplierRelationships",
+    "individualRelationships",
+    "individualRelationshipsCorpGroup",
+    "companyRelationshipsCorpGroup",
+)
+
+@lru_cache(maxsize=None)
+def relationship_label(relationship_type: str) -> str:
+    return relationship_type.replace("_OF","").replace("_"," ")
+
+async def transform_graph_data(records, client_id, driver: Optional[AsyncDriver] = None):
 
-    nodes = []
     links = []
 
     if len(records)>1:
         print("THIS IS AN ERROR ------> FOUND TWO CLIENT NODES.")
 
     if len(records) == 0:
-        records = await fetch_client_node(client_id)
+        records = await fetch_client_node(client_id, driver)
         record = records[0]
         client_node = record["client"]
         client_node["node_type"] = "Company"
@@ -121,93 +152,84 @@ async def transform_graph_data(records, client_id):
 
     record = records[0]
 
-    client_node = record["client"]
-    client_node["type"] = "Company"
-    client_node["node_category"] = "central"
-    suppliers = [{**d, 'node_category': 'direct'} for d in record["suppliers"]]
-    individuals = [{**d, 'node_category': 'indirect'} for d in record["individuals"]]
-
-    companies_corp_group = [{**d, 'node_category': 'indirect'} for d in record["companyCorpGroup"]]
-    individuals_corp_group = [{**d, 'node_category': 'indirect'} for d in record["individualsCorpGroup"]]
-
-    print(f"Found {len(suppliers)} suppliers")
-    print(f"Found {len(individuals)} individuals")
-
-    print(f"Found {len(companies_corp_group)} CG suppliers")
-    print(f"Found {len(individuals_corp_group)} CG individuals")
-
-    seen_ids = set()
-
-    # Initialize final list to collect unique nodes
+    # Ids are interned to small integers as they are met, nodes and edges are deduplicated on those
+    interned_ids = {}
+    seen_nodes = set()
+    seen_edges = set()
     nodes = []
+    direct_suppliers = []
+
+    # First occurrence of a node decides its category
+    for column, category, label in GRAPH_NODE_COLUMNS:
+        print(f"Found {len(record[column])} {label}")
+        for node in record[column]:
+            node_key = interned_ids.setdefault(node["id"], len(interned_ids))
+            if node_key in seen_nodes:
+                continue
+            seen_nodes.add(node_key)
+
+            node["node_category"] = category
+            node_type = node["node_type"] = node.pop("type")  # rename type to node_type
+            if category == "direct":
+                if node_type.lower() == "organization":
+                    direct_suppliers.append(node)
+            elif node_type.lower() == "individual":
+                apply_person_formatting(node)
+            elif node_type.lower() == "organization":
+                apply_indirect_supplier_formatting(node)
+            nodes.append(node)
+
+    # Direct suppliers are scored together in one vectorized pass
+    score_direct_suppliers(direct_suppliers)
 
-    # Function to add unique items to final_nodes
-    def add_unique_to_final(list_of_nodes):
-        for node in list_of_nodes:
-            if node['id'] not in seen_ids:
-                seen_ids.add(node['id'])
-                nodes.append(node)
-
-    # Add all unique suppliers, individuals, and groups
-    add_unique_to_final(suppliers)
-    add_unique_to_final(individuals)
-    add_unique_to_final(companies_corp_group)
-    add_unique_to_final(individuals_corp_group)
-
-    # nodes = suppliers + individuals + companies_corp_group + individuals_corp_group
-    nodes.append(client_node)
+    client_node = record["client"]
+    client_node.pop("type", None)
+    client_node["node_type"] = "Company"
+    client_node["node_category"] = "central"
+    nodes.append(apply_central_company_formatting(client_node))
+
+    for column in GRAPH_RELATIONSHIP_COLUMNS:
+        for related, relationship_type, target in record[column]:
+            source_key = interned_ids.setdefault(related["id"], len(interned_ids))
+            target_key = interned_ids.setdefault(target["id"], len(interned_ids))
+            edge_key = (source_key << 32) | target_key
+            if source_key == target_key or edge_key in seen_edges:
+                continue
+            seen_edges.add(edge_key)
+            links.append({
+                "source": related["id"],
+                "target": target["id"],
+                "relationship_type": relationship_label(relationship_type),
+            })
 
-    supplier_relationships = record["supplierRelationships"]
-    management_relationships = record["individualRelationships"]
+    return {"nodes": nodes, "edges": links}
 
-    individuals_relationships_corp_group = record["individualRelationshipsCorpGroup"]
-    supplier_relationships_corp_group = record["companyRelationshipsCorpGroup"]
+CORP_GROUP_RELATIONSHIPS = "SHAREHOLDER_OF|BENEFICIAL_OWNER_OF|ULTIMATELY_OWNED_SUBSIDIARY_OF|GLOBAL_ULTIMATE_OWNER_OF|OTHER_ULTIMATE_BENEFICIARY_OF"
 
-    relationships = supplier_relationships+management_relationships+individuals_relationships_corp_group+supplier_relationships_corp_group
-    # print(relationships)
-    for i, (related, relationship_type, target) in enumerate(relationships):
-        if related["id"] == target['id']:
-            continue
-        link = {"source": related["id"], "target":target["id"],"relationship_type": relationship_type.replace("_OF","").replace("_"," ")}
-        links.append(link)
-
-    links = simple_dedup(links, "source", "target")
-
-
-    # NODE FORMATTING -> MOVE TO ORCHESTRATION
-    nodes = list(nodes)
-    final_nodes = []
-    for node in nodes:
-        # print(node)
-        node["node_type"] = node.pop("type")  # rename type to node_type
-
-        if node["node_category"] == "direct":
-            if node["node_type"].lower() == "organization":
-                modified_node = apply_direct_supplier_formatting(node)
-        elif node["node_category"] == "indirect":
-            if node["node_type"].lower() == "individual":
-                modified_node = apply_person_formatting(node)
-                final_nodes.append(modified_node)
-            elif node["node_type"].lower() == "organization":
-                modified_node = apply_indirect_supplier_formatting(node)
-                final_nodes.append(modified_node)
-        elif node["node_category"] == "central":
-            modified_node = apply_central_company_formatting(node)
-            final_nodes.append(modified_node)
-    
-    return {"nodes": list(nodes), "edges": links}
+def _neighbour_subquery(node_label: str, relationship_types: str, relationships_alias: str, nodes_alias: str) -> str:
+    """
+    CALL {} subquery collecting the `node_label` nodes linked to any of the suppliers by `relationship_types`.
 
-async def build_dynamic_query_for_direct_suppliers(client_id, filters):
-    print("filters", filters)
-    # pull out indicators from filters
-    view_individuals_with_risk_only = filters.get("individuals_with_risk_only",False)
-    filters.pop("view_individuals_with_risk_only", None)
-    view_corp_group_with_risk_only = filters.get("corpgroup_with_risk_only",False)
-    filters.pop("view_corp_group_with_risk_only", None)
+    Each pattern is aggregated on its own, so the rows of one pattern are never
+    multiplied by the rows of another (no Cartesian product across OPTIONAL MATCHes).
+    An aggregation without grouping keys always returns one row, empty lists when nothing matches.
+    """
+    return f"""
+    CALL {{
+        WITH suppliers
+        UNWIND suppliers AS s
+        MATCH (n:{node_label})-[rel:{relationship_types}]->(s)
+        RETURN collect(DISTINCT rel) AS {relationships_alias}, collect(DISTINCT n) AS {nodes_alias}
+    }}
+    """
 
-    view_multiple_connections = filters.get("multiple_connections",False)
-    filters.pop("multiple_connections", None)
+def build_supplier_match(client_id, filters: dict, extra_conditions: Optional[list] = None):
+    """
+    MATCH clause for the client's direct suppliers `s` (and their SUPPLIER_OF relationships `r`) that pass `filters`.
 
+    :param extra_conditions: Further WHERE conditions on `s`, their parameters are added by the caller.
+    :return: (query, params)
+    """
     # first level query aka make sure it is supplier of being pulled out.
     query = """
     MATCH (c:Company {id: $client_id})<-[r:SUPPLIER_OF]-(s:Supplier)
@@ -262,23 +284,45 @@ async def build_dynamic_query_for_direct_suppliers(client_id, filters):
     if connection_filters:
         filter_conditions.append(f"({' OR '.join(connection_filters)})")
 
+    filter_conditions.extend(extra_conditions or [])
+
     # Final WHERE clause
     if filter_conditions:
         query += " WHERE " + " AND ".join(filter_conditions)
 
+    return query, params
+
+async def build_dynamic_query_for_direct_suppliers(client_id, filters):
+    print("filters", filters)
+    # pull out indicators from filters
+    view_individuals_with_risk_only = filters.get("individuals_with_risk_only",False)
+    filters.pop("view_individuals_with_risk_only", None)
+    view_corp_group_with_risk_only = filters.get("corpgroup_with_risk_only",False)
+    filters.pop("view_corp_group_with_risk_only", None)
+
+    view_multiple_connections = filters.get("multiple_connections",False)
+    filters.pop("multiple_connections", None)
+
+    query, params = build_supplier_match(client_id, filters)
+
+    # Aggregate the matched suppliers first, every neighbour pattern below is expanded from this list
+    query += """
+    WITH c, collect(DISTINCT r) AS supplierRelationships, collect(DISTINCT s) AS suppliers
+    """
+
     # Add on individuals nodes matching to this supplier:
     if view_individuals_with_risk_only:
-        query += "\nOPTIONAL MATCH (i:Individual)-[r1:MANAGEMENT_OF]->(s)"  # TODO ADD WHERE HERE
+        query += _neighbour_subquery("Individual", "MANAGEMENT_OF", "individualRelationships", "individuals")  # TODO ADD WHERE HERE
     else:
-        query += "\nOPTIONAL MATCH (i:Individual)-[r1:MANAGEMENT_OF]->(s)"
+        query += _neighbour_subquery("Individual", "MANAGEMENT_OF", "individualRelationships", "individuals")
 
     # Add on associated corporate group by using relationship
     if view_corp_group_with_risk_only:
-        query += "\nOPTIONAL MATCH (ic:Individual)-[r2:MANAGEMENT_OF|SUBSIDIARY_OF|SHAREHOLDER_OF]->(s)"  # TODO ADD WHERE HERE
-        query += "\nOPTIONAL MATCH (cc:Supplier)-[r3:SUBSIDIARY_OF|SHAREHOLDER_OF]->(s)"  # TODO ADD WHERE HERE
+        query += _neighbour_subquery("Individual", "MANAGEMENT_OF|SUBSIDIARY_OF|SHAREHOLDER_OF", "individualRelationshipsCorpGroup", "individualsCorpGroup")  # TODO ADD WHERE HERE
+        query += _neighbour_subquery("Supplier", "SUBSIDIARY_OF|SHAREHOLDER_OF", "companyRelationshipsCorpGroup", "companyCorpGroup")  # TODO ADD WHERE HERE
     else:
-        query += "\nOPTIONAL MATCH (ic:Individual)-[r2:SHAREHOLDER_OF|BENEFICIAL_OWNER_OF|ULTIMATELY_OWNED_SUBSIDIARY_OF|GLOBAL_ULTIMATE_OWNER_OF|OTHER_ULTIMATE_BENEFICIARY_OF]->(s)"
-        query += "\nOPTIONAL MATCH (cc:Supplier)-[r3:SHAREHOLDER_OF|BENEFICIAL_OWNER_OF|ULTIMATELY_OWNED_SUBSIDIARY_OF|GLOBAL_ULTIMATE_OWNER_OF|OTHER_ULTIMATE_BENEFICIARY_OF]->(s)"
+        query += _neighbour_subquery("Individual", CORP_GROUP_RELATIONSHIPS, "individualRelationshipsCorpGroup", "individualsCorpGroup")
+        query += _neighbour_subquery("Supplier", CORP_GROUP_RELATIONSHIPS, "companyRelationshipsCorpGroup", "companyCorpGroup")
 
         # """
         # OPTIONAL MATCH (ss:Supplier)-[:SHAREHOLDER_OF]->(s)
@@ -294,11 +338,11 @@ async def build_dynamic_query_for_direct_suppliers(client_id, filters):
         # """
 
     query += """
-    RETURN c AS client, collect(DISTINCT r) AS supplierRelationships, collect(DISTINCT s) AS suppliers, collect(DISTINCT r1) AS individualRelationships, collect(DISTINCT i) AS individuals
+    RETURN c AS client, supplierRelationships, suppliers, individualRelationships, individuals
     """
 
     query += """
-    , collect(DISTINCT r2) AS individualRelationshipsCorpGroup, collect(DISTINCT ic) AS individualsCorpGroup, collect(DISTINCT r3) AS companyRelationshipsCorpGroup, collect(DISTINCT cc) AS companyCorpGroup
+    , individualRelationshipsCorpGroup, individualsCorpGroup, companyRelationshipsCorpGroup, companyCorpGroup
     """
 
     print(query, "\n" ,params)
@@ -306,7 +350,7 @@ async def build_dynamic_query_for_direct_suppliers(client_id, filters):
     return query, params
 
 
-async def fetch_client_node(client_id):
+async def fetch_client_node(client_id, driver: Optional[AsyncDriver] = None):
 
     query = """
     MATCH (c:Company {id: $client_id})
@@ -315,10 +359,7 @@ async def fetch_client_node(client_id):
 
     params = {'client_id': client_id}
 
-    async with AsyncGraphDatabase.driver(URI, auth=(USER, PASSWORD)) as driver:
-        async with driver.session() as session:
-            result = await session.run(query,params)
-            records = await result.data()
+    records = await execute_query(query, params, READ_ACCESS, driver)
 
     return records
 
@@ -369,64 +410,116 @@ def apply_indirect_supplier_formatting(node: dict):
 
     return node
 
-def apply_direct_supplier_formatting(node: dict):
-
-    rating_theme_weightage = {
-        "sanctions_rating":3,
-        "government_political_rating":3,
-        "bribery_corruption_overall_rating":2,
-        "other_adverse_media_rating":2,
-        "financials_rating": 2,
-        "additional_indicator_rating":1,
-    }
-
-    rating_weightage = {
-        "High":10,
-        "Medium":5,
-        "Low":1,
-        "No Alerts":0
-    }
+RATING_THEME_WEIGHTAGE = {
+    "sanctions_rating":3,
+    "government_political_rating":3,
+    "bribery_corruption_overall_rating":2,
+    "other_adverse_media_rating":2,
+    "financials_rating": 2,
+    "additional_indicator_rating":1,
+}
+
+RATING_WEIGHTAGE = {
+    "High":10,
+    "Medium":5,
+    "Low":1,
+    "No Alerts":0
+}
+
+# Rating bands of the overall rating, anything else uses the last (default) band
+RATING_BANDS = ["High", "Medium", "Low"]
+RATING_BAND_INDEX = {rating: index for index, rating in enumerate(RATING_BANDS)}
+DEFAULT_RATING_BAND = len(RATING_BANDS)
+
+# (scale_min, scale_max) of the risk intensity score per band, default last
+RATING_BAND_SCALES = np.array([[50, 100], [10, 50], [0, 10], [0, 10]])
+
+# (start_rgb, end_rgb) of the colour gradient per band
+RATING_GRADIENTS = {
+    "Low": ((90, 129, 20), (185, 219, 101)),
+    "Medium": ((255, 214, 58), (247, 152, 33)),  # Yellow
+    "High": ((236, 108, 89), (197, 37, 37)),
+}
+DEFAULT_NODE_COLOUR = "#BCCCDC"
+PALETTE_STEPS = 256
+
+_THEME_WEIGHTS = np.array(list(RATING_THEME_WEIGHTAGE.values()))
+_MAXIMUM_RATING_SCORE = int(_THEME_WEIGHTS.sum()) * RATING_WEIGHTAGE["High"]
+
+# Every combination of the six theme ratings (4^6) and its weighted score, computed once as a
+# (combinations x themes) matrix product; nodes only look up their combination
+_RATING_COMBINATIONS = list(itertools.product(RATING_WEIGHTAGE, repeat=len(RATING_THEME_WEIGHTAGE)))
+_RATING_COMBINATION_INDEX = {combination: index for index, combination in enumerate(_RATING_COMBINATIONS)}
+_RATING_COMBINATION_SCORES = np.array(
+    [[RATING_WEIGHTAGE[rating] for rating in combination] for combination in _RATING_COMBINATIONS]
+) @ _THEME_WEIGHTS
+_theme_ratings = operator.itemgetter(*RATING_THEME_WEIGHTAGE)
+
+
+def _build_palettes() -> np.ndarray:
+    # One row of PALETTE_STEPS hex colours per band, the default band is a single colour
+    steps = np.linspace(0, 1, PALETTE_STEPS)
+    palettes = np.full((len(RATING_BANDS) + 1, PALETTE_STEPS), DEFAULT_NODE_COLOUR, dtype=object)
+    for rating, (start_rgb, end_rgb) in RATING_GRADIENTS.items():
+        palettes[RATING_BAND_INDEX[rating]] = [_interpolate_rgb(start_rgb, end_rgb, t) for t in steps]
+    return palettes
+
+
+def _palette_index(scores: np.ndarray) -> np.ndarray:
+    return np.rint(np.clip(scores, 0, 1) * (PALETTE_STEPS - 1)).astype(np.intp)
+
+
+def _weighted_rating_scores(nodes: list) -> np.ndarray:
+    count = len(nodes)
+    try:
+        combinations = np.fromiter(
+            (_RATING_COMBINATION_INDEX.get(_theme_ratings(node), -1) for node in nodes), np.intp, count=count
+        )
+    except KeyError:
+        # Some node lacks a theme rating
+        combinations = np.fromiter(
+            (_RATING_COMBINATION_INDEX.get(tuple(map(node.get, RATING_THEME_WEIGHTAGE)), -1) for node in nodes),
+            np.intp, count=count
+        )
+
+    weighted_rating_scores = _RATING_COMBINATION_SCORES[combinations]
+    # Missing or unexpected ratings count as no alerts
+    for index in np.flatnonzero(combinations < 0).tolist():
+        weighted_rating_scores[index] = sum(
+            weight * RATING_WEIGHTAGE.get(nodes[index].get(theme), 0) for theme, weight in RATING_THEME_WEIGHTAGE.items()
+        )
+    return weighted_rating_scores
+
+
+def score_direct_suppliers(nodes: list) -> list:
+    """
+    Set risk_intensity_score, node_colour and node_size on all direct supplier nodes at once.
 
-    maximum_range = 0
-    minimum_range = 0
-    for rating_type, rating_weight in rating_theme_weightage.items():
-        maximum_range += rating_weightage["High"]*rating_weight
-
-    weighted_rating_score = 0
-    for rating_type, rating_value in node.items():
-        if rating_type in rating_theme_weightage.keys():
-            weighted_rating_score += rating_theme_weightage[rating_type]*rating_weightage[rating_value]
-
-    # print(weighted_rating_score)
-
-    overall_rating = node.get("overall_rating")
-    if overall_rating == "High":
-        scale_max = 100
-        scale_min = 50
-    elif overall_rating == "Medium":
-        scale_max = 50
-        scale_min = 10
-    elif overall_rating == "Low":
-        scale_max = 10
-        scale_min = 0
-    else:
-        scale_max = 10
-        scale_min = 0
+    Weighted scores, their scaling to the overall rating band and the colour lookup in
+    the band's precomputed palette run as NumPy array operations over all nodes.
+    """
+    if not nodes:
+        return nodes
 
-    # print(overall_rating, scale_min, scale_max)
+    bands = np.fromiter(
+        (RATING_BAND_INDEX.get(node.get("overall_rating"), DEFAULT_RATING_BAND) for node in nodes),
+        np.intp, count=len(nodes)
+    )
+    scaled_scores = _weighted_rating_scores(nodes) / _MAXIMUM_RATING_SCORE
+    scale_min, scale_max = RATING_BAND_SCALES[bands, 0], RATING_BAND_SCALES[bands, 1]
+    risk_intensity_scores = np.rint(scaled_scores * (scale_max - scale_min) + scale_min).astype(int)
+    colours = RATING_PALETTES[bands, _palette_index(scaled_scores)]
 
-    scaled_score = (weighted_rating_score-minimum_range)/(maximum_range-minimum_range)
+    for node, risk_intensity_score, colour in zip(nodes, risk_intensity_scores.tolist(), colours.tolist()):
+        node["risk_intensity_score"] = risk_intensity_score
+        node["node_colour"] = colour
+        node["node_size"] = 200
 
-    scaled_weighted_rating_score = (((weighted_rating_score-minimum_range) * (scale_max-scale_min))/(maximum_range-minimum_range))+scale_min
-    scaled_weighted_rating_score = round(scaled_weighted_rating_score)
+    return nodes
 
-    # print(scaled_weighted_rating_score, scaled_score)
+def apply_direct_supplier_formatting(node: dict):
 
-    node["risk_intensity_score"] = scaled_weighted_rating_score
-    node["node_colour"] = _convert_score_to_hex_gradient(scaled_score, overall_rating)
-    node["node_size"] = 200
-
-    return node
+    return score_direct_suppliers([node])[0]
 
 def apply_central_company_formatting(node:dict):
 
@@ -437,23 +530,9 @@ def apply_central_company_formatting(node:dict):
 
 def _convert_score_to_hex_gradient(score, rating):
 
-    if rating == "Low":
-        start_rgb = (90, 129, 20)
-        end_rgb = (185, 219, 101)
-        hex_colour = _interpolate_rgb(start_rgb, end_rgb, score)
-    elif rating == "Medium": # Yellow
-        start_rgb = (255, 214, 58)
-        end_rgb = (247, 152, 33)
-        hex_colour = _interpolate_rgb(start_rgb, end_rgb, score)
-    elif rating == "High":
-        start_rgb = (236, 108, 89)
-        end_rgb = (197, 37, 37)
-        hex_colour = _interpolate_rgb(start_rgb, end_rgb, score)
-    else:
-        hex_colour = "#BCCCDC"
-
-
-    return hex_colour
+    if rating not in RATING_GRADIENTS:
+        return DEFAULT_NODE_COLOUR
+    return RATING_PALETTES[RATING_BAND_INDEX[rating], _palette_index(np.asarray(score))]
 
 def _interpolate_rgb(start_rgb, end_rgb, t):
     r1, g1, b1 = start_rgb
@@ -467,6 +546,8 @@ def _interpolate_rgb(start_rgb, end_rgb, t):
 
     return hex_colour
 
+RATING_PALETTES = _build_palettes()
+
 
 async def compile_company_profile(ens_id:str, session):
 
@@ -701,14 +782,3 @@ async def pull_financial_metrics(ens_id: str, latest_session_id: str, session):
 
     return result
 
-def simple_dedup(data, key1, key2):
-    seen = set()
-    result = []
-
-    for item in data:
-        key = (item[key1], item[key2])
-        if key not in seen:
-            seen.add(key)
-            result.append(item)
-
-    return result
@@ -0,0 +1,135 @@
+# Benchmark of the direct supplier network query against a synthetic graph.
+#
+# Builds a throwaway client with `--suppliers` suppliers, each with managers,
+# corporate group owners and corporate group companies, then PROFILEs the
+# previous chained OPTIONAL MATCH query and the current CALL {} subquery version
+# and prints db hits and the peak number of rows flowing between operators.
+#
+#   python -m app.core.supplier.graph_benchmark --suppliers 200 --managers 5 --owners 10 --group-companies 10
+#
+# Needs the graphdb__* settings of a Neo4j instance that may be written to, the
+# synthetic nodes are deleted afterwards.
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Dict, Tuple
+
+from neo4j import WRITE_ACCESS
+
+from app.core.supplier.graph import CORP_GROUP_RELATIONSHIPS, build_dynamic_query_for_direct_suppliers
+from app.core.utils.graph_db import close_graph_driver, execute_query, get_graph_driver
+
+SYNTHETIC_GRAPH_QUERY = """
+CREATE (c:Company {id: $client_id, name: "Benchmark client", benchmark_run: $client_id})
+WITH c
+UNWIND range(1, $suppliers) AS supplier_index
+CREATE (s:Supplier {id: $client_id + "-s" + supplier_index, name: "Supplier " + supplier_index, country: "SA",
+                    type: "organization", benchmark_run: $client_id})-[:SUPPLIER_OF]->(c)
+WITH s
+CALL {
+    WITH s
+    UNWIND range(1, $managers) AS index
+    CREATE (:Individual {id: s.id + "-m" + index, type: "individual", benchmark_run: $client_id})-[:MANAGEMENT_OF]->(s)
+}
+CALL {
+    WITH s
+    UNWIND range(1, $owners) AS index
+    CREATE (:Individual {id: s.id + "-o" + index, type: "individual", benchmark_run: $client_id})-[:SHAREHOLDER_OF]->(s)
+}
+CALL {
+    WITH s
+    UNWIND range(1, $group_companies) AS index
+    CREATE (:Supplier {id: s.id + "-g" + index, type: "organization", benchmark_run: $client_id})-[:BENEFICIAL_OWNER_OF]->(s)
+}
+"""
+
+CLEANUP_QUERY = """
+MATCH (n {benchmark_run: $client_id})
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+# The query as it was built before the CALL {} subqueries, for comparison
+LEGACY_QUERY = f"""
+MATCH (c:Company {{id: $client_id}})<-[r:SUPPLIER_OF]-(s:Supplier)
+OPTIONAL MATCH (i:Individual)-[r1:MANAGEMENT_OF]->(s)
+OPTIONAL MATCH (ic:Individual)-[r2:{CORP_GROUP_RELATIONSHIPS}]->(s)
+OPTIONAL MATCH (cc:Supplier)-[r3:{CORP_GROUP_RELATIONSHIPS}]->(s)
+RETURN c AS client, collect(DISTINCT r) AS supplierRelationships, collect(DISTINCT s) AS suppliers, collect(DISTINCT r1) AS individualRelationships, collect(DISTINCT i) AS individuals
+, collect(DISTINCT r2) AS individualRelationshipsCorpGroup, collect(DISTINCT ic) AS individualsCorpGroup, collect(DISTINCT r3) AS companyRelationshipsCorpGroup, collect(DISTINCT cc) AS companyCorpGroup
+"""
+
+
+def summarize_profile(plan: dict) -> Tuple[int, int]:
+    """
+    Total db hits and the largest row count produced by any operator of a PROFILE plan.
+    """
+    db_hits, peak_rows = plan.get("dbHits", 0), plan.get("rows", 0)
+    for child in plan.get("children", []):
+        child_hits, child_rows = summarize_profile(child)
+        db_hits += child_hits
+        peak_rows = max(peak_rows, child_rows)
+    return db_hits, peak_rows
+
+
+async def profile_query(query: str, parameters: dict) -> Dict:
+    async with get_graph_driver().session() as neo4j_session:
+        started = time.perf_counter()
+        result = await neo4j_session.run("PROFILE " + query, parameters)
+        record = await result.single()
+        summary = await result.consume()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+    db_hits, peak_rows = summarize_profile(summary.profile)
+    sizes = {key: len(value) for key, value in record.items() if isinstance(value, list)}
+    return {"db_hits": db_hits, "peak_rows": peak_rows, "elapsed_ms": elapsed_ms, "sizes": sizes}
+
+
+async def run_benchmark(suppliers: int, managers: int, owners: int, group_companies: int) -> None:
+    client_id = f"benchmark-{uuid.uuid4()}"
+    await execute_query(
+        SYNTHETIC_GRAPH_QUERY,
+        {"client_id": client_id, "suppliers": suppliers, "managers": managers, "owners": owners,
+         "group_companies": group_companies},
+        WRITE_ACCESS,
+    )
+    try:
+        current_query, parameters = await build_dynamic_query_for_direct_suppliers(client_id, {})
+        # Warm up the plan cache so planning time is not measured
+        for query in (LEGACY_QUERY, current_query):
+            await profile_query(query, parameters)
+
+        results = {
+            "chained OPTIONAL MATCH": await profile_query(LEGACY_QUERY, parameters),
+            "CALL {} subqueries": await profile_query(current_query, parameters),
+        }
+    finally:
+        async with get_graph_driver().session() as neo4j_session:
+            await (await neo4j_session.run(CLEANUP_QUERY, {"client_id": client_id})).consume()
+
+    print(f"Synthetic graph: {suppliers} suppliers x ({managers} managers, {owners} owners, {group_companies} group companies)")
+    print(f"{'query':<24}{'db hits':>14}{'peak rows':>14}{'ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['db_hits']:>14}{result['peak_rows']:>14}{result['elapsed_ms']:>10.1f}")
+
+    legacy_sizes, current_sizes = (result["sizes"] for result in results.values())
+    if legacy_sizes != current_sizes:
+        print(f"Result sizes differ: {legacy_sizes} != {current_sizes}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the direct supplier network query on a synthetic graph.")
+    parser.add_argument("--suppliers", type=int, default=200)
+    parser.add_argument("--managers", type=int, default=5)
+    parser.add_argument("--owners", type=int, default=10)
+    parser.add_argument("--group-companies", type=int, default=10)
+    args = parser.parse_args()
+    try:
+        await run_benchmark(args.suppliers, args.managers, args.owners, args.group_companies)
+    finally:
+        await close_graph_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
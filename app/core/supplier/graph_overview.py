@@ -0,0 +1,217 @@
+# Level-of-detail retrieval for the supplier network graph.
+#
+# Instead of the whole graph in one payload, the first call returns the client
+# node and the direct suppliers aggregated into clusters (by country or overall
+# rating) with counts; the frontend then expands a cluster into its suppliers, or
+# a supplier into its managers and corporate group, one page at a time. Nodes are
+# trimmed to the fields the renderer uses.
+
+import math
+from typing import Dict, List, Optional
+
+from neo4j import READ_ACCESS, AsyncDriver
+
+from app.core.supplier.graph import (
+    CORP_GROUP_RELATIONSHIPS,
+    _convert_score_to_hex_gradient,
+    apply_central_company_formatting,
+    apply_indirect_supplier_formatting,
+    apply_person_formatting,
+    build_supplier_match,
+    fetch_client_node,
+    relationship_label,
+    resolve_client_id,
+    score_direct_suppliers,
+)
+from app.core.utils.country_index import get_country_name
+from app.core.utils.graph_db import execute_query
+
+GRAPH_PAGE_LIMIT = 100
+
+# Suppliers without a value for the grouped property
+UNKNOWN_CLUSTER = "Unknown"
+
+# Node properties sent to the frontend, everything else stays in the profile endpoints
+RENDER_FIELDS = (
+    "id", "ens_id", "name", "country", "node_type", "node_category", "node_colour", "node_size",
+    "risk_intensity_score", "risk_indicator", "node_risk_description", "overall_rating", "query_message",
+)
+
+# Most severe first, a cluster takes the colour of its most severe rating
+RATING_SEVERITY = ["High", "Medium", "Low"]
+
+CLUSTER_NODE_SIZE_MIN = 200
+CLUSTER_NODE_SIZE_MAX = 450
+
+NEIGHBOUR_RELATIONSHIPS = f"MANAGEMENT_OF|{CORP_GROUP_RELATIONSHIPS}"
+
+
+def trim_node(node: dict) -> dict:
+    return {field: node[field] for field in RENDER_FIELDS if field in node}
+
+
+def cluster_id(group_by: str, value: str) -> str:
+    return f"cluster:{group_by}:{value}"
+
+
+def _central_node(client_node: dict) -> dict:
+    client_node.pop("type", None)
+    client_node["node_type"] = "Company"
+    client_node["node_category"] = "central"
+    return trim_node(apply_central_company_formatting(client_node))
+
+
+def _page(records: list, limit: int) -> tuple:
+    # One extra record is fetched to know whether another page exists
+    if len(records) > limit:
+        return records[:limit], True
+    return records, False
+
+
+def _split_filters(request: dict, *fields: str) -> tuple:
+    # Paging and grouping fields must not reach build_supplier_match, which filters on every field
+    filters = dict(request)
+    options = {field: filters.pop(field, None) for field in fields}
+    filters.pop("client", None)
+    client_id = resolve_client_id(filters.pop("client_id", None))
+    return client_id, options, filters
+
+
+async def fetch_graph_overview(request: dict, driver: Optional[AsyncDriver] = None) -> Dict:
+    """
+    The client node plus one cluster node per value of `group_by` among its (filtered) direct suppliers.
+
+    Each cluster carries its supplier count and the count per overall rating.
+    """
+    client_id, options, filters = _split_filters(request, "group_by")
+    group_by = options["group_by"] or "country"
+
+    query, params = build_supplier_match(client_id, filters)
+    query += """
+    WITH c, s[$group_by] AS value, s.overall_rating AS rating, count(DISTINCT s) AS suppliers
+    RETURN c AS client, collect({value: value, rating: rating, suppliers: suppliers}) AS groups
+    """
+    params["group_by"] = group_by
+    records = await execute_query(query, params, READ_ACCESS, driver)
+
+    if not records:
+        client_records = await fetch_client_node(client_id, driver)
+        central_node = _central_node(client_records[0]["client"])
+        central_node["query_message"] = "No Results Found for Requested Filters"
+        return {"nodes": [central_node], "edges": [], "group_by": group_by, "total_suppliers": 0}
+
+    central_node = _central_node(records[0]["client"])
+    clusters: Dict[str, dict] = {}
+    for group in records[0]["groups"]:
+        value = UNKNOWN_CLUSTER if group["value"] is None else str(group["value"])
+        cluster = clusters.setdefault(value, {"count": 0, "ratings": {}})
+        cluster["count"] += group["suppliers"]
+        rating = group["rating"] or UNKNOWN_CLUSTER
+        cluster["ratings"][rating] = cluster["ratings"].get(rating, 0) + group["suppliers"]
+
+    largest = max(cluster["count"] for cluster in clusters.values())
+    nodes, edges = [central_node], []
+    for value, cluster in sorted(clusters.items(), key=lambda item: -item[1]["count"]):
+        worst_rating = next((rating for rating in RATING_SEVERITY if rating in cluster["ratings"]), None)
+        label = get_country_name(value) if group_by == "country" and value != UNKNOWN_CLUSTER else value
+        size_range = CLUSTER_NODE_SIZE_MAX - CLUSTER_NODE_SIZE_MIN
+        nodes.append({
+            "id": cluster_id(group_by, value),
+            "name": label or value,
+            "node_type": "cluster",
+            "node_category": "cluster",
+            "group_by": group_by,
+            "cluster_value": value,
+            "count": cluster["count"],
+            "ratings": cluster["ratings"],
+            "node_colour": _convert_score_to_hex_gradient(0.5, worst_rating),
+            "node_size": round(CLUSTER_NODE_SIZE_MIN + size_range * math.sqrt(cluster["count"] / largest)),
+        })
+        edges.append({"source": cluster_id(group_by, value), "target": central_node["id"], "relationship_type": "SUPPLIER"})
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "group_by": group_by,
+        "total_suppliers": sum(cluster["count"] for cluster in clusters.values()),
+    }
+
+
+async def expand_graph_cluster(request: dict, driver: Optional[AsyncDriver] = None) -> Dict:
+    """
+    One page of the direct suppliers in a cluster of `fetch_graph_overview`, ordered by id.
+
+    :return: Nodes and SUPPLIER edges to the client, `next_cursor` is None on the last page.
+    """
+    client_id, options, filters = _split_filters(request, "group_by", "cluster_value", "limit", "cursor")
+    group_by = options["group_by"] or "country"
+    limit = options["limit"] or GRAPH_PAGE_LIMIT
+
+    conditions = ["s[$group_by] IS NULL" if options["cluster_value"] == UNKNOWN_CLUSTER else "s[$group_by] = $cluster_value"]
+    if options["cursor"]:
+        conditions.append("s.id > $cursor")
+
+    query, params = build_supplier_match(client_id, filters, conditions)
+    query += """
+    WITH DISTINCT s ORDER BY s.id LIMIT $limit
+    RETURN s AS supplier
+    """
+    params.update(group_by=group_by, cluster_value=options["cluster_value"], cursor=options["cursor"], limit=limit + 1)
+    records, has_more = _page(await execute_query(query, params, READ_ACCESS, driver), limit)
+
+    suppliers = [record["supplier"] for record in records]
+    for node in suppliers:
+        node["node_type"] = node.pop("type", "organization")
+        node["node_category"] = "direct"
+    score_direct_suppliers(suppliers)
+
+    nodes = [trim_node(node) for node in suppliers]
+    edges = [{"source": node["id"], "target": client_id, "relationship_type": "SUPPLIER"} for node in nodes]
+
+    return {
+        "cluster_id": cluster_id(group_by, options["cluster_value"]),
+        "nodes": nodes,
+        "edges": edges,
+        "next_cursor": nodes[-1]["id"] if has_more else None,
+    }
+
+
+async def expand_graph_node(request: dict, driver: Optional[AsyncDriver] = None) -> Dict:
+    """
+    One page of the managers and corporate group (individuals and companies) of a supplier node, ordered by id.
+
+    :return: Nodes and edges to the expanded node, `next_cursor` is None on the last page.
+    """
+    node_id = request["node_id"]
+    limit = request.get("limit") or GRAPH_PAGE_LIMIT
+    cursor = request.get("cursor")
+
+    query = f"""
+    MATCH (n)-[rel:{NEIGHBOUR_RELATIONSHIPS}]->(s:Supplier {{id: $node_id}})
+    WHERE (n:Individual OR n:Supplier) AND n.id <> s.id AND ($cursor IS NULL OR n.id > $cursor)
+    WITH n, min(type(rel)) AS relationship_type
+    ORDER BY n.id LIMIT $limit
+    RETURN n AS node, relationship_type
+    """
+    params = {"node_id": node_id, "cursor": cursor, "limit": limit + 1}
+    records, has_more = _page(await execute_query(query, params, READ_ACCESS, driver), limit)
+
+    nodes: List[dict] = []
+    edges: List[dict] = []
+    for record in records:
+        node = record["node"]
+        node["node_type"] = node.pop("type", "")
+        node["node_category"] = "indirect"
+        if node["node_type"].lower() == "individual":
+            node = apply_person_formatting(node)
+        else:
+            node = apply_indirect_supplier_formatting(node)
+        nodes.append(trim_node(node))
+        edges.append({"source": node["id"], "target": node_id, "relationship_type": relationship_label(record["relationship_type"])})
+
+    return {
+        "node_id": node_id,
+        "nodes": nodes,
+        "edges": edges,
+        "next_cursor": nodes[-1]["id"] if has_more else None,
+    }
@@ -1,95 +1,158 @@
-from typing import Dict
+from typing import Dict, Optional
 from fastapi import HTTPException
 import urllib
 from app.core.utils.db_utils import *
-import io
-from app.core.config import get_settings  # Import settings
-from azure.storage.blob import BlobServiceClient
-import zipfile
+from app.core.utils.blob_storage import find_latest_blob, get_blob_service_client, parse_range_header, stream_blob
+from app.core.utils.zip_stream import stream_blobs_as_zip
+from app.core.utils.cache_utils import TTLCache
+from app.core.utils.notification_hub import ENS_ID_STATUS_CHANNEL, NotificationHub, notification_hub
+from app.models import STATUS
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
 from app.schemas.logger import logger
 
-async def report_download(session_id: str, ens_id: str, type_of_file: str)->Dict:
-    try:
-        # Retrieve storage settings
-        storage_url = get_settings().storage.storage_account_url
-        container_name = session_id  # Session ID is the container name
-        sas_token = str(get_settings().storage.sas_token)
-
-        # Initialize BlobServiceClient with SAS token
-        blob_service_client = BlobServiceClient(account_url=storage_url, credential=sas_token)
-        container_client = blob_service_client.get_container_client(container_name)
-
-        # Define folder path based on ens_id (no leading slash)
-        folder_path = f"{ens_id}/"
-
-        # List blobs inside the specific folder
-        blob_list = container_client.list_blobs(name_starts_with=folder_path)
-
-
-        # Filter blobs that match session_id, ens_id, and type_of_file
-        matching_blobs = [
-            blob for blob in blob_list 
-            if ens_id in blob.name and blob.name.endswith(f".{type_of_file}")
-        ]
-
-        # Ensure at least one matching file exists
-        if not matching_blobs:
-            raise HTTPException(status_code=404, detail=f"No matching {type_of_file} file found for session_id {session_id} and ens_id {ens_id}")
+# (session_id, ens_id, file type) -> latest report {"name", "size", "etag", "last_modified"}
+# A replaced or deleted blob is detected by its etag on download; a newer report under a
+# different name is picked up once run_report_index_invalidation sees its ens_id complete,
+# or at the latest when the entry expires
+REPORT_INDEX_TTL = 600
+REPORT_INDEX = TTLCache(maxsize=10000, ttl=REPORT_INDEX_TTL)
+
+
+def index_report_blobs(session_id: str, blobs) -> None:
+    """
+    Record the latest report per (ens_id, file type) from a container listing.
+
+    Reports are stored as "<ens_id>/<file>.<type>"; blobs outside an ens_id folder are ignored.
+    """
+    latest = {}
+    for blob in blobs:
+        ens_id, separator, filename = blob.name.partition("/")
+        if not separator or "." not in filename:
+            continue
+        key = (session_id, ens_id, filename.rsplit(".", 1)[-1])
+        if key not in latest or blob.last_modified > latest[key].last_modified:
+            latest[key] = blob
+
+    for key, blob in latest.items():
+        REPORT_INDEX.set(key, {
+            "name": urllib.parse.unquote(blob.name),
+            "size": blob.size,
+            "etag": blob.etag,
+            "last_modified": blob.last_modified,
+        })
+
+
+def invalidate_report_index(session_id: str, ens_id: Optional[str] = None) -> int:
+    """
+    Forget indexed reports of a session (or of one ens_id in it), e.g. when a new report lands.
+    """
+    return REPORT_INDEX.invalidate(
+        lambda key: key[0] == session_id and (ens_id is None or key[1] == ens_id)
+    )
+
+
+async def run_report_index_invalidation(hub: Optional[NotificationHub] = None) -> None:
+    """
+    Forget the indexed reports of an ens_id whenever its report generation completes, until cancelled.
+    """
+    hub = hub or notification_hub
+    async with hub.subscribe(ENS_ID_STATUS_CHANNEL) as subscription:
+        while True:
+            payload = await subscription.get()
+            session_id = payload.get("session_id") if isinstance(payload, dict) else None
+            # Payloads without a report status cannot be told apart, treat them as a possible new report
+            if session_id is None or payload.get("report_generation_status", STATUS.COMPLETED.value) != STATUS.COMPLETED.value:
+                continue
+            ens_id = payload.get("ens_id")
+            removed = invalidate_report_index(str(session_id), str(ens_id) if ens_id is not None else None)
+            if removed:
+                logger.debug(f"Invalidated {removed} indexed report(s) for session {session_id}, ens_id {ens_id}")
+
+
+async def _open_report(container_name: str, report: Dict, range_header: Optional[str]) -> Dict:
+    size = report["size"]
+    byte_range = parse_range_header(range_header, size)
+    start, end = byte_range if byte_range else (0, size - 1)
+
+    # Only the requested range is fetched, chunk by chunk, and only if the blob is still the indexed version
+    chunks = await stream_blob(container_name, report["name"], offset=start, length=end - start + 1, etag=report["etag"])
+
+    return {
+        "chunks": chunks,
+        "filename": report["name"],
+        "size": size,
+        "start": start,
+        "end": end,
+        "partial": byte_range is not None,
+        "etag": report["etag"],
+    }
+
+
+async def report_download(session_id: str, ens_id: str, type_of_file: str, range_header: Optional[str] = None) -> Dict:
+    """
+    Open the latest report of an ens_id in a session for streaming.
+
+    The latest blob is taken from REPORT_INDEX when known, so a download is a single
+    ranged GET; the ens_id folder is only listed on an index miss or when the
+    indexed blob was replaced or removed.
+
+    :param session_id: Session ID, used as the container name.
+    :param ens_id: ENS ID, reports are stored under the "<ens_id>/" folder.
+    :param type_of_file: File extension (pdf, docx, ...).
+    :param range_header: Optional HTTP Range header, a single byte range is supported.
+    :return: Dictionary with the chunk iterator, filename, byte range and total size.
+    """
+    container_name = session_id  # Session ID is the container name
+    index_key = (session_id, ens_id, type_of_file)
+
+    report = REPORT_INDEX.get(index_key)
+    if report is not None:
+        try:
+            return await _open_report(container_name, report, range_header)
+        except (ResourceNotFoundError, ResourceModifiedError):
+            logger.debug(f"Indexed report {report['name']} changed, listing {ens_id}/ again")
+            REPORT_INDEX.pop(index_key)
+
+    # Define folder path based on ens_id (no leading slash) and keep the latest matching file
+    latest_blob = await find_latest_blob(container_name, f"{ens_id}/", f".{type_of_file}", contains=ens_id)
+
+    # Ensure at least one matching file exists
+    if latest_blob is None:
+        raise HTTPException(status_code=404, detail=f"No matching {type_of_file} file found for session_id {session_id} and ens_id {ens_id}")
+
+    report = {
+        # URL decode the latest filename
+        "name": urllib.parse.unquote(latest_blob.name),
+        "size": latest_blob.size,
+        "etag": latest_blob.etag,
+        "last_modified": latest_blob.last_modified,
+    }
+    REPORT_INDEX.set(index_key, report)
+
+    return await _open_report(container_name, report, range_header)
+    
 
-        # Sort blobs by last modified date to get the latest file
-        latest_blob = max(matching_blobs, key=lambda b: b.last_modified)
+async def report_bulk_download(session_id: str) -> Dict:
+    """
+    Open a streamed ZIP of every file in the session container.
 
-        # URL decode the latest filename
-        decoded_filename = urllib.parse.unquote(latest_blob.name)
+    :param session_id: Session ID, used as the container name.
+    :return: Dictionary with the ZIP chunk iterator and the archive filename.
+    """
+    container_name = session_id
 
-        # Get the latest file's blob client
-        blob_client = blob_service_client.get_blob_client(container=container_name, blob=decoded_filename)
+    # List all blobs inside the container, only their properties are kept
+    container_client = get_blob_service_client().get_container_client(container_name)
+    blob_list = [blob async for blob in container_client.list_blobs()]
 
-        # Download the blob data
-        stream = blob_client.download_blob()
-        file_data = stream.readall()
+    # Ensure there are files to download
+    if not blob_list:
+        raise HTTPException(status_code=404, detail=f"No files found for session_id {session_id}")
 
-        return file_data, decoded_filename
-    
-    
-    except Exception as e:
-        logger.error(f"Error in report_download: {str(e)}")
-        return {"error": str(e)}
-    
+    # The full listing is at hand, refresh the latest-report index for the session
+    index_report_blobs(session_id, blob_list)
 
-async def report_bulk_download(session_id: str) -> Dict:
-    try:
-        # Retrieve storage settings
-        storage_url = get_settings().storage.storage_account_url
-        container_name = session_id
-        sas_token = str(get_settings().storage.sas_token)
-
-        # Initialize BlobServiceClient with SAS token
-        blob_service_client = BlobServiceClient(account_url=storage_url, credential=sas_token)
-        container_client = blob_service_client.get_container_client(container_name)
-
-        
-        # List all blobs inside the container
-        blob_list = list(container_client.list_blobs())  # Convert generator to list
-
-        # Ensure there are files to download
-        if not blob_list:
-            raise HTTPException(status_code=404, detail=f"No files found for session_id {session_id}")
-
-        # Create an in-memory ZIP file
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for blob in blob_list:
-                blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob.name)
-                file_data = blob_client.download_blob().readall()
-                zip_file.writestr(blob.name, file_data)  # Add file to ZIP with original path
-
-        # Seek to the beginning of the ZIP file
-        zip_buffer.seek(0)
-        
-        return zip_buffer.getvalue(), f"{session_id}.zip"
-
-    except Exception as e:
-        logger.error(f"Error in report_bulk_download: {str(e)}")
-        return {"error": str(e)}
-        
\ No newline at end of file
+    return {
+        "chunks": stream_blobs_as_zip(container_name, blob_list),
+        "filename": f"{session_id}.zip",
+    }
@@ -3,90 +3,100 @@ from typing import Dict
 from fastapi import  HTTPException, status
 from app.core.config import get_settings
 from app.core.utils.db_utils import *
+from app.core.utils import country_index
+from app.core.utils.excel_utils import RowValidationError, stream_excel_to_table
 import pandas as pd
+from sqlalchemy import ARRAY, String, and_, any_, bindparam, case, cast
+import os
 import uuid
-import io
 from app.models import *
-import pycountry
 from app.schemas.logger import logger
 
-def validate_and_update_data(data, user_id, session_id):
+# Columns every uploaded row must have a value for
+REQUIRED_UPLOAD_COLUMNS = ["name", "country", "national_id"]
+
+def _bulk_uuid4(count):
+    """
+    Generate `count` random UUID4 strings from a single os.urandom call.
+    """
+    random_bytes = os.urandom(16 * count)
+    return [
+        str(uuid.UUID(bytes=random_bytes[offset:offset + 16], version=4))
+        for offset in range(0, 16 * count, 16)
+    ]
+
+def validate_and_update_data(data, user_id, session_id, first_row_number=1):
     """
     Validate the data for required fields, generate unique ens_id for each row, 
-    and update each row with a session_id. Add 'upload_' prefix to every key.
+    and update each row with a session_id. Add 'uploaded_' and 'unmodified_' prefixes to every key.
+
+    Works column-wise on a DataFrame, so the whole batch is validated at once and
+    every offending row is reported in a single error.
     
-    :param data: List of dictionaries representing rows of data.
+    :param data: DataFrame (or list of dictionaries) representing rows of data.
+    :param user_id: Id of the uploading user, set on each row.
     :param session_id: A session identifier to update in each row.
-    :raises ValueError: If any row is missing required fields.
+    :param first_row_number: Row number of the first row in `data`, used in error messages.
+    :raises RowValidationError: If any row is missing required fields.
+    :return: List of dictionaries ready to be inserted into upload_supplier_master_data.
     """
-    prefix = "uploaded_"
-
-    for index, row in enumerate(data, start=1):
-        # Add prefix to all keys
-        prefixed_row = {
-    f"uploaded_{key}": str(value) for key, value in row.items()
-} | {
-    f"unmodified_{key}": str(value) for key, value in row.items()
-}
-        prefixed_row['unmodified_country'] = prefixed_row['unmodified_country_copy']
-        # prefixed_row.pop("uploaded_country_copy", None)
-        # prefixed_row.pop("unmodified_country_copy", None)
-        # Validate required fields with prefixed keys
-        missing_fields = []
-        if not prefixed_row.get(f"{prefix}name"):
-            missing_fields.append(f"name")
-        if not prefixed_row.get(f"{prefix}country"):
-            missing_fields.append(f"country")
-        if not prefixed_row.get(f"{prefix}national_id"):
-            missing_fields.append(f"national_id")
-        
-        # If there are missing fields, raise an error with row number and the missing fields
-        if missing_fields:
-            raise ValueError(f"Name, Country, and National ID are mandatory. Please make sure your Excel file contains values in all three columns")
-        
-        # Generate a unique UUID for 'ens_id' and add 'session_id' to the row
-        prefixed_row[f"ens_id"] = str(uuid.uuid4())
-        prefixed_row[f"session_id"] = session_id
-        prefixed_row[f"user_id"] = user_id
-        # Update the data with the new prefixed row
-        data[index - 1] = prefixed_row
-
-    logger.debug("All rows are valid and updated with prefixed keys, ens_id, and session_id.")
-    logger.debug(f"data_validate_and_update_data {data}")
-    
-    return data
-
-country_cache = {}
-def get_country_code_optimized(country_name):
-    if pd.isna(country_name):
-        return country_name
-    if country_name in country_cache:
-        return country_cache[country_name]
-    country = pycountry.countries.get(name=country_name)
-    country_cache[country_name] = country.alpha_2 if country else country_name  # Keep original if not found
-    return country_cache[country_name]
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    df = df.fillna("").astype(str).reset_index(drop=True)
+
+    # Validate required fields for all rows at once
+    missing_mask = pd.Series(False, index=df.index)
+    for column in REQUIRED_UPLOAD_COLUMNS:
+        if column in df.columns:
+            missing_mask |= df[column] == ""
+        else:
+            missing_mask[:] = True
+
+    if missing_mask.any():
+        invalid_rows = (missing_mask[missing_mask].index + first_row_number).tolist()
+        raise RowValidationError(
+            "Name, Country, and National ID are mandatory. Please make sure your Excel file contains values in all three columns. "
+            "Missing values in row(s): ",
+            invalid_rows
+        )
+
+    # Add prefix to all keys
+    prefixed_df = pd.concat([df.add_prefix("uploaded_"), df.add_prefix("unmodified_")], axis=1)
+    if "unmodified_country_copy" in prefixed_df.columns:
+        prefixed_df["unmodified_country"] = prefixed_df["unmodified_country_copy"]
+
+    # Generate a unique UUID for 'ens_id' and add 'session_id' to the row
+    prefixed_df["ens_id"] = _bulk_uuid4(len(prefixed_df))
+    prefixed_df["session_id"] = session_id
+    prefixed_df["user_id"] = user_id
+
+    logger.debug(f"{len(prefixed_df)} row(s) are valid and updated with prefixed keys, ens_id, and session_id.")
+
+    return prefixed_df.to_dict(orient="records")
 
 async def process_excel_file(file_contents, client_id, current_user, session) -> Dict:
     try:
-        contents = await file_contents.read()
-        excel_file = io.BytesIO(contents)
-        df = pd.read_excel(excel_file)
-        df = df.where(pd.notnull(df), "")  
         allowed_rows = get_settings().allowedrows.general
-        if len(df) > allowed_rows:
-            raise ValueError(f"Only {allowed_rows} rows are allowed. Please upload a valid file.")
-        df['country_copy'] = df['country']    
-        df['country'] = df['country'].apply(get_country_code_optimized)
-
-        sheet_data = df.to_dict(orient="records")
         session_id = str(uuid.uuid4())
 
-        validate_and_update_data(sheet_data, current_user[1], session_id)
-
-        is_inserted = await insert_dynamic_data("upload_supplier_master_data", sheet_data, session)
+        def prepare_batch(rows, first_row_number):
+            # Keep the uploaded country name and map the country column to its ISO code
+            df = pd.DataFrame(rows)
+            if 'country' in df.columns:
+                df['country_copy'] = df['country']
+                df['country'] = country_index.map_series(df['country'])
+            return validate_and_update_data(df, current_user[1], session_id, first_row_number)
+
+        # Read, validate and insert the sheet in batches instead of loading it whole
+        rows_inserted = await stream_excel_to_table(
+            file_contents,
+            "upload_supplier_master_data",
+            prepare_batch,
+            allowed_rows,
+            session
+        )
 
         res = {
-            "rows_inserted": is_inserted.get('rows_inserted', 0),
+            "rows_inserted": rows_inserted,
             "session_id": session_id
         }
 
@@ -130,14 +140,17 @@ async def process_excel_file(file_contents, client_id, current_user, session) ->
             detail=f"Error processing the Excel file: {str(error)}"
         )
 
-async def get_session_supplier(sess_id, page_no, rows_per_page, final_validation_status, session) -> Dict:
+async def get_session_supplier(sess_id, page_no, rows_per_page, final_validation_status, session, cursor=None, include_count=None) -> Dict:
     try:
         if not sess_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Session ID is required.")
 
         offset = (page_no-1) * rows_per_page if page_no else 0
         limit = rows_per_page if rows_per_page else 10000
-        extra_filters = {"offset": offset, "limit": limit, "final_validation_status": final_validation_status}
+        # Skip the count on cursor pages unless asked for, the client already has the total
+        include_count = include_count if include_count is not None else not cursor
+        extra_filters = {"offset": offset, "limit": limit, "cursor": cursor, "include_count": include_count,
+                         "final_validation_status": final_validation_status}
 
         select_column = ["id", "uploaded_name", "uploaded_name_international", "uploaded_address", "uploaded_postcode", 
                          "uploaded_city", "uploaded_country", "uploaded_phone_or_fax", "uploaded_email_or_website", 
@@ -174,6 +187,7 @@ async def get_session_supplier(sess_id, page_no, rows_per_page, final_validation
             "total_data": session_supplier_data[1], 
             # "not_validated_count": not_validated_count, 
             "data": session_supplier_data[0], 
+            "next_cursor": session_supplier_data[2],
             "session_id": sess_id
         }
 
@@ -203,66 +217,79 @@ async def update_suggestions_bulk(payload, session) -> Dict:
                 detail="Table 'upload_supplier_master_data' does not exist in the database schema."
             )
 
-        # Step 1: Automatically accept all MATCH statuses
-        accept_match_query = (
-            update(table_class)
-            .where(table_class.c.session_id == payload.session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT)
-            .values(final_status=FinalStatus.ACCEPTED)
-        )
-        accepted_rows = await session.execute(accept_match_query)
-        logger.info(f"Accepted Rows with MATCH status: {accepted_rows.rowcount}")
-
-        reject_match_query = (
-            update(table_class)
-            .where(table_class.c.session_id == payload.session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_REJECT)
-            .values(final_status=FinalStatus.REJECTED)
-        )
-        rejected_rows = await session.execute(reject_match_query)
-        logger.info(f"Accepted Rows with MATCH status: {rejected_rows.rowcount}")
-
-        # Step 2: Reject all others unless explicitly accepted in the payload
+        # Reject all others unless explicitly accepted in the payload
         final_response = (
             FinalStatus.ACCEPTED 
             if payload.status.replace(" ", "").strip().lower() in ['accept', 'accepted'] 
             else FinalStatus.REJECTED
         )
-    
-        reject_or_accept_others_query = (
+
+        # Step 1: One UPDATE for the whole session:
+        #   AUTO_ACCEPT -> ACCEPTED, AUTO_REJECT -> REJECTED,
+        #   REVIEW -> take the suggested values and the requested status
+        is_review = table_class.c.final_validation_status == FinalValidatedStatus.REVIEW
+        final_status_type = table_class.c.final_status.type
+        suggested_columns = [
+            "name", "name_international", "address", "postcode", "city", "country",
+            "phone_or_fax", "email_or_website", "national_id", "state", "address_type"
+        ]
+
+        update_query = (
             update(table_class)
             .where(table_class.c.session_id == payload.session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.REVIEW) 
+            .where(table_class.c.final_validation_status.in_([
+                FinalValidatedStatus.AUTO_ACCEPT,
+                FinalValidatedStatus.AUTO_REJECT,
+                FinalValidatedStatus.REVIEW
+            ]))
             .values(
-                name=table_class.c.suggested_name,
-                name_international=table_class.c.suggested_name_international,
-                address=table_class.c.suggested_address,
-                postcode=table_class.c.suggested_postcode,
-                city=table_class.c.suggested_city,
-                country=table_class.c.suggested_country,
-                phone_or_fax=table_class.c.suggested_phone_or_fax,
-                email_or_website=table_class.c.suggested_email_or_website,
-                national_id=table_class.c.suggested_national_id,
-                state=table_class.c.suggested_state,
-                address_type=table_class.c.suggested_address_type,             
-                final_status=final_response
+                final_status=case(
+                    (table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT,
+                     cast(FinalStatus.ACCEPTED, final_status_type)),
+                    (table_class.c.final_validation_status == FinalValidatedStatus.AUTO_REJECT,
+                     cast(FinalStatus.REJECTED, final_status_type)),
+                    else_=cast(final_response, final_status_type)
+                ),
+                **{
+                    column: case((is_review, table_class.c[f"suggested_{column}"]), else_=table_class.c[column])
+                    for column in suggested_columns
+                }
             )
+            .returning(table_class.c.final_validation_status)
+            .cte("updated_rows")
         )
 
-        result = await session.execute(reject_or_accept_others_query)
-        logger.info(f"Updated Rows (Non-MATCH statuses): {result.rowcount}")
+        # Count the updated rows per validation status without returning them to the app
+        counts_query = select(
+            update_query.c.final_validation_status, func.count()
+        ).group_by(update_query.c.final_validation_status)
+        counts_result = await session.execute(counts_query)
+        updated_counts = {row[0]: row[1] for row in counts_result.all()}
+
+        accepted_count = updated_counts.get(FinalValidatedStatus.AUTO_ACCEPT, 0)
+        rejected_count = updated_counts.get(FinalValidatedStatus.AUTO_REJECT, 0)
+        review_count = updated_counts.get(FinalValidatedStatus.REVIEW, 0)
+        logger.info(f"Accepted Rows with MATCH status: {accepted_count}")
+        logger.info(f"Rejected Rows with MATCH status: {rejected_count}")
+        logger.info(f"Updated Rows (Non-MATCH statuses): {review_count}")
+
+        if (accepted_count + review_count):
+            # Step 2: Promote accepted rows to supplier_master_data inside Postgres
+            promoted_count = await promote_accepted_suppliers(session, payload.session_id, commit=False)
+            logger.debug(f"Promoted {promoted_count} rows to supplier_master_data")
 
-
-        if (accepted_rows.rowcount + result.rowcount):
-            # Step 3: Call update_supplier_master_data to process changes
-            response_supplier_master_data = await update_supplier_master_data(session, payload.session_id)
+        await session.commit()
+        invalidate_session_counts("upload_supplier_master_data", {payload.session_id})
+        if (accepted_count + review_count):
+            invalidate_session_counts("supplier_master_data", {payload.session_id})
+            await invalidate_graph_cache_for_session(payload.session_id, session)
         
         return {
             "status": "success",
-            "message": f"Updated {accepted_rows.rowcount + rejected_rows.rowcount + result.rowcount} rows successfully.",
-            "accepted_count": accepted_rows.rowcount,
-            "rejected_count": rejected_rows.rowcount,
-            "review_count": result.rowcount
+            "message": f"Updated {accepted_count + rejected_count + review_count} rows successfully.",
+            "accepted_count": accepted_count,
+            "rejected_count": rejected_count,
+            "review_count": review_count
         }
 
     except HTTPException as http_err:
@@ -314,51 +341,8 @@ async def update_suggestions_single(payload, session_id, session: AsyncSession)
 
         logger.debug(f"Payload: {payload}")
 
-        # Step 2: Fetch all rows for the session_id
-        query = select(table_class).where(table_class.c.session_id == session_id)
-        result = await session.execute(query)
-        rows = result.fetchall()
-
-        if not rows:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"No records found for session_id: {session_id}"
-            )
-
-        accept_match_query = (
-            update(table_class)
-            .where(table_class.c.session_id == session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT)
-            .values(final_status=FinalStatus.ACCEPTED)
-        )
-        accepted_rows = await session.execute(accept_match_query)
-        logger.info(f"Accepted Rows with MATCH status: {accepted_rows.rowcount}")
-
-        reject_match_query = (
-            update(table_class)
-            .where(table_class.c.session_id == session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_REJECT)
-            .values(final_status=FinalStatus.REJECTED)
-        )
-        rejected_rows = await session.execute(reject_match_query)
-        logger.info(f"Accepted Rows with MATCH status: {rejected_rows.rowcount}")
-        # Step 3: Fetch accepted ens_ids from DB
-        accepted_rows_query = (
-            select(table_class.c.ens_id)
-            .where(table_class.c.session_id == session_id)
-            .where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT)
-        )
-        result_rows_query = await session.execute(accepted_rows_query)
-        ac_ens_ids = result_rows_query.fetchall()
-        accepted_ens_ids = list({row[0] for row in ac_ens_ids})  # Unique ens_ids
-
-        logger.debug(f"Accepted ens_ids from DB: {accepted_ens_ids}")
-
-        # Step 4: Convert to list of dictionaries for further processing
-        column_names = result.keys()
-        data_dicts = [dict(zip(column_names, row)) for row in rows]
-
-        # Step 5: Categorize ens_ids into accepted & rejected lists
+        # Step 2: Categorize ens_ids into accepted & rejected lists, an ens_id sent with both
+        # decisions is in both lists and ends up REJECTED
         accepted_ensid = set()
         reject_ensid = set()
 
@@ -368,57 +352,78 @@ async def update_suggestions_single(payload, session_id, session: AsyncSession)
             else:
                 reject_ensid.add(entry.ens_id)
 
-        # Step 6: Update accepted ens_ids
-        if accepted_ensid:
-            accept_query = (
-                update(table_class)
-                .where(table_class.c.ens_id.in_(accepted_ensid))
-                .where(table_class.c.final_validation_status == FinalValidatedStatus.REVIEW)
-                .values(
-                    name=table_class.c.suggested_name,
-                    name_international=table_class.c.suggested_name_international,
-                    address=table_class.c.suggested_address,
-                    postcode=table_class.c.suggested_postcode,
-                    city=table_class.c.suggested_city,
-                    country=table_class.c.suggested_country,
-                    phone_or_fax=table_class.c.suggested_phone_or_fax,
-                    email_or_website=table_class.c.suggested_email_or_website,
-                    national_id=table_class.c.suggested_national_id,
-                    state=table_class.c.suggested_state,
-                    address_type=table_class.c.suggested_address_type,
-                    final_status=FinalStatus.ACCEPTED
-                )
+        # Step 3: Apply every decision for the session in one UPDATE, the payload is sent as two array parameters:
+        #   explicitly rejected -> REJECTED
+        #   AUTO_ACCEPT -> ACCEPTED, AUTO_REJECT -> REJECTED
+        #   REVIEW and accepted -> take the suggested values, ACCEPTED
+        #   accepted with any other validation status -> unchanged
+        #   everything else -> REJECTED
+        fvs = table_class.c.final_validation_status
+        final_status_type = table_class.c.final_status.type
+        is_accepted = table_class.c.ens_id == any_(
+            bindparam("accepted_ens_ids", value=list(accepted_ensid), type_=ARRAY(String))
+        )
+        is_rejected = table_class.c.ens_id == any_(
+            bindparam("rejected_ens_ids", value=list(reject_ensid), type_=ARRAY(String))
+        )
+        take_suggestion = and_(is_accepted, fvs == FinalValidatedStatus.REVIEW)
+        suggested_columns = [
+            "name", "name_international", "address", "postcode", "city", "country",
+            "phone_or_fax", "email_or_website", "national_id", "state", "address_type"
+        ]
+
+        update_query = (
+            update(table_class)
+            .where(table_class.c.session_id == session_id)
+            .values(
+                final_status=case(
+                    (is_rejected, cast(FinalStatus.REJECTED, final_status_type)),
+                    (fvs == FinalValidatedStatus.AUTO_ACCEPT, cast(FinalStatus.ACCEPTED, final_status_type)),
+                    (fvs == FinalValidatedStatus.AUTO_REJECT, cast(FinalStatus.REJECTED, final_status_type)),
+                    (take_suggestion, cast(FinalStatus.ACCEPTED, final_status_type)),
+                    (is_accepted, table_class.c.final_status),
+                    else_=cast(FinalStatus.REJECTED, final_status_type)
+                ),
+                **{
+                    column: case((take_suggestion, table_class.c[f"suggested_{column}"]), else_=table_class.c[column])
+                    for column in suggested_columns
+                }
             )
-            await session.execute(accept_query)
-
-        # Step 7: Update rejected ens_ids (including those not in accepted_ensid)
-        all_ens_ids = {str(row["ens_id"]) for row in data_dicts}  # Convert to string
-        logger.debug(f"all_ens_ids {all_ens_ids}")
-        # Include already accepted ens_ids from DB
-        if accepted_ens_ids:
-            accepted_ensid.update(accepted_ens_ids)
-        remaining_rejected = all_ens_ids - accepted_ensid
-        reject_ensid.update(remaining_rejected)
-
-        if reject_ensid:
-            reject_query = (
-                update(table_class)
-                .where(table_class.c.ens_id.in_(reject_ensid))
-                .values(final_status=FinalStatus.REJECTED)
+            .returning(table_class.c.ens_id, fvs)
+        )
+        result = await session.execute(update_query)
+        updated_rows = result.fetchall()
+
+        if not updated_rows:
+            await session.rollback()
+            raise HTTPException(
+                status_code=404, 
+                detail=f"No records found for session_id: {session_id}"
             )
-            await session.execute(reject_query)
 
-        # Step 8: Commit the transaction
+        # Step 4: Rows auto accepted by validation count as accepted, everything else not accepted is rejected
+        all_ens_ids = {str(row[0]) for row in updated_rows}
+        accepted_ensid.update(
+            str(row[0]) for row in updated_rows if row[1] == FinalValidatedStatus.AUTO_ACCEPT
+        )
+        reject_ensid.update(all_ens_ids - accepted_ensid)
+        logger.info(f"Applied {len(payload)} decision(s) to {len(updated_rows)} row(s) of session {session_id}")
+
+        # Step 5: Promote accepted rows to supplier_master_data in the same transaction
+        if accepted_ensid:
+            promoted_count = await promote_accepted_suppliers(session, session_id, commit=False)
+            logger.debug(f"Promoted {promoted_count} rows to supplier_master_data")
+
+        # Step 6: Commit the transaction
         await session.commit()
+        invalidate_session_counts("upload_supplier_master_data", {session_id})
+        if accepted_ensid:
+            invalidate_session_counts("supplier_master_data", {session_id})
+            await invalidate_graph_cache_for_session(session_id, session)
 
         logger.debug(f"Final Accepted ens_ids: {accepted_ensid}")
         logger.debug(f"Final Rejected ens_ids: {reject_ensid}")
 
-        # Step 9: Update supplier master data
-        if len(list(accepted_ensid)):
-            response_supplier_master_data = await update_supplier_master_data(session, session_id)
-            logger.debug(f"Response from update_supplier_master_data: {response_supplier_master_data}")
-
         # Return the response
         return {
             "status": "success",
@@ -437,7 +442,7 @@ async def update_suggestions_single(payload, session_id, session: AsyncSession)
             detail=f"An unexpected error occurred: {str(error)}"
         )
         
-async def get_main_session_supplier(sess_id, page_no, rows_per_page, session) -> Dict:
+async def get_main_session_supplier(sess_id, page_no, rows_per_page, session, cursor=None, include_count=None) -> Dict:
     try:
         logger.debug(f"get_main_session_supplier for session_id: {sess_id}")
 
@@ -445,7 +450,9 @@ async def get_main_session_supplier(sess_id, page_no, rows_per_page, session) ->
         offset = (page_no-1) * rows_per_page if page_no else 0
         limit = rows_per_page if rows_per_page else 10000
         logger.debug(f"offset {offset} limit {limit}")
-        extra_filters = {"offset": offset, "limit": limit}
+        # Skip the count on cursor pages unless asked for, the client already has the total
+        include_count = include_count if include_count is not None else not cursor
+        extra_filters = {"offset": offset, "limit": limit, "cursor": cursor, "include_count": include_count}
 
         select_column = [
             "id", "name", "name_international", "address", "postcode", "city", "country", "uploaded_name",
@@ -475,6 +482,7 @@ async def get_main_session_supplier(sess_id, page_no, rows_per_page, session) ->
             "status": "success",
             "total_data": session_supplier_data[1],
             "data": session_supplier_data[0],
+            "next_cursor": session_supplier_data[2],
             "session_id": sess_id
         }
 
@@ -557,21 +565,26 @@ async def get_main_session_supplier_compiled(sess_id, page_no, rows_per_page, se
             )
 
         try:
-            count_query = (
-                select(func.count())
-                .select_from(
-                    supplier_table.join(
-                        ensid_screening__table,
-                        and_(
-                            supplier_table.c.session_id == ensid_screening__table.c.session_id,
-                            supplier_table.c.ens_id == ensid_screening__table.c.ens_id
+            # The join count is cached and invalidated with the supplier_master_data counts of the session
+            count_key = ("supplier_master_data", str(sess_id), ("ensid_screening_status",))
+            total_count = SESSION_COUNT_CACHE.get(count_key)
+            if total_count is None:
+                count_query = (
+                    select(func.count())
+                    .select_from(
+                        supplier_table.join(
+                            ensid_screening__table,
+                            and_(
+                                supplier_table.c.session_id == ensid_screening__table.c.session_id,
+                                supplier_table.c.ens_id == ensid_screening__table.c.ens_id
+                            )
                         )
                     )
+                    .where(supplier_table.c.session_id == sess_id)
                 )
-                .where(supplier_table.c.session_id == sess_id)
-            )
-            count_result = await session.execute(count_query)
-            total_count = count_result.scalar()
+                count_result = await session.execute(count_query)
+                total_count = count_result.scalar()
+                SESSION_COUNT_CACHE.set(count_key, total_count)
         except Exception as e:
             logger.error(f"Count query failed: {e}")
             raise HTTPException(
@@ -604,13 +617,16 @@ async def get_main_session_supplier_compiled(sess_id, page_no, rows_per_page, se
             detail=f"An unexpected error occurred: {str(error)}"
         )
     
-async def get_session_screening_status(page_no: int, rows_per_page: int, screening_analysis_status, session) -> Dict:
+async def get_session_screening_status(page_no: int, rows_per_page: int, screening_analysis_status, session, cursor=None, include_count=None) -> Dict:
     try:
         # Calculate offset and limit based on page_no and rows_per_page
         offset = (page_no-1) * rows_per_page if page_no else 0
         limit = rows_per_page if rows_per_page else 10000
         logger.debug(f"offset {offset} limit {limit}")
-        extra_filters = {"offset": offset, "limit": limit, "screening_analysis_status": screening_analysis_status}
+        # Skip the count on cursor pages unless asked for, the client already has the total
+        include_count = include_count if include_count is not None else not cursor
+        extra_filters = {"offset": offset, "limit": limit, "cursor": cursor, "include_count": include_count,
+                         "screening_analysis_status": screening_analysis_status}
 
         select_column = [
             "id", "session_id", "overall_status", "list_upload_status", 
@@ -640,7 +656,8 @@ async def get_session_screening_status(page_no: int, rows_per_page: int, screeni
         return {
             "status": "success",
             "total_data": session_screening_status_data[1], 
-            "data": session_screening_status_data[0]
+            "data": session_screening_status_data[0],
+            "next_cursor": session_screening_status_data[2]
         }
 
     except HTTPException as http_err:
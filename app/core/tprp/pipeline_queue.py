@@ -0,0 +1,250 @@
+# Durable TPRP pipeline job queue backed by the tprp_pipeline_job table.
+#
+# Uploads enqueue a job, worker loops (inside the API process or a dedicated
+# `python -m app.core.tprp.pipeline_queue` process) claim jobs with
+# SELECT ... FOR UPDATE SKIP LOCKED, heartbeat while running and record the last
+# completed stage so a retried or reclaimed job resumes where it stopped.
+
+import asyncio
+import os
+import socket
+import uuid
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core import database_session
+from app.core.config import get_settings
+from app.core.tprp.tprp import PipelineFailed, run_tprp_pipeline
+from app.core.utils.db_utils import upsert_session_screening_status
+from app.models import STATUS, Base
+from app.schemas.logger import logger
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _job_table():
+    return Base.metadata.tables["tprp_pipeline_job"]
+
+
+def _stale_cutoff():
+    return func.now() - func.make_interval(0, 0, 0, 0, 0, 0, get_settings().pipeline.stale_after_secs)
+
+
+async def enqueue_pipeline_job(session_id: str, user_id: str, session: AsyncSession) -> None:
+    """
+    Queue the TPRP pipeline for a session, a session is only ever queued once.
+    """
+    jobs = _job_table()
+    stmt = insert(jobs).values(
+        session_id=session_id,
+        user_id=user_id,
+        status=STATUS.QUEUED,
+        max_attempts=get_settings().pipeline.max_attempts,
+    ).on_conflict_do_nothing(index_elements=["session_id"])
+    await session.execute(stmt)
+    await session.commit()
+    logger.info(f"Queued TPRP pipeline job for session {session_id}")
+
+
+def _running_jobs_for_user(user_id_column):
+    running = aliased(_job_table())
+    return (
+        select(func.count())
+        .select_from(running)
+        .where(
+            running.c.user_id == user_id_column,
+            running.c.status == STATUS.IN_PROGRESS,
+            running.c.heartbeat_at >= _stale_cutoff(),
+        )
+        .scalar_subquery()
+    )
+
+
+async def claim_next_job(session: AsyncSession, worker_id: str = WORKER_ID) -> Optional[Dict]:
+    """
+    Claim the next due job whose user is below the per-user concurrency cap.
+
+    Due jobs are queued jobs whose retry time has passed and running jobs whose
+    worker stopped heartbeating. Candidates are locked with FOR UPDATE SKIP LOCKED
+    so concurrent workers never claim the same row; a per-user advisory lock then
+    re-checks the cap so racing workers cannot exceed it.
+
+    :return: The claimed job as a dict, or None if nothing can run now.
+    """
+    jobs = _job_table()
+    max_jobs_per_user = get_settings().pipeline.max_jobs_per_user
+
+    candidate_query = (
+        select(jobs.c.id, jobs.c.user_id)
+        .where(
+            or_(
+                and_(jobs.c.status == STATUS.QUEUED, jobs.c.available_at <= func.now()),
+                and_(jobs.c.status == STATUS.IN_PROGRESS, jobs.c.heartbeat_at < _stale_cutoff()),
+            ),
+            _running_jobs_for_user(jobs.c.user_id) < max_jobs_per_user,
+        )
+        .order_by(jobs.c.available_at, jobs.c.id)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=jobs)
+    )
+
+    try:
+        candidate = (await session.execute(candidate_query)).first()
+        if candidate is None:
+            await session.rollback()
+            return None
+
+        # Serialise claims per user for the rest of the transaction and re-check the cap
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(candidate.user_id))))
+        running_count = (await session.execute(
+            select(_running_jobs_for_user(candidate.user_id))
+        )).scalar_one()
+        if running_count >= max_jobs_per_user:
+            await session.rollback()
+            return None
+
+        claimed = await session.execute(
+            update(jobs)
+            .where(jobs.c.id == candidate.id)
+            .values(
+                status=STATUS.IN_PROGRESS,
+                worker_id=worker_id,
+                heartbeat_at=func.now(),
+                attempts=jobs.c.attempts + 1,
+            )
+            .returning(*jobs.c)
+        )
+        job = dict(claimed.mappings().one())
+        await session.commit()
+
+    except Exception:
+        await session.rollback()
+        raise
+
+    logger.info(f"Worker {worker_id} claimed pipeline job {job['id']} for session {job['session_id']} "
+                f"(attempt {job['attempts']}/{job['max_attempts']}, after stage {job['stage']})")
+    return job
+
+
+async def _update_owned_job(job_id: int, worker_id: str, **values) -> int:
+    # Only the worker that holds the job may change it, a reclaimed job belongs to its new worker
+    jobs = _job_table()
+    async with database_session.get_async_session() as session:
+        result = await session.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id, jobs.c.worker_id == worker_id, jobs.c.status == STATUS.IN_PROGRESS)
+            .values(**values)
+        )
+        await session.commit()
+        return result.rowcount
+
+
+async def _heartbeat(job_id: int, worker_id: str) -> None:
+    """
+    Refresh heartbeat_at until cancelled; returns if the job was taken over by another worker.
+    """
+    interval = get_settings().pipeline.heartbeat_secs
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await _update_owned_job(job_id, worker_id, heartbeat_at=func.now()):
+                logger.warning(f"Pipeline job {job_id} is no longer owned by worker {worker_id}")
+                return
+        except Exception as e:
+            logger.warning(f"Heartbeat for pipeline job {job_id} failed: {str(e)}")
+
+
+async def run_job(job: Dict, worker_id: str = WORKER_ID) -> None:
+    """
+    Run a claimed job, heartbeating while it runs, then mark it completed, retry it later or fail it.
+
+    PipelineFailed fails the job on the first attempt.
+    """
+    settings = get_settings().pipeline
+
+    if job["attempts"] > job["max_attempts"]:
+        # Reclaimed from a dead worker after its last attempt
+        await _update_owned_job(job["id"], worker_id, status=STATUS.FAILED, last_error="Worker stopped during the last attempt.")
+        async with database_session.get_async_session() as session:
+            await upsert_session_screening_status([{"overall_status": STATUS.FAILED}], job["session_id"], session)
+        return
+
+    async def record_stage(stage):
+        await _update_owned_job(job["id"], worker_id, stage=stage, heartbeat_at=func.now())
+
+    pipeline = asyncio.create_task(
+        run_tprp_pipeline(job["session_id"], completed_stage=job["stage"], on_stage=record_stage)
+    )
+    heartbeat = asyncio.create_task(_heartbeat(job["id"], worker_id))
+    try:
+        await asyncio.wait({pipeline, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        if not pipeline.done():
+            # Lost ownership, the job is running elsewhere now
+            pipeline.cancel()
+            return
+        pipeline.result()
+
+    except asyncio.CancelledError:
+        pipeline.cancel()
+        raise
+
+    except Exception as e:
+        logger.error(f"Pipeline job {job['id']} for session {job['session_id']} failed: {str(e)}")
+        if not isinstance(e, PipelineFailed) and job["attempts"] < job["max_attempts"]:
+            backoff = settings.retry_backoff_secs * 2 ** (job["attempts"] - 1)
+            await _update_owned_job(
+                job["id"], worker_id,
+                status=STATUS.QUEUED,
+                available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff),
+                last_error=str(e),
+            )
+            logger.info(f"Pipeline job {job['id']} will be retried in {backoff}s")
+        else:
+            await _update_owned_job(job["id"], worker_id, status=STATUS.FAILED, last_error=str(e))
+            async with database_session.get_async_session() as session:
+                await upsert_session_screening_status([{"overall_status": STATUS.FAILED}], job["session_id"], session)
+        return
+
+    finally:
+        heartbeat.cancel()
+
+    await _update_owned_job(job["id"], worker_id, status=STATUS.COMPLETED, last_error=None)
+    logger.info(f"Pipeline job {job['id']} for session {job['session_id']} completed")
+
+
+async def _worker_loop(worker_id: str) -> None:
+    poll_interval = get_settings().pipeline.poll_interval_secs
+    while True:
+        try:
+            async with database_session.get_async_session() as session:
+                job = await claim_next_job(session, worker_id)
+        except Exception as e:
+            logger.error(f"Claiming a pipeline job failed: {str(e)}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        try:
+            await run_job(job, worker_id)
+        except Exception as e:
+            # Finalising failed, the job is reclaimed once its heartbeat goes stale
+            logger.error(f"Pipeline job {job['id']} could not be finalised: {str(e)}")
+
+
+async def run_pipeline_worker(concurrency: Optional[int] = None) -> None:
+    """
+    Run `concurrency` worker loops until cancelled.
+    """
+    concurrency = concurrency or get_settings().pipeline.concurrency
+    logger.info(f"Starting {concurrency} TPRP pipeline worker loop(s) as {WORKER_ID}")
+    await asyncio.gather(*[_worker_loop(f"{WORKER_ID}:{index}") for index in range(concurrency)])
+
+
+if __name__ == "__main__":
+    asyncio.run(run_pipeline_worker())
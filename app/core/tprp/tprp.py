@@ -1,77 +1,46 @@
-import asyncio
+import hashlib
 from typing import Dict
-import pycountry
-import requests
 from app.core.config import get_settings
 from app.core.security.jwt import create_jwt_token
-from app.core.supplier.supplier import update_suggestions_bulk
+from app.core.supplier.supplier import update_suggestions_bulk, validate_and_update_data
 from app.schemas.requests import BulkPayload
 from fastapi import  HTTPException, status
 from app.core.utils.db_utils import *
+from app.core.utils import country_index
+from app.core.utils.excel_utils import stream_excel_to_table
+from app.core.utils.orchestration_client import post_orchestration
+from app.core.utils.status_waiter import wait_for_session_status
+from app.core.utils.cache_utils import TTLCache
+from app.core import database_session
 import pandas as pd
 import uuid
-import io
 from app.models import *
 from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
 from datetime import datetime, timedelta
 from azure.storage.blob import generate_container_sas, ContainerSasPermissions, BlobClient
 from app.schemas.logger import logger
 
-def validate_and_update_data(data, user_id, session_id):
+# Supplier name validation wait: overall limit and fallback polling interval (seconds)
+SUPPLIER_VALIDATION_TIMEOUT_SECS = 30 * 30
+SUPPLIER_VALIDATION_POLL_SECS = 30
+
+# Stages of the TPRP pipeline in order, a retried job resumes after the last one it completed
+PIPELINE_STAGES = [
+    "SUPPLIER_VALIDATION_TRIGGERED",
+    "SUPPLIER_VALIDATION_COMPLETED",
+    "SUGGESTIONS_ACCEPTED",
+    "ANALYSIS_TRIGGERED",
+]
+
+
+class PipelineFailed(RuntimeError):
     """
-    Validate the data for required fields, generate unique ens_id for each row, 
-    and update each row with a session_id. Add 'upload_' prefix to every key.
-    
-    :param data: List of dictionaries representing rows of data.
-    :param session_id: A session identifier to update in each row.
-    :raises ValueError: If any row is missing required fields.
+    Raised when the session itself failed, so retrying the pipeline cannot help.
     """
-    prefix = "uploaded_"
-
-    for index, row in enumerate(data, start=1):
-        # Add prefix to all keys
-        prefixed_row = {
-    f"uploaded_{key}": str(value) for key, value in row.items()
-} | {
-    f"unmodified_{key}": str(value) for key, value in row.items()
-}
-        prefixed_row['unmodified_country'] = prefixed_row['unmodified_country_copy']
-        # prefixed_row.pop("uploaded_country_copy", None)
-        # prefixed_row.pop("unmodified_country_copy", None)
-        # Validate required fields with prefixed keys
-        missing_fields = []
-        if not prefixed_row.get(f"{prefix}name"):
-            missing_fields.append(f"name")
-        if not prefixed_row.get(f"{prefix}country"):
-            missing_fields.append(f"country")
-        if not prefixed_row.get(f"{prefix}national_id"):
-            missing_fields.append(f"national_id")
-        
-        # If there are missing fields, raise an error with row number and the missing fields
-        if missing_fields:
-            raise ValueError(f"Name, Country, and National ID are mandatory. Please make sure your Excel file contains values in all three columns")
-        
-        # Generate a unique UUID for 'ens_id' and add 'session_id' to the row
-        prefixed_row[f"ens_id"] = str(uuid.uuid4())
-        prefixed_row[f"session_id"] = session_id
-        prefixed_row[f"user_id"] = user_id
-        # Update the data with the new prefixed row
-        data[index - 1] = prefixed_row
-
-    logger.debug("All rows are valid and updated with prefixed keys, ens_id, and session_id.")
-    logger.debug(f"data_validate_and_update_data {data}")
-    
-    return data
-
-country_cache = {}
-def get_country_code_optimized(country_name):
-    if pd.isna(country_name):
-        return country_name
-    if country_name in country_cache:
-        return country_cache[country_name]
-    country = pycountry.countries.get(name=country_name)
-    country_cache[country_name] = country.alpha_2 if country else country_name  # Keep original if not found
-    return country_cache[country_name]
+
+# Container SAS URLs are reused until this fraction of their validity has passed
+SAS_REFRESH_FRACTION = 0.5
+SAS_URL_CACHE = TTLCache(maxsize=4096, ttl=3600)
 
 async def process_excel_file(file_contents, current_user, session) -> Dict:
     try:
@@ -81,25 +50,28 @@ async def process_excel_file(file_contents, current_user, session) -> Dict:
         
         if validate_request >= 5:
             raise ValueError("Maximum 5 requests can run at one time")
-        contents = await file_contents.read()
-        excel_file = io.BytesIO(contents)
-        df = pd.read_excel(excel_file)
-        df = df.where(pd.notnull(df), "")  
         allowed_rows = get_settings().allowedrows.tprp
-        if len(df) > allowed_rows:
-            raise ValueError(f"Only {allowed_rows} rows are allowed. Please upload a valid file.")
-        df['country_copy'] = df['country']    
-        df['country'] = df['country'].apply(get_country_code_optimized)
-
-        sheet_data = df.to_dict(orient="records")
         session_id = str(uuid.uuid4())
 
-        validate_and_update_data(sheet_data, current_user[1], session_id)
-
-        is_inserted = await insert_dynamic_data("upload_supplier_master_data", sheet_data, session)
+        def prepare_batch(rows, first_row_number):
+            # Keep the uploaded country name and map the country column to its ISO code
+            df = pd.DataFrame(rows)
+            if 'country' in df.columns:
+                df['country_copy'] = df['country']
+                df['country'] = country_index.map_series(df['country'])
+            return validate_and_update_data(df, current_user[1], session_id, first_row_number)
+
+        # Read, validate and insert the sheet in batches instead of loading it whole
+        rows_inserted = await stream_excel_to_table(
+            file_contents,
+            "upload_supplier_master_data",
+            prepare_batch,
+            allowed_rows,
+            session
+        )
 
         res = {
-            "rows_inserted": is_inserted.get('rows_inserted', 0),
+            "rows_inserted": rows_inserted,
             "session_id": session_id
         }
 
@@ -138,7 +110,7 @@ async def process_excel_file(file_contents, current_user, session) -> Dict:
             detail=f"Error processing the Excel file: {str(error)}"
         )
 
-def trigger_supplier_validation(session_id: str, auth_token: str):
+async def trigger_supplier_validation(session_id: str, auth_token: str):
     """
     Sends a POST request to trigger supplier validation.
 
@@ -146,194 +118,145 @@ def trigger_supplier_validation(session_id: str, auth_token: str):
     :param auth_token: The Bearer token for authorization.
     :return: Response JSON or error message.
     """
-    url = get_settings().urls.analysis_orchestration +"/analysis/trigger-supplier-validation"
-
     # Request payload
     payload = {
         "session_id": session_id
     }
 
-    # Request headers
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {auth_token}",
-        "Content-Type": "application/json"
-    }
-
-    try:
-        # Making the POST request
-        response = requests.post(url, json=payload, headers=headers)
-
-        # Check response status
-        response.raise_for_status()  # Raise error for bad status codes
-
-        # Return JSON response
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+    return await post_orchestration("/analysis/trigger-supplier-validation", payload, auth_token)
     
-def trigger_analysis(session_id: str, auth_token: str):
+async def trigger_analysis(session_id: str, auth_token: str):
     """
-    Sends a POST request to trigger supplier validation.
+    Sends a POST request to trigger the screening analysis.
 
     :param session_id: The session ID to be sent in the request body.
     :param auth_token: The Bearer token for authorization.
     :return: Response JSON or error message.
     """
-    url = get_settings().urls.analysis_orchestration +"/analysis/trigger-analysis"
-
     # Request payload
     payload = {
         "session_id": session_id
     }
 
-    # Request headers
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {auth_token}",
-        "Content-Type": "application/json"
-    }
+    return await post_orchestration("/analysis/trigger-analysis", payload, auth_token)
+    
+async def read_supplier_validation_status(session_id) -> str:
+    """
+    Read supplier_name_validation_status for a session using a short-lived database session.
+    """
+    async with database_session.get_async_session() as session:
+        session_screening_status_data = await get_dynamic_ens_data(
+            table_name="session_screening_status",
+            required_columns=['supplier_name_validation_status'],
+            ens_id="",
+            session_id=session_id,
+            session=session,
+            extra_filters={"offset": 0, "limit": 1, "include_count": False}
+        )
 
-    try:
-        # Making the POST request
-        response = requests.post(url, json=payload, headers=headers)
+    rows = session_screening_status_data[0]
+    if not rows:
+        return ""
+    supplier_status = rows[0]['supplier_name_validation_status']
+    # Convert Enum to string (extract actual status value)
+    if isinstance(supplier_status, STATUS):  # If it's an Enum, get its value
+        return supplier_status.value
+    return str(supplier_status)  # Fallback conversion
+
+async def run_tprp_pipeline(session_id, completed_stage=None, on_stage=None):
+    """
+    Run the TPRP screening pipeline for a session, resuming after `completed_stage`.
 
-        # Check response status
-        response.raise_for_status()  # Raise error for bad status codes
+    Every step opens its own short-lived database session. Errors are raised so the
+    pipeline job queue can retry the job from the last completed stage, except
+    PipelineFailed which fails the job and its session right away.
 
-        # Return JSON response
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
-    
-async def run_full_pipeline_background(session_id, session):
-    try:
-        # Take session ID
-        logger.info(f"Starting run_full_pipeline_background for {session_id}")
-        
-        try:
-            # Generate JWT token
-            jwt_token = create_jwt_token("application_backend", "development")
-        except Exception as e:
-            logger.error(f"Error generating JWT token: {str(e)}")
-            raise
+    :param session_id: Session to screen.
+    :param completed_stage: Last stage of PIPELINE_STAGES already done by a previous attempt.
+    :param on_stage: Optional coroutine function called with each stage once it completes.
+    """
+    logger.info(f"Starting TPRP pipeline for {session_id} after stage {completed_stage}")
+    stages_done = PIPELINE_STAGES.index(completed_stage) + 1 if completed_stage else 0
+
+    async def complete(stage):
+        logger.info(f"TPRP pipeline for {session_id} completed stage {stage}")
+        if on_stage:
+            await on_stage(stage)
 
+    try:
+        # Generate JWT token
+        jwt_token = create_jwt_token("application_backend", "development")
+    except Exception as e:
+        logger.error(f"Error generating JWT token: {str(e)}")
+        raise
+
+    if stages_done < 1:
+        # Step 1: Make HTTP request to trigger supplier name validation
+        trigger_supplier_validation_response = await trigger_supplier_validation(session_id, jwt_token.access_token)
+        logger.info(f"Trigger Name Validation Response {trigger_supplier_validation_response}")
+        if "error" in trigger_supplier_validation_response:
+            raise RuntimeError(f"Error triggering supplier validation: {trigger_supplier_validation_response['error']}")
+        await complete("SUPPLIER_VALIDATION_TRIGGERED")
+
+    if stages_done < 2:
+        # Step 2: Wait for the validation result, woken by session_id_status_channel notifications with polling as fallback
         try:
-            # Step 1: Make HTTP request to trigger supplier name validation
-            trigger_supplier_validation_response = trigger_supplier_validation(session_id, jwt_token.access_token)
-            logger.info(f"Trigger Name Validation Response {trigger_supplier_validation_response}")
-        except Exception as e:
-            logger.error(f"Error triggering supplier validation:{str(e)}")
-            raise
-        extra_filters = {"offset": 0, "limit": 10}
-
-        # Step 2: Poll for result using a do-while loop
-        select_column = ['supplier_name_validation_status']
-        max_retries = 30  # Limit retries (every 2 min = ~1 hour)
-        retry_count = 0
-
-        while True:
-            try:
-                session_screening_status_data = await get_dynamic_ens_data(
-                    table_name="session_screening_status",
-                    required_columns=select_column,
-                    ens_id="",
-                    session_id=session_id,
-                    session=session,
-                    extra_filters=extra_filters
-                )
-                supplier_status = session_screening_status_data[0][0]['supplier_name_validation_status']
-
-                logger.debug(f"session_screening_status_data______ {session_screening_status_data}")
-                logger.debug(f"Current supplier validation status: {supplier_status}")
-                # Convert Enum to string (extract actual status value)
-                if isinstance(supplier_status, STATUS):  # If it's an Enum, get its value
-                    supplier_status = supplier_status.value
-                else:
-                    supplier_status = str(supplier_status)  # Fallback conversion
-                logger.debug(f"Current supplier validation status: {supplier_status}")
-                # print("session_screening_status_data[0]", session_screening_status_data[0])
-                # supplier_status = session_screening_status_data[0].get('supplier_name_validation_status', '')
-                # print("Supplier Status:", supplier_status)
-                if supplier_status == "COMPLETED":
-                    logger.info(f"Supplier validation completed: {supplier_status}")
-                    break  # Exit loop and proceed to Step 3
-                if supplier_status == "FAILED":
-                    try:
-                        raise RuntimeError("Supplier status is FAILED: Error triggering analysis pipeline.")
-                    except Exception as e:
-                        logger.error(f"Error in analysis pipeline: {str(e)}")
-                        raise
-
-                logger.info(f"Current status: {supplier_status}. Waiting for completion...")
- 
-                if retry_count >= max_retries:
-                    logger.error("Max retries reached. Supplier validation did not complete.")
-                    raise TimeoutError("Supplier validation timeout exceeded.")
-
-                retry_count += 1
-                logger.info(f"Retrying... Attempt {retry_count}/{max_retries}")
-                await asyncio.sleep(30)  # Wait for 30 sec before retrying
+            supplier_status = await wait_for_session_status(
+                session_id,
+                lambda: read_supplier_validation_status(session_id),
+                terminal_statuses=["COMPLETED", "FAILED"],
+                timeout=SUPPLIER_VALIDATION_TIMEOUT_SECS,
+                poll_interval=SUPPLIER_VALIDATION_POLL_SECS
+            )
+        except TimeoutError:
+            logger.error("Supplier validation did not complete in time.")
+            raise TimeoutError("Supplier validation timeout exceeded.")
 
-            except Exception as e:
-                logger.error(f"Error polling session status: {str(e)}")
-                raise
+        if supplier_status == "FAILED":
+            logger.error("Supplier status is FAILED: Error triggering analysis pipeline.")
+            raise PipelineFailed("Supplier status is FAILED: Error triggering analysis pipeline.")
+        logger.info(f"Supplier validation completed: {supplier_status}")
+        await complete("SUPPLIER_VALIDATION_COMPLETED")
 
+    if stages_done < 3:
         # Step 3: Bulk accept all suggestions for this session_id
         bulk_payload = {
             "session_id": str(session_id),
             "status": "accept"
         }
-        
         logger.info(f"Bulk Payload: {bulk_payload}")
 
-        try:
-            # Call the function to update suggestions in bulk
-            accept_status = await update_suggestions_bulk(BulkPayload(**bulk_payload), session)
-            logger.debug(f"accept_status {accept_status}")
-        except Exception as e:
-            logger.error(f"Error updating suggestions in bulk: {str(e)}")
-            raise
-        
-        # Check supplier_master have that session_id or not  if not then update session_screening_status->over_all : FAILED and exit
-        supplier_master_data = await get_dynamic_ens_data(
-                    table_name="supplier_master_data",
-                    required_columns=["session_id"],
-                    ens_id="",
-                    session_id=session_id,
-                    session=session
-                )
-        # logger.debug(f"supplier_master_data {supplier_master_data}")
-        if supplier_master_data and len(supplier_master_data):
-            pass
-        else: 
-            data = [{
-                "overall_status": STATUS.FAILED
-            }]
-
+        async with database_session.get_async_session() as session:
             try:
-                # Call the function to update session screening status
-                response = await upsert_session_screening_status(data, session_id, session)
-                if response.get("message") == "Upsert completed":
-                    logger.error("Supplier status is FAILED: Error supplier_master_data pipeline.")
-                    raise RuntimeError("Supplier status is FAILED: Error supplier_master_data pipeline.")
-            except Exception as error:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error updating session screening status: {str(error)}"
-                )
-            
-        try:
-            # Trigger analysis pipeline
-            trigger_analysis_response = trigger_analysis(session_id, jwt_token.access_token)
-            logger.info(f"Analysis pipeline triggered successfully: {trigger_analysis_response}")
-        except Exception as e:
-            logger.error(f"Error triggering analysis pipeline:{str(e)}")
-            raise
-
-    except Exception as e:
-        logger.error(f"Pipeline execution failed:{str(e)}")
+                # Call the function to update suggestions in bulk
+                accept_status = await update_suggestions_bulk(BulkPayload(**bulk_payload), session)
+                logger.debug(f"accept_status {accept_status}")
+            except Exception as e:
+                logger.error(f"Error updating suggestions in bulk: {str(e)}")
+                raise
 
+            # Check supplier_master have that session_id or not, if not the job fails and its
+            # session_screening_status->overall_status is set to FAILED without retrying
+            supplier_master_data = await get_dynamic_ens_data(
+                        table_name="supplier_master_data",
+                        required_columns=["session_id"],
+                        ens_id="",
+                        session_id=session_id,
+                        session=session,
+                        extra_filters={"offset": 0, "limit": 1, "include_count": False}
+                    )
+            if not (supplier_master_data and len(supplier_master_data[0])):
+                logger.error("Supplier status is FAILED: Error supplier_master_data pipeline.")
+                raise PipelineFailed("Supplier status is FAILED: Error supplier_master_data pipeline.")
+        await complete("SUGGESTIONS_ACCEPTED")
+
+    if stages_done < 4:
+        # Step 4: Trigger analysis pipeline
+        trigger_analysis_response = await trigger_analysis(session_id, jwt_token.access_token)
+        if "error" in trigger_analysis_response:
+            raise RuntimeError(f"Error triggering analysis pipeline: {trigger_analysis_response['error']}")
+        logger.info(f"Analysis pipeline triggered successfully: {trigger_analysis_response}")
+        await complete("ANALYSIS_TRIGGERED")
 
 def generate_container_sas_url(storage_account_name, storage_account_key, container_name, expiry_weeks):
     """
@@ -362,15 +285,28 @@ def generate_container_sas_url(storage_account_name, storage_account_key, contai
     storage_account_url = f"https://{storage_account_name}.blob.core.windows.net/{container_name}"
     sas_url = f"{storage_account_url}?{sas_token}&comp=list&restype=container"
 
-    logger.debug(f"Generated SAS URL: {sas_url}")
-    # blob_client = BlobClient.from_blob_url(sas_url)
-    # try:     
-    #     blob_properties = blob_client.get_blob_properties()    
-    #     print(f"Blob properties: {blob_properties}")
-    # except Exception as e:     
-    #     print(f"An error occurred: {e}")
+    # Never log the token itself
+    logger.debug(f"Generated container SAS for {container_name}, expires {expiry_time.isoformat()}Z")
     return {"sas_url": sas_url, "sas_token":sas_token}
 
+def get_container_sas_url(storage_account_name, storage_account_key, container_name, expiry_weeks):
+    """
+    Cached `generate_container_sas_url`.
+
+    A token is reused until SAS_REFRESH_FRACTION of its validity has passed, so
+    callers always get a token with most of its lifetime left and polling clients
+    see a stable URL instead of a freshly signed one per request.
+    """
+    # A rotated account key gets fresh tokens, only a digest of the key is kept in the cache key
+    key_digest = hashlib.sha256(storage_account_key.encode()).hexdigest()[:16]
+    cache_key = (storage_account_name, key_digest, container_name, expiry_weeks)
+    container_sas = SAS_URL_CACHE.get(cache_key)
+    if container_sas is None:
+        container_sas = generate_container_sas_url(storage_account_name, storage_account_key, container_name, expiry_weeks)
+        ttl = timedelta(weeks=expiry_weeks).total_seconds() * SAS_REFRESH_FRACTION
+        SAS_URL_CACHE.set(cache_key, container_sas, ttl=ttl)
+    return container_sas
+
 async def get_session_screening_status_static(
         session_id: str,
         session: AsyncSession = Depends(deps.get_session)
@@ -400,10 +336,7 @@ async def get_session_screening_status_static(
         # Example usage
         storage_account_name = get_settings().storage.storage_account_name
         storage_account_key = get_settings().storage.storage_account_key
-        session_sas = generate_container_sas_url(storage_account_name, storage_account_key, session_id, 2)
-        logger.debug(f"SAS URL: {session_sas}")
-        # sas_url = generate_sas_url(storage_account_name, storage_account_key, session_id)
-        # print("Generated SAS URL:", sas_url)
+        session_sas = get_container_sas_url(storage_account_name, storage_account_key, session_id, 2)
         formatted_res = [
             dict(
                 zip(columns, row)
@@ -415,7 +348,7 @@ async def get_session_screening_status_static(
         # Return the formatted result
         await session.close()
 
-        logger.debug(f"______merged_data_____ {merged_data}")
+        logger.debug(f"______merged_data_____ {formatted_res[0]}")
     
         return merged_data
 
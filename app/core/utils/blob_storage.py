@@ -0,0 +1,102 @@
+from typing import AsyncIterator, Optional, Tuple
+
+from azure.core import MatchConditions
+from azure.storage.blob import BlobProperties
+from azure.storage.blob.aio import BlobServiceClient
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+from app.schemas.logger import logger
+
+# Size of the first and of every following ranged GET, which bounds the memory held per download
+BLOB_CHUNK_SIZE = 4 * 1024 * 1024
+
+_blob_service_client: Optional[BlobServiceClient] = None
+
+
+def get_blob_service_client() -> BlobServiceClient:
+    """
+    Return the shared async BlobServiceClient for the report storage account.
+
+    Created on first use and reused so the underlying aiohttp session and its
+    connections are shared by every request; closed by `close_blob_service_client`.
+    """
+    global _blob_service_client
+    if _blob_service_client is None:
+        _blob_service_client = BlobServiceClient(
+            account_url=get_settings().storage.storage_account_url,
+            credential=str(get_settings().storage.sas_token),
+            max_single_get_size=BLOB_CHUNK_SIZE,
+            max_chunk_get_size=BLOB_CHUNK_SIZE,
+        )
+    return _blob_service_client
+
+
+async def close_blob_service_client() -> None:
+    global _blob_service_client
+    if _blob_service_client is not None:
+        await _blob_service_client.close()
+        _blob_service_client = None
+
+
+async def find_latest_blob(container_name: str, prefix: str, suffix: str, contains: str = "") -> Optional[BlobProperties]:
+    """
+    Return the most recently modified blob under `prefix` whose name ends with `suffix`.
+
+    Listing pages are consumed as they arrive, only the current best match is kept.
+    """
+    container_client = get_blob_service_client().get_container_client(container_name)
+    latest_blob = None
+    async for blob in container_client.list_blobs(name_starts_with=prefix):
+        if contains in blob.name and blob.name.endswith(suffix):
+            if latest_blob is None or blob.last_modified > latest_blob.last_modified:
+                latest_blob = blob
+    return latest_blob
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header into an inclusive (start, end).
+
+    :return: None when there is no usable range (serve the whole file).
+    :raises HTTPException: 416 if the range lies outside the file.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range, the last N bytes
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=f"Range {range_header} is outside of the {size} byte file.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def stream_blob(
+    container_name: str, blob_name: str, offset: int = 0, length: Optional[int] = None, etag: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Download a blob (or a byte range of it) and yield it chunk by chunk.
+
+    With `etag` the download only succeeds if the blob is unchanged, otherwise
+    azure.core.exceptions.ResourceModifiedError is raised.
+    """
+    blob_client = get_blob_service_client().get_blob_client(container=container_name, blob=blob_name)
+    conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+    downloader = await blob_client.download_blob(offset=offset, length=length, **conditions)
+    logger.debug(f"Streaming {blob_name} from {container_name} (offset {offset}, length {length})")
+    return downloader.chunks()
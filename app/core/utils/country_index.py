@@ -0,0 +1,121 @@
+# Country name <-> ISO 3166 alpha-2 lookup tables.
+#
+# Built once from pycountry (warmed on startup) so uploads and graph endpoints
+# resolve countries with plain dict lookups instead of scanning pycountry per call.
+
+from functools import lru_cache
+
+import pandas as pd
+import pycountry
+
+# Common spellings that are not a pycountry name, official name or common name
+COUNTRY_ALIASES = {
+    "usa": "US",
+    "u.s.a.": "US",
+    "u.s.": "US",
+    "america": "US",
+    "united states of america": "US",
+    "uk": "GB",
+    "u.k.": "GB",
+    "great britain": "GB",
+    "britain": "GB",
+    "england": "GB",
+    "scotland": "GB",
+    "wales": "GB",
+    "northern ireland": "GB",
+    "uae": "AE",
+    "emirates": "AE",
+    "ksa": "SA",
+    "russia": "RU",
+    "south korea": "KR",
+    "korea": "KR",
+    "republic of korea": "KR",
+    "north korea": "KP",
+    "iran": "IR",
+    "syria": "SY",
+    "vietnam": "VN",
+    "laos": "LA",
+    "moldova": "MD",
+    "tanzania": "TZ",
+    "venezuela": "VE",
+    "bolivia": "BO",
+    "turkey": "TR",
+    "czech republic": "CZ",
+    "ivory coast": "CI",
+    "cote d'ivoire": "CI",
+    "macedonia": "MK",
+    "holland": "NL",
+    "the netherlands": "NL",
+    "hong kong": "HK",
+    "macau": "MO",
+    "palestine": "PS",
+    "vatican": "VA",
+    "brunei": "BN",
+    "cape verde": "CV",
+    "swaziland": "SZ",
+    "burma": "MM",
+    "micronesia": "FM",
+    "congo": "CG",
+    "democratic republic of the congo": "CD",
+    "drc": "CD",
+}
+
+
+def _normalise(value: str) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+@lru_cache(maxsize=1)
+def get_country_index() -> dict[str, str]:
+    """
+    Return the casefolded country name/code -> alpha-2 index.
+
+    Keys cover pycountry names, official names, common names, alpha-2 and
+    alpha-3 codes plus COUNTRY_ALIASES.
+    """
+    index = {}
+    for country in pycountry.countries:
+        for attribute in ("alpha_2", "alpha_3", "name", "official_name", "common_name"):
+            value = getattr(country, attribute, None)
+            if value:
+                index.setdefault(_normalise(value), country.alpha_2)
+    for alias, alpha_2 in COUNTRY_ALIASES.items():
+        index.setdefault(_normalise(alias), alpha_2)
+    return index
+
+
+@lru_cache(maxsize=1)
+def get_alpha_2_names() -> dict[str, str]:
+    """
+    Return the alpha-2 -> pycountry country name map.
+    """
+    return {country.alpha_2: country.name for country in pycountry.countries}
+
+
+def to_alpha_2(country_name):
+    """
+    Map a single country name or code to its alpha-2 code, keeping the original value if unknown.
+    """
+    if pd.isna(country_name):
+        return country_name
+    return get_country_index().get(_normalise(country_name), country_name)
+
+
+def map_series(countries: pd.Series) -> pd.Series:
+    """
+    Vectorized `to_alpha_2` for a pandas Series.
+
+    Each distinct value is normalised and looked up once; unknown and empty
+    values are kept as they were uploaded.
+    """
+    index = get_country_index()
+    unique_values = countries.dropna().unique()
+    mapping = {value: index.get(_normalise(value), value) for value in unique_values}
+    return countries.map(mapping).where(countries.notna(), countries)
+
+
+def get_country_name(code: str) -> str:
+    """
+    Map an alpha-2 code to its country name, keeping the code if unknown.
+    """
+    return get_alpha_2_names().get(str(code).upper(), code)
@@ -1,9 +1,12 @@
-import os
+import base64
+import enum
+import json
 import uuid
-from typing import Dict
+from typing import Dict, Optional
+import asyncpg
 from fastapi import Depends, logger, HTTPException, status
-from neo4j import AsyncGraphDatabase
-from sqlalchemy import and_, func, or_, tuple_,  update
+from neo4j import WRITE_ACCESS, AsyncDriver
+from sqlalchemy import exists, func, tuple_,  update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -13,6 +16,56 @@ from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import aliased
 from datetime import datetime, timedelta
 from app.schemas.logger import logger
+from app.core.utils.cache_utils import TTLCache
+from app.core.utils.graph_db import execute_query
+from app.core.utils.graph_cache import invalidate_graph_cache_for_session
+
+# Number of rows sent per COPY command by bulk_copy_dynamic_data
+COPY_CHUNK_SIZE = 10000
+
+# Per-session total counts for the paged grids, keyed by (table_name, session_id, filters).
+# Writes made through this app invalidate their entries; the TTL bounds staleness for
+# rows written by the analysis orchestration service.
+SESSION_COUNT_CACHE_TTL = 30
+SESSION_COUNT_CACHE = TTLCache(maxsize=4096, ttl=SESSION_COUNT_CACHE_TTL)
+
+def invalidate_session_counts(table_name: str, session_ids=None) -> None:
+    """
+    Drop cached counts for a table after a write.
+
+    :param table_name: Table that was written to.
+    :param session_ids: Sessions whose rows changed; None drops every count of the table.
+             Counts that span all sessions (cached under session_id "") are always dropped.
+    """
+    if session_ids is not None:
+        session_ids = {str(session_id) for session_id in session_ids} | {""}
+    removed = SESSION_COUNT_CACHE.invalidate(
+        lambda key: key[0] == table_name and (session_ids is None or key[1] in session_ids)
+    )
+    logger.debug(f"Invalidated {removed} cached count(s) for {table_name}")
+
+def encode_page_cursor(update_time, row_id) -> str:
+    """
+    Encode the (update_time, id) of the last row of a page into an opaque cursor.
+    """
+    payload = json.dumps({"update_time": update_time.isoformat() if update_time else None, "id": row_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_page_cursor(cursor: str):
+    """
+    Decode a cursor produced by `encode_page_cursor` back into (update_time, id).
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        update_time = datetime.fromisoformat(payload["update_time"])
+        row_id = int(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'cursor' is invalid."
+        )
+    return update_time, row_id
+
 async def get_dynamic_ens_data(
     table_name: str, 
     required_columns: list, 
@@ -21,6 +74,18 @@ async def get_dynamic_ens_data(
     session=None, 
     **kwargs
 ):
+    """
+    Fetch rows of a table filtered by ens_id/session_id, newest first.
+
+    Pagination is controlled through `extra_filters`:
+    - "cursor": keyset cursor returned as `next_cursor` by the previous page; when set,
+      rows strictly after that (update_time, id) are returned and "offset" is ignored.
+    - "offset"/"limit": classic page window, "limit" also applies to cursor pages.
+    - "include_count": compute the total matching rows (default True).
+
+    :return: Tuple of (rows, total_count, next_cursor). total_count is None when not requested,
+             next_cursor is None on the last page or when not paginating.
+    """
     try:
         extra_filters = kwargs.get('extra_filters', {})
 
@@ -32,55 +97,61 @@ async def get_dynamic_ens_data(
                 detail=f"Table '{table_name}' does not exist in the database schema."
             )
 
-        # Prepare columns to select
+        # Prepare columns to select, keyset pages also need the sort key of each row
         columns_to_select = [getattr(table_class.c, column) for column in required_columns]
-        query = select(*columns_to_select)
+        keyset_columns = [column for column in ("update_time", "id") if column not in required_columns]
+        if extra_filters:
+            columns_to_select += [getattr(table_class.c, column) for column in keyset_columns]
 
         # Apply filters
+        conditions = []
         if ens_id:
-            query = query.where(table_class.c.ens_id == str(ens_id)).distinct()
-        if session_id:
-            query = query.where(table_class.c.session_id == str(session_id))
-        query = query.order_by(table_class.c.update_time.desc(), table_class.c.id.desc())
-        # Execute query to check if session_id or ens_id exists
-        exists_query = select(func.count()).select_from(table_class)
-
-        if ens_id:
-            exists_query = exists_query.where(table_class.c.ens_id == str(ens_id))
+            conditions.append(table_class.c.ens_id == str(ens_id))
         if session_id:
-            exists_query = exists_query.where(table_class.c.session_id == str(session_id))
+            conditions.append(table_class.c.session_id == str(session_id))
 
+        # Execute query to check if session_id or ens_id exists
+        exists_query = select(exists().where(*conditions)) if conditions else select(exists().select_from(table_class))
         exists_result = await session.execute(exists_query)
-        record_count = exists_result.scalar()
 
-        if record_count == 0:
+        if not exists_result.scalar():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No data found for the given session_id or ens_id."
             )
 
+        query = select(*columns_to_select)
+        if ens_id:
+            query = query.distinct()
+        query = query.order_by(table_class.c.update_time.desc(), table_class.c.id.desc())
+
+        total_count = None
+        next_cursor = None
+        limit = None
+
         # Apply validation status filter
         if extra_filters:
-            final_validation_status = extra_filters.get("final_validation_status", "").strip().lower()
+            final_validation_status = (extra_filters.get("final_validation_status") or "").strip().lower()
             if final_validation_status:
                 if final_validation_status == 'review':
-                    query = query.where(table_class.c.final_validation_status == FinalValidatedStatus.REVIEW)
+                    conditions.append(table_class.c.final_validation_status == FinalValidatedStatus.REVIEW)
                 elif final_validation_status == 'auto_reject':
-                    query = query.where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_REJECT)
+                    conditions.append(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_REJECT)
                 elif final_validation_status == 'auto_accept':
-                    query = query.where(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT)
+                    conditions.append(table_class.c.final_validation_status == FinalValidatedStatus.AUTO_ACCEPT)
                                 
             # add additional filter[optional] where screening_ana_status != 'NOT_STARTED'
-            screening_analysis_status = extra_filters.get("screening_analysis_status", "").strip().lower()
+            screening_analysis_status = (extra_filters.get("screening_analysis_status") or "").strip().lower()
             if screening_analysis_status:
                 if screening_analysis_status == 'active':
-                    query = query.where(table_class.c.screening_analysis_status != STATUS.NOT_STARTED)
+                    conditions.append(table_class.c.screening_analysis_status != STATUS.NOT_STARTED)
                 elif screening_analysis_status == 'not_started':
-                    query = query.where(table_class.c.screening_analysis_status == STATUS.NOT_STARTED)
+                    conditions.append(table_class.c.screening_analysis_status == STATUS.NOT_STARTED)
 
             # Validate pagination inputs
             offset = extra_filters.get("offset", 0)
             limit = extra_filters.get("limit", 10000)
+            cursor = extra_filters.get("cursor")
 
             if not isinstance(offset, int) or offset < 0:
                 raise HTTPException(
@@ -93,31 +164,47 @@ async def get_dynamic_ens_data(
                     detail="'limit' must be a positive integer."
                 )
 
-            # Count total rows before pagination
-            total_count_query = select(func.count()).select_from(table_class)
-            if query._where_criteria:
-                total_count_query = total_count_query.filter(*query._where_criteria)
-
-            total_count_result = await session.execute(total_count_query)
-            total_count = total_count_result.scalar()
-
-            # Apply offset and limit
-            query = query.offset(offset).limit(limit)
+            # Count total rows before pagination, only when the caller asks for it
+            if extra_filters.get("include_count", True):
+                count_key = (table_name, str(session_id), (str(ens_id), final_validation_status, screening_analysis_status))
+                total_count = SESSION_COUNT_CACHE.get(count_key)
+                if total_count is None:
+                    total_count_query = select(func.count()).select_from(table_class).where(*conditions)
+                    total_count_result = await session.execute(total_count_query)
+                    total_count = total_count_result.scalar()
+                    SESSION_COUNT_CACHE.set(count_key, total_count)
+
+            # Keyset pagination: continue after the last row of the previous page
+            if cursor:
+                cursor_update_time, cursor_id = decode_page_cursor(cursor)
+                query = query.where(
+                    tuple_(table_class.c.update_time, table_class.c.id) < tuple_(cursor_update_time, cursor_id)
+                )
+            else:
+                query = query.offset(offset)
+            query = query.limit(limit)
 
             # print("_______query____", query, "\n offset", offset, "\n limit", limit)
+        query = query.where(*conditions)
+
         # Execute query
         result = await session.execute(query)
         columns = result.keys()
         rows = result.all()
 
         formatted_res = [dict(zip(columns, row)) for row in rows]
-        try:
-            total_count
-        except:
+
+        if limit is not None and len(formatted_res) == limit:
+            next_cursor = encode_page_cursor(formatted_res[-1]["update_time"], formatted_res[-1]["id"])
+        if extra_filters:
+            for row in formatted_res:
+                for column in keyset_columns:
+                    row.pop(column, None)
+        else:
             total_count = len(formatted_res)
 
-        logger.debug(f"formatted_res______ {formatted_res}")
-        return formatted_res, total_count
+        logger.debug(f"get_dynamic_ens_data returned {len(formatted_res)} row(s) from {table_name}")
+        return formatted_res, total_count, next_cursor
 
     except HTTPException as http_err:
         raise http_err  # Pass FastAPI exceptions as they are
@@ -234,7 +321,8 @@ async def insert_dynamic_ens_data(
 async def insert_dynamic_data(
     table_name: str,
     data: list,
-    session: AsyncSession = Depends(deps.get_session)
+    session: AsyncSession = Depends(deps.get_session),
+    commit: bool = True
 ):
     """
     Insert data dynamically into the specified table without additional constraints.
@@ -243,6 +331,7 @@ async def insert_dynamic_data(
         table_name (str): Name of the table where data will be inserted.
         kpi_data (list): List of dictionaries containing the data to insert.
         session (AsyncSession): Async database session.
+        commit (bool): Commit after the insert. Pass False to batch several inserts in one transaction.
     
     Returns:
         dict: A dictionary with the status and message of the operation.
@@ -272,7 +361,10 @@ async def insert_dynamic_data(
         result = await session.execute(query)  # `result` stores the execution details
         logger.debug(f"rowcount:  {result.rowcount}")
         # Commit the transaction
-        await session.commit()
+        if commit:
+            await session.commit()
+            # When the caller owns the transaction it invalidates after its own commit
+            invalidate_session_counts(table_name, {row.get("session_id") for row in cleaned_data})
 
         # Get the number of rows inserted
         rows_inserted = result.rowcount
@@ -295,7 +387,132 @@ async def insert_dynamic_data(
         # Catch any unexpected errors
         logger.error(f"An unexpected error occurred: {e}")
         return {"error": "An unexpected error occurred", "status": "failure"}
-    
+
+def _copy_value(column, value):
+    """
+    Coerce a value into the Python type asyncpg's binary COPY expects for the column.
+    """
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        # SQLAlchemy persists Python enums by member name
+        return value.name
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is str and not isinstance(value, str):
+        return str(value)
+    if python_type is int and not isinstance(value, int):
+        return int(value)
+    if python_type is bool and not isinstance(value, bool):
+        return bool(value)
+    return value
+
+async def bulk_copy_dynamic_data(
+    table_name: str,
+    data: list,
+    session: AsyncSession = Depends(deps.get_session),
+    chunk_size: int = COPY_CHUNK_SIZE,
+    commit: bool = True
+):
+    """
+    Bulk load rows into the specified table using asyncpg's binary COPY protocol.
+
+    Unlike `insert_dynamic_data` this does not bind every value as a statement parameter,
+    so it is not limited by the asyncpg parameter count and stays fast for large lists.
+    The COPY runs on the session's own connection and therefore inside its transaction.
+
+    Args:
+        table_name (str): Name of the table where data will be loaded.
+        data (list): List of dictionaries containing the data to load.
+        session (AsyncSession): Async database session.
+        chunk_size (int): Number of rows sent per COPY command.
+        commit (bool): Commit after loading. Pass False to batch several loads in one transaction.
+
+    Returns:
+        dict: A dictionary with the status, message and number of rows loaded.
+    """
+    try:
+        # Get the table class dynamically from metadata
+        table_class = Base.metadata.tables.get(table_name)
+        if table_class is None:
+            raise ValueError(f"Table '{table_name}' does not exist in the database schema.")
+
+        # Keep only valid columns (ignore any extra keys), in table order
+        provided_columns = set()
+        for row in data:
+            provided_columns.update(row.keys())
+        copy_columns = [column for column in table_class.columns if column.name in provided_columns]
+
+        if not data or not copy_columns:
+            return {"status": "failure", "message": "No valid data left after filtering extra columns."}
+
+        # COPY skips client-side defaults, so fill them in for columns that were not provided
+        default_columns = [
+            column for column in table_class.columns
+            if column.name not in provided_columns
+            and column.default is not None
+            and (column.default.is_scalar or column.default.is_callable)
+        ]
+        default_values = {
+            column.name: column.default.arg if column.default.is_scalar else column.default.arg(None)
+            for column in default_columns
+        }
+        copy_columns += default_columns
+        column_names = [column.name for column in copy_columns]
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        asyncpg_connection = raw_connection.driver_connection
+
+        rows_loaded = 0
+        for start in range(0, len(data), chunk_size):
+            records = [
+                tuple(
+                    _copy_value(column, row.get(column.name, default_values.get(column.name)))
+                    for column in copy_columns
+                )
+                for row in data[start:start + chunk_size]
+            ]
+            copy_status = await asyncpg_connection.copy_records_to_table(
+                table_class.name,
+                records=records,
+                columns=column_names,
+                schema_name=table_class.schema
+            )
+            # asyncpg returns the command tag, e.g. "COPY 5000"
+            rows_loaded += int(copy_status.split()[-1])
+            logger.debug(f"Copied {rows_loaded}/{len(data)} row(s) into {table_name}")
+
+        if commit:
+            await session.commit()
+            # When the caller owns the transaction it invalidates after its own commit
+            invalidate_session_counts(table_name, {row.get("session_id") for row in data})
+
+        logger.info(f"{rows_loaded} row(s) were copied into the {table_name} table.")
+        return {"status": "success", "message": f"Inserted {rows_loaded} rows successfully.", "rows_inserted": rows_loaded}
+
+    except ValueError as ve:
+        # Handle cases where the table does not exist
+        logger.error(f"Error: {ve}")
+        return {"error": str(ve), "status": "failure"}
+
+    except SQLAlchemyError as sa_err:
+        # Handle SQLAlchemy-specific errors
+        logger.error(f"Database error: {sa_err}")
+        return {"error": "Database error", "status": "failure"}
+
+    except asyncpg.PostgresError as pg_err:
+        # COPY errors come straight from asyncpg
+        logger.error(f"Database error: {pg_err}")
+        return {"error": f"Database error: {pg_err}", "status": "failure"}
+
+    except Exception as e:
+        # Catch any unexpected errors
+        logger.error(f"An unexpected error occurred: {e}")
+        return {"error": "An unexpected error occurred", "status": "failure"}
+
 async def upsert_session_screening_status(
     columns_data: list,
     session_id: str,
@@ -332,6 +549,7 @@ async def upsert_session_screening_status(
         # Execute bulk upsert
         result = await session.execute(stmt)
         await session.commit()
+        invalidate_session_counts("session_screening_status", {session_id})
 
         # Fetch the inserted/updated rows
         return {"message": "Upsert completed", "data": result.fetchall()}
@@ -350,103 +568,62 @@ async def upsert_session_screening_status(
         # Catch any other exceptions
         logger.error(f"An unexpected error occurred: {e}")
         return {"error": "An unexpected error occurred", "status": "failure"}
-async def update_supplier_master_data(session, session_id) -> Dict:
-    try:
-        # Fetch table metadata dynamically
-        upload_supplier_master_table = Base.metadata.tables.get("upload_supplier_master_data")
-        supplier_master_table = Base.metadata.tables.get("supplier_master_data")
-
-        if upload_supplier_master_table is None or supplier_master_table is None:
-            raise HTTPException(
-                status_code=404,
-                detail="Table 'upload_supplier_master_data' or 'supplier_master_data' does not exist in the database schema."
-            )
-
-        required_columns = [
-            "name", "name_international", "address", "postcode", "city", "country",
-            "phone_or_fax", "email_or_website", "national_id", "state", "ens_id", 
-            "session_id", "bvd_id", "validation_status", "final_status", "uploaded_name", "uploaded_external_vendor_id"
-        ]
-        columns_to_select = [
-            getattr(upload_supplier_master_table.c, column) for column in required_columns
-        ]
 
-        print("columns_to_select_______", columns_to_select)
-        query = select(*columns_to_select).where(
-            and_(
-                or_(
-                    upload_supplier_master_table.c.final_status == FinalStatus.ACCEPTED
-                ),
-                upload_supplier_master_table.c.session_id == session_id,
-                upload_supplier_master_table.c.bvd_id.isnot(None)  # Ensure bvd_id is not NULL
-            )
-        )
-
-        result = await session.execute(query)
-        columns = result.keys()
-
-        # Fetch all rows from the result
-        rows = result.fetchall()
-
-        # If no valid records are found, return success response and exit early
-        if not rows:
-            return {
-                "status": "success",
-                "message": f"No valid records found for session_id: {session_id}. No updates were performed."
-            }
+# upload_supplier_master_data columns copied into supplier_master_data when a supplier is accepted
+PROMOTED_SUPPLIER_COLUMNS = {
+    "name": "name", "name_international": "name_international", "address": "address",
+    "postcode": "postcode", "city": "city", "country": "country", "phone_or_fax": "phone_or_fax",
+    "email_or_website": "email_or_website", "national_id": "national_id", "state": "state",
+    "ens_id": "ens_id", "session_id": "session_id", "bvd_id": "bvd_id",
+    "validation_status": "validation_status", "final_status": "final_status",
+    "uploaded_name": "uploaded_name", "uploaded_external_vendor_id": "external_vendor_id",
+}
+
+async def promote_accepted_suppliers(session, session_id, commit: bool = True) -> int:
+    """
+    Upsert the accepted rows of a session from upload_supplier_master_data into supplier_master_data.
 
-        # Prepare rows for insertion
-        RENAME_MAP = {"uploaded_external_vendor_id": "external_vendor_id"}
+    Runs as a single INSERT ... SELECT ... ON CONFLICT (ens_id, session_id) DO UPDATE inside
+    Postgres, so no rows are read into the application.
 
-        rows_to_insert = [
-            {RENAME_MAP.get(k, k): v for k, v in zip(columns, row)}
-            for row in rows
-        ]
+    :param session: AsyncSession instance for database operations.
+    :param session_id: Session whose accepted suppliers are promoted.
+    :param commit: Commit after the upsert.
+    :return: Number of rows inserted or updated.
+    """
+    upload_supplier_master_table = Base.metadata.tables.get("upload_supplier_master_data")
+    supplier_master_table = Base.metadata.tables.get("supplier_master_data")
 
-        print("rows_to_insert__________", rows_to_insert)
-        # Insert or update the rows into the supplier_master_table
-        query2 = insert(supplier_master_table).values(rows_to_insert)
-        query2 = query2.on_conflict_do_update(
-            index_elements=["ens_id", "session_id"],
-            set_={col: query2.excluded[col] for col in rows_to_insert[0].keys() if col not in ["ens_id", "session_id"]}
-        ).returning(*supplier_master_table.c)
-        # Return inserted/updated rows
+    if upload_supplier_master_table is None or supplier_master_table is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Table 'upload_supplier_master_data' or 'supplier_master_data' does not exist in the database schema."
+        )
 
-        result = await session.execute(query2)
-        inserted_or_updated_rows = result.fetchall()
+    accepted_rows = select(
+        *[upload_supplier_master_table.c[column] for column in PROMOTED_SUPPLIER_COLUMNS]
+    ).where(
+        upload_supplier_master_table.c.final_status == FinalStatus.ACCEPTED,
+        upload_supplier_master_table.c.session_id == session_id,
+        upload_supplier_master_table.c.bvd_id.isnot(None)  # Ensure bvd_id is not NULL
+    )
 
-        # If no rows were inserted or updated, return a success message instead of an error
-        if not inserted_or_updated_rows:
-            return {
-                "status": "success",
-                "message": "No changes were made as no new data was available for insertion or update."
-            }
+    target_columns = list(PROMOTED_SUPPLIER_COLUMNS.values())
+    stmt = insert(supplier_master_table).from_select(target_columns, accepted_rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ens_id", "session_id"],
+        set_={column: stmt.excluded[column] for column in target_columns if column not in ["ens_id", "session_id"]}
+    )
 
-        # Commit the transaction
+    result = await session.execute(stmt)
+    if commit:
         await session.commit()
+        # When the caller owns the transaction it invalidates after its own commit
+        invalidate_session_counts("supplier_master_data", {session_id})
+        await invalidate_graph_cache_for_session(session_id, session)
 
-        # Return success response
-        return {
-            "status": "success",
-            "message": f"Inserted or updated {len(inserted_or_updated_rows)} rows successfully."
-        }
-
-    except HTTPException as http_err:
-        raise http_err  # Re-raise known HTTP errors
-
-    except SQLAlchemyError as db_err:
-        # Handle database-specific errors
-        raise HTTPException(
-            status_code=500,
-            detail=f"Database error occurred: {str(db_err)}"
-        )
-
-    except Exception as error:
-        # Handle unexpected errors
-        raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error: {str(error)}"
-        )
+    logger.info(f"Promoted {result.rowcount} accepted supplier(s) of session {session_id} to supplier_master_data")
+    return result.rowcount
 
 async def validate_user_request(current_user, session: AsyncSession = Depends(deps.get_session)):
     # Get the tables from metadata
@@ -484,31 +661,33 @@ async def validate_user_request(current_user, session: AsyncSession = Depends(de
     logger.debug(f"Query Result: {count}")
     return count
 
-async def run_neo4j_query(cypher_query: str) -> dict:
-    try:
+async def run_neo4j_query(
+    cypher_query: str,
+    parameters: Optional[Dict] = None,
+    access_mode: str = WRITE_ACCESS,
+    driver: Optional[AsyncDriver] = None,
+) -> dict:
+    """
+    Run a parameterized Cypher query in a read or write transaction.
 
-        URI = os.environ.get("GRAPHDB__URI")
-        USER = os.environ.get("GRAPHDB__USER")
-        PASSWORD = os.environ.get("GRAPHDB__PASSWORD")
-
-        async with AsyncGraphDatabase.driver(URI, auth=(USER, PASSWORD)) as driver:
-            async with driver.session() as session:
-                result = await session.run(cypher_query)
-
-                # Try fetching records (for read queries)
-                try:
-                    records = await result.data()
-                    return {
-                        "status": "pass",
-                        "message": "Query executed successfully.",
-                        "records": records
-                    }
-                except Exception:
-                    # For write queries that don't return anything
-                    return {
-                        "status": "pass",
-                        "message": "Query executed successfully. No return values."
-                    }
+    :param cypher_query: Cypher with $placeholders, never interpolated values.
+    :param parameters: Values for the placeholders.
+    :param access_mode: neo4j.READ_ACCESS for queries that only read (routed to readers in a cluster).
+    :param driver: Driver to use, the shared driver by default.
+    """
+    try:
+        records = await execute_query(cypher_query, parameters, access_mode, driver)
+        if records:
+            return {
+                "status": "pass",
+                "message": "Query executed successfully.",
+                "records": records
+            }
+        # For write queries that don't return anything
+        return {
+            "status": "pass",
+            "message": "Query executed successfully. No return values."
+        }
 
     except Exception as e:
         return {
@@ -518,15 +697,16 @@ async def run_neo4j_query(cypher_query: str) -> dict:
 
 async def default_head_graph(client_id, session):
     """
-    Creates a root 'Aramco' node with a unique ID in the Neo4j graph.
+    Creates the root 'Aramco' company node for `client_id` in the Neo4j graph, unless it already exists.
     """
 
-    cypher_query = f'''
-    CREATE (a:Company {{name: "Aramco", id: "{client_id}"}})
-    '''
+    cypher_query = """
+    MERGE (a:Company {id: $client_id})
+    ON CREATE SET a.name = $name
+    """
 
     # Run the Cypher query
-    result = await run_neo4j_query(cypher_query)
+    result = await run_neo4j_query(cypher_query, {"client_id": str(client_id), "name": "Aramco"}, WRITE_ACCESS)
 
     return {
         "status": "pass",
@@ -822,10 +1002,12 @@ async def create_session_from_ens_ids_with_session(
         if not data:
             raise ValueError("No data found for the given ENS IDs")
 
-        # Group data by ENS ID and add session_id
-        data_by_ens = {}
+        # Build supplier_master_data rows with session_id
+        rows_to_insert = []
         for row in data:
-            filtered_row = {
+            if not row.get("ens_id"):
+                continue
+            rows_to_insert.append({
                 "ens_id": row.get("ens_id"),
                 "session_id": session_id,
                 "bvd_id": row.get("bvd_id"),
@@ -844,23 +1026,18 @@ async def create_session_from_ens_ids_with_session(
                 "final_status": FinalStatus.ACCEPTED.value,
                 "uploaded_name": row.get("unmodified_name"),
                 "external_vendor_id": row.get("external_vendor_id"),
-            }
-
-            eid = row.get("ens_id")
-            if eid:
-                data_by_ens.setdefault(eid, []).append(filtered_row)
-
-        total_inserted = 0
-        for ens_id, rows in data_by_ens.items():
-            result = await insert_dynamic_ens_data(
-                table_name="supplier_master_data",
-                kpi_data=rows,
-                ens_id=ens_id,
-                session_id=session_id,
-                session=session
-            )
-            inserted = result.get("rows_inserted", 0)
-            total_inserted += inserted
+            })
+
+        # Load all rows in one COPY instead of one INSERT per ENS ID
+        result = await bulk_copy_dynamic_data(
+            table_name="supplier_master_data",
+            data=rows_to_insert,
+            session=session,
+            commit=False
+        )
+        if result.get("status") != "success":
+            raise Exception(result.get("error") or result.get("message"))
+        total_inserted = result.get("rows_inserted", 0)
 
         screening_status_data = [{
             "overall_status": STATUS.NOT_STARTED,
@@ -878,6 +1055,8 @@ async def create_session_from_ens_ids_with_session(
 
         if response.get("message") != "Upsert completed":
             raise Exception("Session screening status insertion failed")
+        # The screening status upsert committed the COPY above
+        invalidate_session_counts("supplier_master_data", {session_id})
 
         return {
             "session_id": session_id,
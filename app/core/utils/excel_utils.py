@@ -0,0 +1,155 @@
+import asyncio
+from typing import Callable, Iterator, List
+
+from fastapi import UploadFile
+from openpyxl import load_workbook
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.utils.db_utils import bulk_copy_dynamic_data, invalidate_session_counts
+from app.schemas.logger import logger
+
+# Number of sheet rows validated and flushed to the database at a time
+EXCEL_BATCH_SIZE = 1000
+
+
+class RowValidationError(ValueError):
+    """
+    Raised by a batch transform for rows that fail validation.
+
+    `message` is followed by the offending row numbers, so errors from several
+    batches can be merged into a single one.
+    """
+
+    def __init__(self, message: str, rows: List[int]):
+        self.message = message
+        self.rows = list(rows)
+        super().__init__(f"{message}{', '.join(map(str, self.rows))}")
+
+
+def iter_excel_batches(file_obj, batch_size: int = EXCEL_BATCH_SIZE) -> Iterator[List[dict]]:
+    """
+    Read the first sheet of an Excel workbook row by row and yield batches of row dicts.
+
+    The workbook is opened in openpyxl read-only mode so only the current row is
+    materialised. The first row is used as the header, empty cells become "" and
+    fully empty rows are skipped.
+
+    :param file_obj: Seekable binary file object holding the workbook.
+    :param batch_size: Maximum number of rows per yielded batch.
+    :return: Iterator of lists of dictionaries keyed by header name.
+    """
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        headers = [str(value) if value is not None else f"Unnamed: {index}" for index, value in enumerate(header_row)]
+
+        batch = []
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            batch.append({
+                header: ("" if value is None else value)
+                for header, value in zip(headers, values)
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        workbook.close()
+
+
+async def stream_excel_to_table(
+    file_contents: UploadFile,
+    table_name: str,
+    transform_batch: Callable[[List[dict], int], List[dict]],
+    allowed_rows: int,
+    session: AsyncSession,
+    batch_size: int = EXCEL_BATCH_SIZE
+) -> int:
+    """
+    Stream an uploaded Excel file into a table batch by batch.
+
+    Each batch is passed through `transform_batch` (validation, prefixing, ens_id
+    generation) and inserted without committing; the whole upload is committed once
+    at the end so a bad row or an oversized file leaves nothing behind. Once a batch
+    raises RowValidationError nothing more is inserted, but the remaining batches are
+    still validated so every offending row is reported.
+
+    :param file_contents: The uploaded Excel file.
+    :param table_name: Name of the table the rows are inserted into.
+    :param transform_batch: Callable receiving (rows, first_row_number) and returning rows to insert,
+        raising RowValidationError for invalid rows.
+    :param allowed_rows: Maximum number of data rows accepted for this upload.
+    :param session: Async database session.
+    :param batch_size: Number of rows read, validated and flushed at a time.
+    :raises RowValidationError: With the invalid rows of every batch.
+    :raises ValueError: If the file has more than `allowed_rows` rows.
+    :return: Total number of rows inserted.
+    """
+    file_obj = file_contents.file
+    file_obj.seek(0)
+    batches = iter_excel_batches(file_obj, batch_size)
+
+    total_rows = 0
+    rows_inserted = 0
+    validation_error = None
+    session_ids = set()
+    try:
+        while True:
+            # openpyxl parsing is blocking, pull each batch off the event loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+
+            first_row_number = total_rows + 1
+            total_rows += len(batch)
+            if total_rows > allowed_rows:
+                raise ValueError(f"Only {allowed_rows} rows are allowed. Please upload a valid file.")
+
+            try:
+                prepared_rows = transform_batch(batch, first_row_number)
+            except RowValidationError as e:
+                if validation_error is None:
+                    validation_error = e
+                else:
+                    validation_error.rows.extend(e.rows)
+                continue
+
+            if validation_error is not None:
+                # The upload is rolled back anyway, only keep validating
+                continue
+
+            is_inserted = await bulk_copy_dynamic_data(table_name, prepared_rows, session, commit=False)
+            if is_inserted.get("status") != "success":
+                raise Exception(is_inserted.get("error") or is_inserted.get("message"))
+
+            rows_inserted += is_inserted.get("rows_inserted", 0)
+            session_ids.update(row.get("session_id") for row in prepared_rows)
+            logger.debug(f"Flushed {rows_inserted} row(s) into {table_name}")
+
+        if validation_error is not None:
+            raise RowValidationError(validation_error.message, validation_error.rows)
+
+        if not total_rows:
+            raise ValueError("The uploaded file does not contain any rows.")
+
+        await session.commit()
+        invalidate_session_counts(table_name, session_ids)
+
+    except Exception:
+        await session.rollback()
+        raise
+
+    finally:
+        batches.close()
+
+    logger.info(f"{rows_inserted} row(s) were streamed into the {table_name} table.")
+    return rows_inserted
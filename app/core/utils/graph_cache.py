@@ -0,0 +1,163 @@
+# In-process cache of /graph/get-network-graph responses.
+#
+# Supplier graphs only change when supplier_master_data is promoted or when a
+# screening session completes (ratings and graph writes), so responses are
+# kept per client_id and normalized filter request, serialized once, and served
+# with an ETag. Every API process invalidates its own entries from the
+# session status notifications.
+
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database_session
+from app.core.utils.cache_utils import TTLCache
+from app.core.utils.notification_hub import SESSION_STATUS_CHANNEL, NotificationHub, notification_hub
+from app.models import STATUS, Base
+from app.schemas.logger import logger
+
+GRAPH_CACHE_TTL = 900
+GRAPH_CACHE_MAXSIZE = 256
+
+# (client_id, filter hash) -> (etag, serialized JSON body)
+GRAPH_RESPONSE_CACHE = TTLCache(maxsize=GRAPH_CACHE_MAXSIZE, ttl=GRAPH_CACHE_TTL)
+
+# Bumped on invalidation so a response computed before it is not stored afterwards
+_generations: Dict[str, int] = {}
+_inflight: Dict[Hashable, asyncio.Future] = {}
+
+
+def _is_ignored_filter(value) -> bool:
+    # Values that the query builder skips
+    if isinstance(value, list):
+        return value in ([], [""], ["string"])
+    return value is None or value is False or value in ("", "string")
+
+
+def normalize_graph_filters(filters: dict) -> str:
+    """
+    Hash the filter request so equivalent requests share a cache entry.
+
+    Ignored values (None, "", "string", empty lists, False flags) are dropped and
+    list values are sorted, the client name is not part of the query and is ignored.
+    """
+    normalized = {}
+    for field, value in filters.items():
+        if field in ("client", "client_id") or _is_ignored_filter(value):
+            continue
+        normalized[field] = sorted(value, key=str) if isinstance(value, list) else value
+    encoded = json.dumps(normalized, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def graph_cache_key(client_id: str, filters: dict) -> Tuple[str, str]:
+    return str(client_id), normalize_graph_filters(filters)
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class _BuildCancelled(Exception):
+    # Handed to requests waiting on a build whose own request was cancelled
+    pass
+
+
+async def get_or_build_graph(
+    client_id: str, filters: dict, build: Callable[[], Awaitable[bytes]]
+) -> Tuple[str, bytes]:
+    """
+    Return (etag, body) for the graph of `client_id` with `filters`, building it on a miss.
+
+    Concurrent misses for the same key share one build. If the request running the
+    build is cancelled, the requests waiting on it start over instead.
+    """
+    key = graph_cache_key(client_id, filters)
+    while True:
+        cached = GRAPH_RESPONSE_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = _inflight.get(key)
+        if inflight is None:
+            break
+        try:
+            return await asyncio.shield(inflight)
+        except _BuildCancelled:
+            continue
+
+    generation = _generations.get(key[0], 0)
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        body = await build()
+        cached = (make_etag(body), body)
+        if _generations.get(key[0], 0) == generation:
+            GRAPH_RESPONSE_CACHE.set(key, cached)
+        future.set_result(cached)
+        return cached
+    except asyncio.CancelledError:
+        future.set_exception(_BuildCancelled())
+        future.exception()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters get the exception, nobody else needs to retrieve it
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+def invalidate_graph_cache(client_ids: Iterable[str]) -> int:
+    client_ids = {str(client_id) for client_id in client_ids}
+    for client_id in client_ids:
+        _generations[client_id] = _generations.get(client_id, 0) + 1
+    removed = GRAPH_RESPONSE_CACHE.invalidate(lambda key: key[0] in client_ids)
+    if removed:
+        logger.debug(f"Invalidated {removed} cached graph(s) for {sorted(client_ids)}")
+    return removed
+
+
+async def invalidate_graph_cache_for_session(session_id: str, session: AsyncSession) -> int:
+    """
+    Invalidate the cached graphs of the client(s) that own `session_id`.
+    """
+    session_configuration = Base.metadata.tables.get("session_configuration")
+    if session_configuration is None:
+        return 0
+    result = await session.execute(
+        select(session_configuration.c.client_id).where(session_configuration.c.session_id == str(session_id)).distinct()
+    )
+    return invalidate_graph_cache(result.scalars().all())
+
+
+async def run_graph_cache_invalidation(hub: Optional[NotificationHub] = None) -> None:
+    """
+    Invalidate cached graphs whenever a screening session completes, until cancelled.
+    """
+    hub = hub or notification_hub
+    async with hub.subscribe(SESSION_STATUS_CHANNEL) as subscription:
+        while True:
+            payload = await subscription.get()
+            session_id = payload.get("session_id") if isinstance(payload, dict) else None
+            # Payloads without a status cannot be told apart, treat them as a possible completion
+            if session_id is None or payload.get("overall_status", STATUS.COMPLETED.value) != STATUS.COMPLETED.value:
+                continue
+            try:
+                async with database_session.get_async_session() as session:
+                    await invalidate_graph_cache_for_session(session_id, session)
+            except Exception as e:
+                logger.error(f"Failed to invalidate cached graphs for session {session_id}: {str(e)}")
@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Optional
+
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction
+
+from app.core.config import get_settings
+from app.schemas.logger import logger
+
+_driver: Optional[AsyncDriver] = None
+
+
+def get_graph_driver() -> AsyncDriver:
+    """
+    Return the shared Neo4j driver.
+
+    Created on first use (normally at startup) and reused for every query so the
+    Bolt connections, their TLS and auth handshakes, stay warm in the driver's pool;
+    closed by `close_graph_driver` on application shutdown.
+    """
+    global _driver
+    if _driver is None:
+        graphdb = get_settings().graphdb
+        _driver = AsyncGraphDatabase.driver(
+            graphdb.uri,
+            auth=(graphdb.user, graphdb.password),
+            max_connection_pool_size=graphdb.max_connection_pool_size,
+            connection_acquisition_timeout=graphdb.connection_acquisition_timeout,
+            max_connection_lifetime=graphdb.max_connection_lifetime,
+            connection_timeout=graphdb.connection_timeout,
+        )
+    return _driver
+
+
+async def execute_query(
+    cypher_query: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    access_mode: str = WRITE_ACCESS,
+    driver: Optional[AsyncDriver] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a parameterized Cypher query in a managed transaction and return its records.
+
+    Values must be passed as `parameters` rather than formatted into the query so
+    Neo4j can reuse the cached plan. READ_ACCESS transactions are routed to
+    followers/read replicas in a cluster, and managed transactions are retried by
+    the driver on transient errors.
+
+    :param cypher_query: Cypher with $placeholders.
+    :param parameters: Values for the placeholders.
+    :param access_mode: neo4j.READ_ACCESS or neo4j.WRITE_ACCESS.
+    :param driver: Driver to use, the shared driver by default.
+    :return: Records as dicts, empty for queries without RETURN.
+    """
+    async def work(tx: AsyncManagedTransaction) -> List[Dict[str, Any]]:
+        result = await tx.run(cypher_query, parameters or {})
+        return await result.data()
+
+    async with (driver or get_graph_driver()).session() as neo4j_session:
+        if access_mode == READ_ACCESS:
+            return await neo4j_session.execute_read(work)
+        return await neo4j_session.execute_write(work)
+
+
+async def ensure_graph_constraints() -> None:
+    # Lets MERGE on Company.id stay idempotent under concurrent client setup
+    await execute_query("CREATE CONSTRAINT company_id IF NOT EXISTS FOR (c:Company) REQUIRE c.id IS UNIQUE")
+
+
+async def verify_graph_connectivity() -> bool:
+    try:
+        await get_graph_driver().verify_connectivity()
+        logger.info("Neo4j connection established.")
+    except Exception as e:
+        logger.warning(f"Failed to connect to Neo4j: {str(e)}")
+        return False
+
+    try:
+        await ensure_graph_constraints()
+    except Exception as e:
+        # Usually duplicate client nodes created before the constraint existed
+        logger.error(
+            "Failed to create the Company.id uniqueness constraint, check Neo4j for duplicate "
+            f"Company.id values (MATCH (c:Company) WITH c.id AS id, count(*) AS n WHERE n > 1 RETURN id, n): {str(e)}"
+        )
+    return True
+
+
+async def close_graph_driver() -> None:
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
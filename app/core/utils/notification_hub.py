@@ -0,0 +1,259 @@
+# Process-wide Postgres LISTEN hub.
+#
+# One asyncpg connection per channel is shared by every subscriber in the
+# process (websocket streams, pipeline waiters). Notifications are fanned out
+# by session_id into bounded per-subscriber queues; a slow subscriber loses its
+# oldest messages instead of holding memory or blocking the others.
+
+import asyncio
+import json
+from collections import Counter, OrderedDict, defaultdict
+from typing import Callable, Dict, Optional, Set
+from urllib.parse import quote_plus
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.schemas.logger import logger
+
+# Postgres NOTIFY channels raised when session_screening_status / ensid_screening_status rows change
+SESSION_STATUS_CHANNEL = "session_id_status_channel"
+ENS_ID_STATUS_CHANNEL = "ens_id_status_channel"
+
+SUBSCRIBER_QUEUE_SIZE = 100
+RECONNECT_DELAY_SECS = 1
+MAX_RECONNECT_DELAY_SECS = 30
+
+
+def get_listen_dsn() -> str:
+    """
+    Build the plain asyncpg DSN used for LISTEN connections (SQLAlchemy pooled sessions cannot LISTEN).
+    """
+    settings = get_settings()
+    encoded_password = quote_plus(settings.database.password.get_secret_value())
+    return (
+        f"postgresql://{settings.database.username}:{encoded_password}@"
+        f"{settings.database.hostname}:{settings.database.port}/{settings.database.db}"
+    )
+
+
+class Subscription:
+    """
+    A subscriber's bounded buffer of decoded notification payloads.
+
+    By default a FIFO queue. With `coalesce_key` only the latest payload per key
+    (e.g. "ens_id") is kept, so bursts of updates to the same entity collapse
+    instead of being dropped.
+
+    Use as an async context manager so it is always removed from the hub.
+    """
+
+    def __init__(
+        self, hub: "NotificationHub", channel: str, session_id: Optional[str], maxsize: int,
+        coalesce_key: Optional[str] = None
+    ):
+        self.hub = hub
+        self.channel = channel
+        self.session_id = session_id
+        self.maxsize = maxsize
+        self.coalesce_key = coalesce_key
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._latest: OrderedDict = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def deliver(self, payload: dict) -> None:
+        # Never blocks the listener: when full, the oldest message makes room
+        self.received += 1
+        if self.coalesce_key is not None:
+            key = payload.get(self.coalesce_key) if isinstance(payload, dict) else None
+            if key in self._latest:
+                self._latest.move_to_end(key)
+                self.coalesced += 1
+            elif len(self._latest) >= self.maxsize:
+                self._latest.popitem(last=False)
+                self.dropped += 1
+            self._latest[key] = payload
+            self._ready.set()
+            return
+
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(payload)
+        self._ready.set()
+
+    async def wait(self) -> None:
+        """
+        Wait until at least one payload is buffered, without taking it.
+        """
+        while not self.pending():
+            self._ready.clear()
+            await self._ready.wait()
+
+    async def get(self) -> dict:
+        await self.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> dict:
+        if self.coalesce_key is not None:
+            if not self._latest:
+                raise asyncio.QueueEmpty
+            _, payload = self._latest.popitem(last=False)
+            return payload
+        return self._queue.get_nowait()
+
+    def drain(self) -> list:
+        """
+        Remove and return every buffered payload, oldest first.
+        """
+        payloads = []
+        while self.pending():
+            payloads.append(self.get_nowait())
+        return payloads
+
+    def pending(self) -> int:
+        return len(self._latest) if self.coalesce_key is not None else self._queue.qsize()
+
+    def clear(self) -> None:
+        self.drain()
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StatusProgress:
+    """
+    Latest status per entity and running counts per status, for progress counters in batched frames.
+    """
+
+    def __init__(self, key: str = "ens_id", status_field: str = "overall_status"):
+        self.key = key
+        self.status_field = status_field
+        self._latest: Dict[str, Optional[str]] = {}
+        self._counts: Counter = Counter()
+
+    def update(self, payloads: list) -> None:
+        for payload in payloads:
+            entity = payload.get(self.key)
+            new_status = payload.get(self.status_field)
+            previous_status = self._latest.get(entity)
+            if entity in self._latest:
+                self._counts[previous_status] -= 1
+                if not self._counts[previous_status]:
+                    del self._counts[previous_status]
+            self._latest[entity] = new_status
+            self._counts[new_status] += 1
+
+    def snapshot(self) -> dict:
+        return {"total": len(self._latest), "by_status": {str(status): count for status, count in self._counts.items()}}
+
+
+class NotificationHub:
+    def __init__(self, dsn: Callable[[], str] = get_listen_dsn, connect=None):
+        self._dsn = dsn
+        self._connect = connect
+        # channel -> session_id (None for every session) -> subscriptions
+        self._subscribers: Dict[str, Dict[Optional[str], Set[Subscription]]] = defaultdict(lambda: defaultdict(set))
+        self._listeners: Dict[str, asyncio.Task] = {}
+
+    def subscribe(
+        self, channel: str, session_id: Optional[str] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE,
+        coalesce_key: Optional[str] = None
+    ) -> Subscription:
+        """
+        Subscribe to `channel`, limited to notifications whose payload has `session_id` when given.
+
+        The channel's listener connection is opened by the first subscriber.
+        """
+        subscription = Subscription(
+            self, channel, str(session_id) if session_id is not None else None, maxsize, coalesce_key
+        )
+        self._subscribers[channel][subscription.session_id].add(subscription)
+        if channel not in self._listeners or self._listeners[channel].done():
+            self._listeners[channel] = asyncio.create_task(self._listen(channel))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscription; the channel's connection is closed with its last subscriber.
+        """
+        channel_subscribers = self._subscribers.get(subscription.channel)
+        if not channel_subscribers:
+            return
+        session_subscribers = channel_subscribers.get(subscription.session_id)
+        if session_subscribers is not None:
+            session_subscribers.discard(subscription)
+            if not session_subscribers:
+                del channel_subscribers[subscription.session_id]
+        if not channel_subscribers:
+            del self._subscribers[subscription.channel]
+            listener = self._listeners.pop(subscription.channel, None)
+            if listener:
+                listener.cancel()
+
+    def subscriber_count(self, channel: str) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscribers.get(channel, {}).values())
+
+    def dispatch(self, channel: str, raw_payload: str) -> None:
+        try:
+            payload = json.loads(raw_payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring non-JSON notification on {channel}")
+            return
+
+        channel_subscribers = self._subscribers.get(channel, {})
+        session_id = payload.get("session_id") if isinstance(payload, dict) else None
+        targets = set(channel_subscribers.get(None, ()))
+        if session_id is not None:
+            targets |= channel_subscribers.get(str(session_id), set())
+        for subscription in targets:
+            subscription.deliver(payload)
+
+    async def _listen(self, channel: str) -> None:
+        # Keep one LISTEN connection open for the channel, reconnecting with backoff when it drops
+        connect = self._connect or asyncpg.connect
+        delay = RECONNECT_DELAY_SECS
+        while True:
+            conn = None
+            connection_lost = asyncio.Event()
+            try:
+                conn = await connect(self._dsn())
+                conn.add_termination_listener(lambda connection: connection_lost.set())
+                await conn.add_listener(channel, lambda connection, pid, notify_channel, payload: self.dispatch(notify_channel, payload))
+                logger.info(f"Listening on {channel} for {self.subscriber_count(channel)} subscriber(s)")
+                delay = RECONNECT_DELAY_SECS
+                await connection_lost.wait()
+                logger.warning(f"LISTEN connection for {channel} was lost, reconnecting")
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"LISTEN on {channel} failed: {str(e)}, retrying in {delay}s")
+
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY_SECS)
+
+    async def close(self) -> None:
+        listeners = list(self._listeners.values())
+        self._listeners.clear()
+        self._subscribers.clear()
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+
+notification_hub = NotificationHub()
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.schemas.logger import logger
+
+# Timeouts (seconds) for calls to the analysis orchestration service
+ORCHESTRATION_TIMEOUT = httpx.Timeout(30.0, connect=5.0, pool=10.0)
+ORCHESTRATION_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+# Retry policy: attempts in total and the base of the exponential backoff
+ORCHESTRATION_MAX_ATTEMPTS = 3
+ORCHESTRATION_BACKOFF_SECS = 0.5
+
+# Gateway style responses mean the orchestrator never handled the request, so a retry cannot trigger it twice
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_orchestration_client() -> httpx.AsyncClient:
+    """
+    Return the shared, connection pooled client for the analysis orchestration service.
+
+    Created on first use and reused for every trigger so connections are kept alive
+    between calls; closed by `close_orchestration_client` on application shutdown.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=get_settings().urls.analysis_orchestration,
+            timeout=ORCHESTRATION_TIMEOUT,
+            limits=ORCHESTRATION_LIMITS,
+            headers={"accept": "application/json"},
+        )
+    return _client
+
+
+async def close_orchestration_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def post_orchestration(path: str, payload: Dict, auth_token: str) -> Dict:
+    """
+    POST a JSON payload to the analysis orchestration service.
+
+    Only failures where the request cannot have been processed are retried
+    (connection errors, pool timeouts and 502/503/504), with exponential backoff,
+    because the trigger endpoints are not idempotent.
+
+    :param path: Path relative to `urls.analysis_orchestration`, e.g. "/analysis/trigger-analysis".
+    :param payload: JSON body of the request.
+    :param auth_token: The Bearer token for authorization.
+    :return: Response JSON or {"error": message}.
+    """
+    client = get_orchestration_client()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    for attempt in range(1, ORCHESTRATION_MAX_ATTEMPTS + 1):
+        try:
+            response = await client.post(path, json=payload, headers=headers)
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < ORCHESTRATION_MAX_ATTEMPTS:
+                raise httpx.HTTPStatusError(
+                    f"Orchestration returned {response.status_code}", request=response.request, response=response
+                )
+            response.raise_for_status()  # Raise error for bad status codes
+            return response.json()
+
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.HTTPStatusError) as e:
+            retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRYABLE_STATUS_CODES
+            if not retryable or attempt >= ORCHESTRATION_MAX_ATTEMPTS:
+                logger.error(f"Orchestration call {path} failed: {str(e)}")
+                return {"error": str(e)}
+
+            backoff = ORCHESTRATION_BACKOFF_SECS * 2 ** (attempt - 1)
+            logger.warning(
+                f"Orchestration call {path} failed ({str(e)}), retrying in {backoff}s "
+                f"[{attempt}/{ORCHESTRATION_MAX_ATTEMPTS}]"
+            )
+            await asyncio.sleep(backoff)
+
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Orchestration call {path} failed: {str(e)}")
+            return {"error": str(e)}
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, Optional
+
+from app.core.utils.notification_hub import SESSION_STATUS_CHANNEL, NotificationHub, notification_hub
+from app.schemas.logger import logger
+
+
+async def wait_for_session_status(
+    session_id: str,
+    read_status: Callable[[], Awaitable[str]],
+    terminal_statuses: Iterable[str],
+    timeout: float,
+    poll_interval: float = 30,
+    channel: str = SESSION_STATUS_CHANNEL,
+    hub: Optional[NotificationHub] = None,
+) -> str:
+    """
+    Wait until a session reaches one of `terminal_statuses`.
+
+    Subscribes to `channel` through the shared notification hub and re-reads the
+    status as soon as a notification for `session_id` arrives. Falls back to reading
+    every `poll_interval` seconds when no notification comes, e.g. while the hub is
+    reconnecting. No database session is held between reads.
+
+    :param session_id: Session whose status is awaited.
+    :param read_status: Coroutine function returning the current status, opens its own session.
+    :param terminal_statuses: Statuses that end the wait (e.g. COMPLETED, FAILED).
+    :param timeout: Maximum number of seconds to wait.
+    :param poll_interval: Seconds between fallback reads.
+    :param channel: Postgres NOTIFY channel to listen on.
+    :param hub: Notification hub to subscribe with, the process-wide hub by default.
+    :raises TimeoutError: If no terminal status is reached within `timeout`.
+    :return: The terminal status that was reached.
+    """
+    terminal_statuses = set(terminal_statuses)
+    hub = hub or notification_hub
+
+    async with hub.subscribe(channel, session_id, maxsize=1) as subscription:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Clear before reading so a change committed during the read triggers another read
+            subscription.clear()
+            current_status = await read_status()
+            logger.debug(f"Current status for session {session_id}: {current_status}")
+            if current_status in terminal_statuses:
+                return current_status
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Session {session_id} did not reach {sorted(terminal_statuses)} within {timeout}s.")
+
+            try:
+                await asyncio.wait_for(subscription.get(), timeout=min(poll_interval, remaining))
+            except asyncio.TimeoutError:
+                logger.debug(f"No status notification for session {session_id}, polling")
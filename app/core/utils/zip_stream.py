@@ -0,0 +1,120 @@
+import asyncio
+import zipfile
+from collections import deque
+from typing import AsyncIterator, List
+
+from azure.storage.blob import BlobProperties
+
+from app.core.utils.blob_storage import stream_blob
+from app.schemas.logger import logger
+
+# Blobs downloaded ahead of the entry currently being written
+ZIP_PREFETCH_WINDOW = 4
+# Chunks buffered per prefetched blob, memory is bounded by window * chunks * BLOB_CHUNK_SIZE
+ZIP_PREFETCH_CHUNKS = 2
+
+# Formats that are already compressed and are stored as-is instead of deflated again
+STORED_EXTENSIONS = {"pdf", "docx", "xlsx", "pptx", "zip", "gz", "png", "jpg", "jpeg"}
+
+
+class _ZipSink:
+    """
+    Write-only, non-seekable file object that collects what zipfile writes until it is drained.
+
+    Having no tell/seek makes zipfile write data descriptors instead of seeking
+    back to patch local headers, so the archive can be sent as it is produced.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def zip_compress_type(blob_name: str) -> int:
+    extension = blob_name.rsplit(".", 1)[-1].lower() if "." in blob_name else ""
+    return zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+async def _prefetch_blob(container_name: str, blob_name: str, queue: asyncio.Queue) -> None:
+    # Feed the blob's chunks into a bounded queue, ends with None or the raised exception
+    try:
+        async for chunk in await stream_blob(container_name, blob_name):
+            await queue.put(chunk)
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+
+
+async def stream_blobs_as_zip(container_name: str, blobs: List[BlobProperties]) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive of `blobs` piece by piece while it is being built.
+
+    Up to ZIP_PREFETCH_WINDOW blobs are downloaded concurrently ahead of the entry
+    being written, each into a queue of at most ZIP_PREFETCH_CHUNKS chunks, so memory
+    stays bounded regardless of the number or size of the blobs.
+
+    :param container_name: Container holding the blobs.
+    :param blobs: Blob properties from a listing, in archive order.
+    """
+    sink = _ZipSink()
+    remaining = iter(blobs)
+    pending = deque()
+    current_task = None
+
+    def schedule_prefetch():
+        while len(pending) < ZIP_PREFETCH_WINDOW:
+            blob = next(remaining, None)
+            if blob is None:
+                return
+            queue = asyncio.Queue(maxsize=ZIP_PREFETCH_CHUNKS)
+            task = asyncio.create_task(_prefetch_blob(container_name, blob.name, queue))
+            pending.append((blob, queue, task))
+
+    try:
+        with zipfile.ZipFile(sink, "w") as zip_file:
+            schedule_prefetch()
+            while pending:
+                blob, queue, current_task = pending.popleft()
+                schedule_prefetch()
+
+                zip_info = zipfile.ZipInfo(blob.name, date_time=blob.last_modified.timetuple()[:6])
+                zip_info.compress_type = zip_compress_type(blob.name)
+                zip_info.file_size = blob.size  # Lets zipfile pick ZIP64 for large entries up front
+
+                # Add file to ZIP with original path
+                with zip_file.open(zip_info, "w") as entry:
+                    while (chunk := await queue.get()) is not None:
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        entry.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                data = sink.drain()
+                if data:
+                    yield data
+
+        # Central directory
+        yield sink.drain()
+
+    except Exception as e:
+        logger.error(f"Error streaming ZIP for {container_name}: {str(e)}")
+        raise
+
+    finally:
+        # On disconnect or a failed entry the entry being written is still downloading too
+        if current_task is not None:
+            current_task.cancel()
+        for _, _, task in pending:
+            task.cancel()
@@ -1,12 +1,18 @@
-import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from neo4j import AsyncGraphDatabase
 
 from app.api.api_router import api_router, auth_router
 from app.core.config import get_settings
-from app.schemas.logger import logger
+from app.core.utils.country_index import get_alpha_2_names, get_country_index
+from app.core.tprp.pipeline_queue import run_pipeline_worker
+from app.core.utils.blob_storage import close_blob_service_client
+from app.core.utils.graph_cache import run_graph_cache_invalidation
+from app.core.supplier.report import run_report_index_invalidation
+from app.core.utils.graph_db import close_graph_driver, verify_graph_connectivity
+from app.core.utils.notification_hub import notification_hub
+from app.core.utils.orchestration_client import close_orchestration_client
 
 app = FastAPI(
     title="minimal fastapi postgres template",
@@ -40,13 +46,32 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    try:
-        driver = AsyncGraphDatabase.driver(
-            os.environ.get("GRAPHDB__URI"),
-            auth=(os.environ.get("GRAPHDB__USER"), os.environ.get("GRAPHDB__PASSWORD")),
-        )
-        async with driver.session() as session:
-            await session.run("RETURN 1")
-        logger.info("Neo4j connection established.")
-    except Exception as e:
-        logger.warning(f"Failed to connect to Neo4j: {str(e)}")
\ No newline at end of file
+    # Build the country lookup tables once instead of on the first upload
+    get_country_index()
+    get_alpha_2_names()
+
+    # Run TPRP pipeline workers in this process unless dedicated workers are deployed
+    app.state.pipeline_worker = None
+    if get_settings().pipeline.run_in_api:
+        app.state.pipeline_worker = asyncio.create_task(run_pipeline_worker())
+
+    # Open the shared Neo4j driver so the first graph request finds a warm pool
+    await verify_graph_connectivity()
+
+    # Drop cached network graphs of a client when one of its sessions completes
+    app.state.graph_cache_invalidation = asyncio.create_task(run_graph_cache_invalidation())
+
+    # Drop the indexed latest report of an ens_id when a new report lands
+    app.state.report_index_invalidation = asyncio.create_task(run_report_index_invalidation())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.pipeline_worker:
+        app.state.pipeline_worker.cancel()
+    app.state.graph_cache_invalidation.cancel()
+    app.state.report_index_invalidation.cancel()
+    await close_orchestration_client()
+    await close_blob_service_client()
+    await notification_hub.close()
+    await close_graph_driver()
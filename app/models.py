@@ -707,4 +707,23 @@ class Notification(Base):
     theme = Column(String(100), nullable=True)
     data_value = Column(String(255), nullable=True)
     session_id = Column(String(50), nullable=True)
-    create_time = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    create_time = Column(DateTime(timezone=True), server_default=func.now())
+
+class TprpPipelineJob(Base):
+    __tablename__ = "tprp_pipeline_job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(50), nullable=False)
+    user_id = Column(String, nullable=False)
+    status = Column(SQLAlchemyEnum(STATUS), nullable=False, server_default=expression.literal(STATUS.QUEUED.value))
+    stage = Column(String(50), nullable=True)  # Last completed pipeline stage, the job resumes after it
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="3")
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    worker_id = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('session_id', name='unique_sessionid_pipeline_job'),
+    )
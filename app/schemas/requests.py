@@ -35,6 +35,19 @@ class SupplierFilterRequest(BaseModel):
     filter_multiple_connections_indirect: Optional[bool] = False
     submodal_id: Optional[str] = None
 
+class GraphOverviewRequest(SupplierFilterRequest):
+    group_by: Literal["country", "overall_rating"] = "country"
+
+class GraphClusterRequest(GraphOverviewRequest):
+    cluster_value: str
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+
+class GraphNodeRequest(BaseModel):
+    node_id: str
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+
 class UserCreateRequest(BaseRequest):
     email: EmailStr
     password: str
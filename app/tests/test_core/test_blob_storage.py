@@ -0,0 +1,28 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.utils.blob_storage import parse_range_header
+
+
+@pytest.mark.parametrize(
+    "range_header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-200", (800, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=0-1,5-9", None),
+        ("items=0-1", None),
+    ],
+)
+def test_range_header_is_parsed_against_file_size(range_header: str | None, expected: tuple[int, int] | None) -> None:
+    assert parse_range_header(range_header, 1000) == expected
+
+
+def test_range_outside_file_is_not_satisfiable() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range_header("bytes=1000-", 1000)
+
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": "bytes */1000"}
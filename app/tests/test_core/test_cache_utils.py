@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from freezegun import freeze_time
+
+from app.core.utils.cache_utils import TTLCache
+from app.core.utils.db_utils import SESSION_COUNT_CACHE, insert_dynamic_data, invalidate_session_counts
+
+
+def test_cache_entry_expires_after_ttl() -> None:
+    with freeze_time("2025-01-01 00:00:00") as frozen:
+        cache = TTLCache(ttl=30)
+        cache.set("key", 1)
+        assert cache.get("key") == 1
+
+        frozen.tick(31)
+        assert cache.get("key") is None
+
+
+def test_cache_evicts_least_recently_used_entry() -> None:
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_session_counts_are_invalidated_per_table_and_session() -> None:
+    SESSION_COUNT_CACHE.clear()
+    SESSION_COUNT_CACHE.set(("upload_supplier_master_data", "s1", ()), 10)
+    SESSION_COUNT_CACHE.set(("upload_supplier_master_data", "s2", ()), 20)
+    SESSION_COUNT_CACHE.set(("upload_supplier_master_data", "", ()), 30)
+    SESSION_COUNT_CACHE.set(("supplier_master_data", "s1", ()), 40)
+
+    invalidate_session_counts("upload_supplier_master_data", {"s1"})
+
+    assert ("upload_supplier_master_data", "s1", ()) not in SESSION_COUNT_CACHE
+    assert ("upload_supplier_master_data", "", ()) not in SESSION_COUNT_CACHE
+    assert SESSION_COUNT_CACHE.get(("upload_supplier_master_data", "s2", ())) == 20
+    assert SESSION_COUNT_CACHE.get(("supplier_master_data", "s1", ())) == 40
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def execute(self, query):
+        return SimpleNamespace(rowcount=1)
+
+    async def commit(self):
+        self.commits += 1
+
+
+async def test_session_counts_are_invalidated_only_after_commit() -> None:
+    SESSION_COUNT_CACHE.clear()
+    key = ("upload_supplier_master_data", "s1", ())
+    rows = [{"session_id": "s1", "ens_id": "e1"}]
+    session = FakeSession()
+
+    SESSION_COUNT_CACHE.set(key, 10)
+    await insert_dynamic_data("upload_supplier_master_data", rows, session, commit=False)
+    # The caller owns the commit and invalidates after it
+    assert SESSION_COUNT_CACHE.get(key) == 10
+
+    await insert_dynamic_data("upload_supplier_master_data", rows, session)
+    assert session.commits == 1
+    assert key not in SESSION_COUNT_CACHE
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from app.core.utils import country_index
+
+
+def test_country_names_codes_and_aliases_map_to_alpha_2() -> None:
+    assert country_index.to_alpha_2("Germany") == "DE"
+    assert country_index.to_alpha_2("  germany ") == "DE"
+    assert country_index.to_alpha_2("United States of America") == "US"
+    assert country_index.to_alpha_2("USA") == "US"
+    assert country_index.to_alpha_2("uk") == "GB"
+    assert country_index.to_alpha_2("fr") == "FR"
+
+
+def test_unknown_country_keeps_original_value() -> None:
+    assert country_index.to_alpha_2("Atlantis") == "Atlantis"
+    assert country_index.to_alpha_2("") == ""
+
+
+def test_map_series_maps_each_value_and_keeps_missing() -> None:
+    countries = pd.Series(["Saudi Arabia", "KSA", "Atlantis", None, "saudi arabia"])
+
+    mapped = country_index.map_series(countries)
+
+    assert mapped.tolist()[:3] == ["SA", "SA", "Atlantis"]
+    assert pd.isna(mapped[3])
+    assert mapped[4] == "SA"
+
+
+def test_alpha_2_is_mapped_back_to_country_name() -> None:
+    assert country_index.get_country_name("de") == "Germany"
+    assert country_index.get_country_name("ZZ") == "ZZ"
@@ -0,0 +1,60 @@
+import re
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.core.utils.db_utils import decode_page_cursor, encode_page_cursor, promote_accepted_suppliers
+
+
+def test_page_cursor_round_trips_update_time_and_id() -> None:
+    update_time = datetime(2025, 7, 16, 12, 13, 33, 241433, tzinfo=UTC)
+
+    cursor = encode_page_cursor(update_time, 42)
+
+    assert decode_page_cursor(cursor) == (update_time, 42)
+
+
+def test_invalid_page_cursor_is_rejected() -> None:
+    with pytest.raises(HTTPException) as e:
+        decode_page_cursor("not-a-cursor")
+
+    assert e.value.status_code == 400
+    assert e.value.detail == "'cursor' is invalid."
+
+
+async def test_promotion_upserts_accepted_rows_with_a_bvd_id() -> None:
+    statements = []
+
+    class FakeSession:
+        async def execute(self, statement):
+            statements.append(statement)
+            return SimpleNamespace(rowcount=2)
+
+    assert await promote_accepted_suppliers(FakeSession(), "s1", commit=False) == 2
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    insert_columns, select_columns, where, conflict_set = re.match(
+        r"INSERT INTO supplier_master_data \((.*?)\) SELECT (.*?) \nFROM upload_supplier_master_data \n"
+        r"WHERE (.*?) ON CONFLICT \(ens_id, session_id\) DO UPDATE SET (.*)$",
+        sql,
+        re.DOTALL,
+    ).groups()
+
+    assert where == (
+        "upload_supplier_master_data.final_status = 'ACCEPTED' AND upload_supplier_master_data.session_id = 's1' "
+        "AND upload_supplier_master_data.bvd_id IS NOT NULL"
+    )
+    copied = dict(zip(
+        insert_columns.split(", "),
+        (column.removeprefix("upload_supplier_master_data.") for column in select_columns.split(", ")),
+    ))
+    assert copied["external_vendor_id"] == "uploaded_external_vendor_id"
+    assert copied["name"] == "name"
+    assert copied["bvd_id"] == "bvd_id"
+
+    updated = dict(assignment.split(" = ") for assignment in conflict_set.split(", "))
+    assert set(updated) == set(copied) - {"ens_id", "session_id"}
+    assert all(value == f"excluded.{column}" for column, value in updated.items())
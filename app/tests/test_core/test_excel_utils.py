@@ -0,0 +1,93 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import Workbook
+
+from app.core.supplier.supplier import validate_and_update_data
+from app.core.utils import excel_utils
+from app.core.utils.excel_utils import RowValidationError, iter_excel_batches
+
+
+def _workbook_bytes(rows: list[list]) -> io.BytesIO:
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_excel_rows_are_batched_with_header_keys() -> None:
+    file_obj = _workbook_bytes(
+        [["name", "country", "national_id"]]
+        + [[f"supplier_{i}", "Germany", i] for i in range(5)]
+    )
+
+    batches = list(iter_excel_batches(file_obj, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[0][0] == {"name": "supplier_0", "country": "Germany", "national_id": 0}
+
+
+def test_excel_empty_cells_become_empty_strings_and_blank_rows_are_skipped() -> None:
+    file_obj = _workbook_bytes(
+        [
+            ["name", "country", "national_id"],
+            ["supplier", None, "123"],
+            [None, None, None],
+        ]
+    )
+
+    batches = list(iter_excel_batches(file_obj))
+
+    assert batches == [[{"name": "supplier", "country": "", "national_id": "123"}]]
+
+
+def test_excel_without_rows_yields_nothing() -> None:
+    assert list(iter_excel_batches(_workbook_bytes([]))) == []
+
+
+class FakeSession:
+    def __init__(self):
+        self.committed = False
+        self.rolled_back = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+async def test_invalid_rows_of_every_batch_are_reported(monkeypatch: pytest.MonkeyPatch) -> None:
+    inserted = []
+
+    async def fake_bulk_copy(table_name, rows, session, commit=True):
+        inserted.extend(rows)
+        return {"status": "success", "rows_inserted": len(rows)}
+
+    monkeypatch.setattr(excel_utils, "bulk_copy_dynamic_data", fake_bulk_copy)
+    rows = [[f"supplier_{i}", "Germany", i] for i in range(7)]
+    rows[1][1] = None
+    rows[4][0] = None
+    rows[6][2] = None
+    upload = SimpleNamespace(file=_workbook_bytes([["name", "country", "national_id"]] + rows))
+    session = FakeSession()
+
+    with pytest.raises(RowValidationError) as e:
+        await excel_utils.stream_excel_to_table(
+            upload,
+            "upload_supplier_master_data",
+            lambda batch, first_row_number: validate_and_update_data(batch, "user", "session", first_row_number),
+            allowed_rows=100,
+            session=session,
+            batch_size=3,
+        )
+
+    assert e.value.rows == [2, 5, 7]
+    assert str(e.value).endswith("Missing values in row(s): 2, 5, 7")
+    assert not inserted
+    assert session.rolled_back and not session.committed
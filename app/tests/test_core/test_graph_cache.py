@@ -0,0 +1,117 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from app.core.utils import graph_cache
+from app.core.utils.notification_hub import SESSION_STATUS_CHANNEL, NotificationHub
+
+
+@contextlib.asynccontextmanager
+async def no_session():
+    yield None
+
+
+@pytest.fixture(autouse=True)
+def empty_graph_cache() -> None:
+    graph_cache.GRAPH_RESPONSE_CACHE.clear()
+    graph_cache._generations.clear()
+
+
+def test_equivalent_filter_requests_share_a_key() -> None:
+    first = {"client": "Aramco", "client_id": "c1", "country": ["SA", "DE"], "name": "string", "submodal_id": None,
+             "filter_multiple_connections_direct": False}
+    second = {"client": "ARAMCO", "client_id": "c1", "country": ["DE", "SA"], "overall_rating": [""]}
+
+    assert graph_cache.graph_cache_key("c1", first) == graph_cache.graph_cache_key("c1", second)
+    assert graph_cache.graph_cache_key("c1", first) != graph_cache.graph_cache_key("c2", first)
+    assert graph_cache.normalize_graph_filters(first) != graph_cache.normalize_graph_filters({"country": ["SA"]})
+
+
+def test_etag_matches_if_none_match() -> None:
+    etag = graph_cache.make_etag(b"{}")
+
+    assert graph_cache.etag_matches(f'"other", W/{etag}', etag)
+    assert graph_cache.etag_matches("*", etag)
+    assert not graph_cache.etag_matches(None, etag)
+    assert not graph_cache.etag_matches('"other"', etag)
+
+
+async def test_concurrent_misses_build_once_and_hits_are_cached() -> None:
+    builds = []
+
+    async def build() -> bytes:
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return b'{"nodes": [], "edges": []}'
+
+    results = await asyncio.gather(*[graph_cache.get_or_build_graph("c1", {"country": ["SA"]}, build) for _ in range(3)])
+    cached = await graph_cache.get_or_build_graph("c1", {"country": ["SA"]}, build)
+
+    assert len(builds) == 1
+    assert len({result for result in results}) == 1
+    assert cached == results[0]
+    assert cached[0] == graph_cache.make_etag(cached[1])
+
+
+async def test_invalidation_during_build_is_not_overwritten() -> None:
+    async def build() -> bytes:
+        graph_cache.invalidate_graph_cache(["c1"])
+        return b"stale"
+
+    await graph_cache.get_or_build_graph("c1", {}, build)
+
+    assert len(graph_cache.GRAPH_RESPONSE_CACHE) == 0
+
+
+async def test_waiters_rebuild_when_the_building_request_is_cancelled() -> None:
+    started = asyncio.Event()
+
+    async def stuck_build() -> bytes:
+        started.set()
+        await asyncio.Event().wait()
+        return b"never"
+
+    async def build() -> bytes:
+        return b'{"nodes": [], "edges": []}'
+
+    builder = asyncio.create_task(graph_cache.get_or_build_graph("c1", {}, stuck_build))
+    await started.wait()
+    waiter = asyncio.create_task(graph_cache.get_or_build_graph("c1", {}, build))
+    await asyncio.sleep(0)
+    builder.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await builder
+    etag, body = await waiter
+
+    assert body == b'{"nodes": [], "edges": []}'
+    assert graph_cache.GRAPH_RESPONSE_CACHE.get(graph_cache.graph_cache_key("c1", {})) == (etag, body)
+    assert not graph_cache._inflight
+
+
+async def test_completed_session_notification_invalidates_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def unavailable(dsn: str):
+        raise OSError("connection refused")
+
+    invalidated = []
+
+    async def invalidate_for_session(session_id, session) -> int:
+        invalidated.append(session_id)
+        return 1
+
+    monkeypatch.setattr(graph_cache, "invalidate_graph_cache_for_session", invalidate_for_session)
+    monkeypatch.setattr(graph_cache.database_session, "get_async_session", no_session)
+
+    hub = NotificationHub(dsn=lambda: "postgresql://test", connect=unavailable)
+    task = asyncio.create_task(graph_cache.run_graph_cache_invalidation(hub))
+    await asyncio.sleep(0)
+
+    hub.dispatch(SESSION_STATUS_CHANNEL, '{"session_id": "s1", "overall_status": "IN_PROGRESS"}')
+    hub.dispatch(SESSION_STATUS_CHANNEL, '{"session_id": "s2", "overall_status": "COMPLETED"}')
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert invalidated == ["s2"]
+    task.cancel()
+    await hub.close()
@@ -0,0 +1,131 @@
+import pytest
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+from app.core.config import get_settings
+from app.core.utils import graph_db
+from app.core.utils.db_utils import default_head_graph
+
+
+class FakeResult:
+    def __init__(self, records: list[dict]) -> None:
+        self.records = records
+
+    async def data(self) -> list[dict]:
+        return self.records
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeDriver", access_mode: str) -> None:
+        self.driver = driver
+        self.access_mode = access_mode
+
+    async def run(self, query: str, parameters: dict) -> FakeResult:
+        self.driver.queries.append((self.access_mode, query, parameters))
+        return FakeResult(self.driver.records)
+
+
+class FakeSession:
+    def __init__(self, driver: "FakeDriver") -> None:
+        self.driver = driver
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def execute_read(self, work):
+        return await work(FakeTransaction(self.driver, READ_ACCESS))
+
+    async def execute_write(self, work):
+        return await work(FakeTransaction(self.driver, WRITE_ACCESS))
+
+
+class FakeDriver:
+    def __init__(self, records: list[dict] | None = None) -> None:
+        self.closed = False
+        self.records = records or []
+        self.queries: list[tuple[str, str, dict]] = []
+
+    def session(self) -> FakeSession:
+        return FakeSession(self)
+
+    async def verify_connectivity(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def test_graph_driver_is_shared_and_pooled(monkeypatch: pytest.MonkeyPatch) -> None:
+    created: list[dict] = []
+
+    def fake_driver(uri, **kwargs):
+        created.append({"uri": uri, **kwargs})
+        return FakeDriver()
+
+    monkeypatch.setattr(graph_db, "_driver", None)
+    monkeypatch.setattr(graph_db.AsyncGraphDatabase, "driver", fake_driver)
+
+    driver = graph_db.get_graph_driver()
+    assert graph_db.get_graph_driver() is driver
+    assert len(created) == 1
+    assert created[0]["max_connection_pool_size"] == get_settings().graphdb.max_connection_pool_size
+    assert created[0]["connection_acquisition_timeout"] == get_settings().graphdb.connection_acquisition_timeout
+    assert created[0]["max_connection_lifetime"] == get_settings().graphdb.max_connection_lifetime
+
+    await graph_db.close_graph_driver()
+    assert driver.closed
+    assert graph_db.get_graph_driver() is not driver
+    assert len(created) == 2
+
+
+async def test_execute_query_routes_reads_and_passes_parameters() -> None:
+    driver = FakeDriver(records=[{"countryCode": "DE"}])
+
+    records = await graph_db.execute_query("MATCH (c:Company {id: $client_id}) RETURN c", {"client_id": "c1"}, READ_ACCESS, driver)
+
+    assert records == [{"countryCode": "DE"}]
+    assert driver.queries == [(READ_ACCESS, "MATCH (c:Company {id: $client_id}) RETURN c", {"client_id": "c1"})]
+
+
+async def test_default_head_graph_merges_client_node_with_parameters(monkeypatch: pytest.MonkeyPatch) -> None:
+    driver = FakeDriver()
+    monkeypatch.setattr(graph_db, "_driver", driver)
+
+    response = await default_head_graph('c1" }) DETACH DELETE (n', session=None)
+
+    access_mode, query, parameters = driver.queries[0]
+    assert access_mode == WRITE_ACCESS
+    assert "MERGE (a:Company {id: $client_id})" in query
+    assert parameters == {"client_id": 'c1" }) DETACH DELETE (n', "name": "Aramco"}
+    assert response["neo4j_result"]["status"] == "pass"
+
+
+async def test_constraint_failure_is_reported_separately_from_connectivity(monkeypatch: pytest.MonkeyPatch) -> None:
+    messages: list[tuple[str, str]] = []
+
+    class RecordingLogger:
+        def info(self, message: str) -> None:
+            messages.append(("info", message))
+
+        def warning(self, message: str) -> None:
+            messages.append(("warning", message))
+
+        def error(self, message: str) -> None:
+            messages.append(("error", message))
+
+    async def ensure_graph_constraints() -> None:
+        raise RuntimeError("Unable to create Constraint: Both Node(1) and Node(2) have the label `Company` and property `id`")
+
+    monkeypatch.setattr(graph_db, "_driver", FakeDriver())
+    monkeypatch.setattr(graph_db, "logger", RecordingLogger())
+    monkeypatch.setattr(graph_db, "ensure_graph_constraints", ensure_graph_constraints)
+
+    assert await graph_db.verify_graph_connectivity() is True
+
+    assert messages[0] == ("info", "Neo4j connection established.")
+    level, message = messages[1]
+    assert level == "error"
+    assert "duplicate Company.id values" in message
+    assert not any("Failed to connect" in message for _, message in messages)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from app.core.utils.notification_hub import NotificationHub, StatusProgress
+
+
+class FakeListenConnection:
+    def __init__(self) -> None:
+        self.listeners: dict = {}
+        self.termination_listeners: list = []
+        self.closed = False
+
+    def add_termination_listener(self, callback) -> None:
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback) -> None:
+        self.listeners[channel] = callback
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def notify(self, channel: str, payload: dict) -> None:
+        self.listeners[channel](self, 1, channel, json.dumps(payload))
+
+    def terminate(self) -> None:
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+class FakeConnector:
+    def __init__(self) -> None:
+        self.connections: list[FakeListenConnection] = []
+
+    async def __call__(self, dsn: str) -> FakeListenConnection:
+        self.connections.append(FakeListenConnection())
+        return self.connections[-1]
+
+
+def make_hub(connector: FakeConnector) -> NotificationHub:
+    return NotificationHub(dsn=lambda: "postgresql://test", connect=connector)
+
+
+async def test_hub_shares_one_connection_and_filters_by_session() -> None:
+    connector = FakeConnector()
+    hub = make_hub(connector)
+    first = hub.subscribe("channel", "s1")
+    second = hub.subscribe("channel", "s2")
+    everything = hub.subscribe("channel")
+    await asyncio.sleep(0)
+
+    connector.connections[0].notify("channel", {"session_id": "s1", "status": "DONE"})
+
+    assert len(connector.connections) == 1
+    assert await first.get() == {"session_id": "s1", "status": "DONE"}
+    assert await everything.get() == {"session_id": "s1", "status": "DONE"}
+    assert second.pending() == 0
+
+    for subscription in (first, second, everything):
+        subscription.close()
+    await asyncio.sleep(0)
+    assert connector.connections[0].closed
+
+
+async def test_slow_subscriber_drops_oldest_messages() -> None:
+    connector = FakeConnector()
+    hub = make_hub(connector)
+    subscription = hub.subscribe("channel", "s1", maxsize=2)
+    await asyncio.sleep(0)
+
+    for index in range(5):
+        connector.connections[0].notify("channel", {"session_id": "s1", "index": index})
+
+    assert subscription.dropped == 3
+    assert [subscription.get_nowait()["index"] for _ in range(2)] == [3, 4]
+    await hub.close()
+
+
+async def test_hub_reconnects_after_connection_loss(monkeypatch) -> None:
+    monkeypatch.setattr("app.core.utils.notification_hub.RECONNECT_DELAY_SECS", 0)
+    connector = FakeConnector()
+    hub = make_hub(connector)
+    subscription = hub.subscribe("channel", "s1")
+    await asyncio.sleep(0)
+
+    connector.connections[0].terminate()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    connector.connections[-1].notify("channel", {"session_id": "s1"})
+
+    assert len(connector.connections) == 2
+    assert await asyncio.wait_for(subscription.get(), timeout=1) == {"session_id": "s1"}
+    await hub.close()
+
+
+async def test_coalescing_subscriber_keeps_latest_per_key() -> None:
+    connector = FakeConnector()
+    hub = make_hub(connector)
+    subscription = hub.subscribe("channel", "s1", maxsize=2, coalesce_key="ens_id")
+    await asyncio.sleep(0)
+
+    for ens_id, overall_status in [("e1", "NOT_STARTED"), ("e2", "IN_PROGRESS"), ("e1", "COMPLETED"), ("e3", "FAILED")]:
+        connector.connections[0].notify("channel", {"session_id": "s1", "ens_id": ens_id, "overall_status": overall_status})
+    await asyncio.wait_for(subscription.wait(), timeout=1)
+
+    assert (subscription.received, subscription.coalesced, subscription.dropped) == (4, 1, 1)
+    assert [(event["ens_id"], event["overall_status"]) for event in subscription.drain()] == [
+        ("e1", "COMPLETED"), ("e3", "FAILED")
+    ]
+    assert subscription.pending() == 0
+    await hub.close()
+
+
+def test_status_progress_counts_latest_status_per_entity() -> None:
+    progress = StatusProgress()
+
+    progress.update([{"ens_id": "e1", "overall_status": "IN_PROGRESS"}, {"ens_id": "e2", "overall_status": "IN_PROGRESS"}])
+    progress.update([{"ens_id": "e1", "overall_status": "COMPLETED"}])
+
+    assert progress.snapshot() == {"total": 2, "by_status": {"IN_PROGRESS": 1, "COMPLETED": 1}}
@@ -0,0 +1,39 @@
+import httpx
+import pytest
+
+from app.core.utils import orchestration_client
+
+
+def _mock_client(responses: list[int], calls: list[httpx.Request]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status_code = responses[min(len(calls), len(responses)) - 1]
+        return httpx.Response(status_code, json={"status": status_code})
+
+    return httpx.AsyncClient(base_url="http://orchestration", transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(orchestration_client, "ORCHESTRATION_BACKOFF_SECS", 0)
+
+
+async def test_orchestration_gateway_errors_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[httpx.Request] = []
+    monkeypatch.setattr(orchestration_client, "_client", _mock_client([503, 200], calls))
+
+    response = await orchestration_client.post_orchestration("/analysis/trigger-analysis", {"session_id": "s1"}, "token")
+
+    assert response == {"status": 200}
+    assert len(calls) == 2
+    assert calls[0].headers["Authorization"] == "Bearer token"
+
+
+async def test_orchestration_server_errors_are_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[httpx.Request] = []
+    monkeypatch.setattr(orchestration_client, "_client", _mock_client([500, 200], calls))
+
+    response = await orchestration_client.post_orchestration("/analysis/trigger-analysis", {"session_id": "s1"}, "token")
+
+    assert "error" in response
+    assert len(calls) == 1
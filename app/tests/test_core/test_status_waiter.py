@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.core.utils import status_waiter
+from app.core.utils.notification_hub import SESSION_STATUS_CHANNEL, NotificationHub
+
+
+async def _unavailable(dsn: str):
+    raise OSError("connection refused")
+
+
+async def test_status_waiter_wakes_on_notification() -> None:
+    hub = NotificationHub(dsn=lambda: "postgresql://test", connect=_unavailable)
+    statuses = iter(["IN_PROGRESS", "COMPLETED"])
+
+    async def read_status() -> str:
+        current_status = next(statuses)
+        if current_status == "IN_PROGRESS":
+            # Another session changes first, then ours
+            loop = asyncio.get_running_loop()
+            loop.call_soon(hub.dispatch, SESSION_STATUS_CHANNEL, '{"session_id": "other"}')
+            loop.call_soon(hub.dispatch, SESSION_STATUS_CHANNEL, '{"session_id": "s1"}')
+        return current_status
+
+    result = await asyncio.wait_for(
+        status_waiter.wait_for_session_status(
+            "s1", read_status, ["COMPLETED", "FAILED"], timeout=60, poll_interval=60, hub=hub
+        ),
+        timeout=5,
+    )
+
+    assert result == "COMPLETED"
+    assert hub.subscriber_count(SESSION_STATUS_CHANNEL) == 0
+    await hub.close()
+
+
+async def test_status_waiter_polls_without_notifications() -> None:
+    hub = NotificationHub(dsn=lambda: "postgresql://test", connect=_unavailable)
+    statuses = iter(["NOT_STARTED", "IN_PROGRESS", "FAILED"])
+
+    async def read_status() -> str:
+        return next(statuses)
+
+    result = await status_waiter.wait_for_session_status(
+        "s1", read_status, ["COMPLETED", "FAILED"], timeout=5, poll_interval=0.01, hub=hub
+    )
+
+    assert result == "FAILED"
+    await hub.close()
+
+
+async def test_status_waiter_times_out() -> None:
+    hub = NotificationHub(dsn=lambda: "postgresql://test", connect=_unavailable)
+
+    async def read_status() -> str:
+        return "IN_PROGRESS"
+
+    with pytest.raises(TimeoutError):
+        await status_waiter.wait_for_session_status(
+            "s1", read_status, ["COMPLETED"], timeout=0.05, poll_interval=0.01, hub=hub
+        )
+    await hub.close()
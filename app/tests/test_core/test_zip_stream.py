@@ -0,0 +1,79 @@
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.utils import zip_stream
+
+BLOBS = {
+    "ens1/report.pdf": b"%PDF" + b"x" * 5000,
+    "ens1/report.docx": b"PK" + b"y" * 3000,
+    "ens2/data.csv": b"a,b\n" * 2000,
+}
+
+
+async def fake_stream_blob(container_name, blob_name, offset=0, length=None):
+    data = BLOBS[blob_name]
+
+    async def chunks():
+        for start in range(0, len(data), 1024):
+            yield data[start:start + 1024]
+
+    return chunks()
+
+
+async def test_streamed_zip_contains_every_blob_and_stores_compressed_formats(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(zip_stream, "stream_blob", fake_stream_blob)
+    monkeypatch.setattr(zip_stream, "ZIP_PREFETCH_WINDOW", 2)
+    blobs = [
+        SimpleNamespace(name=name, size=len(data), last_modified=datetime(2025, 1, 1))
+        for name, data in BLOBS.items()
+    ]
+
+    parts = [part async for part in zip_stream.stream_blobs_as_zip("session", blobs)]
+
+    assert len(parts) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(parts))) as archive:
+        assert archive.namelist() == list(BLOBS)
+        for name, data in BLOBS.items():
+            assert archive.read(name) == data
+        assert archive.getinfo("ens1/report.pdf").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("ens2/data.csv").compress_type == zipfile.ZIP_DEFLATED
+
+
+async def test_closing_the_stream_mid_entry_cancels_every_prefetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    blobs_data = {f"ens{i}/report.pdf": b"%PDF" + b"z" * 20000 for i in range(4)}
+    tasks: list[asyncio.Task] = []
+    prefetch_blob = zip_stream._prefetch_blob
+
+    async def fake_stream_blob(container_name, blob_name, offset=0, length=None):
+        data = blobs_data[blob_name]
+
+        async def chunks():
+            for start in range(0, len(data), 1024):
+                yield data[start:start + 1024]
+
+        return chunks()
+
+    async def tracked_prefetch_blob(container_name, blob_name, queue):
+        tasks.append(asyncio.current_task())
+        await prefetch_blob(container_name, blob_name, queue)
+
+    monkeypatch.setattr(zip_stream, "stream_blob", fake_stream_blob)
+    monkeypatch.setattr(zip_stream, "_prefetch_blob", tracked_prefetch_blob)
+    monkeypatch.setattr(zip_stream, "ZIP_PREFETCH_WINDOW", 2)
+    blobs = [
+        SimpleNamespace(name=name, size=len(data), last_modified=datetime(2025, 1, 1))
+        for name, data in blobs_data.items()
+    ]
+
+    stream = zip_stream.stream_blobs_as_zip("session", blobs)
+    await anext(stream)
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert len(tasks) == 3
+    assert all(task.cancelled() for task in tasks)
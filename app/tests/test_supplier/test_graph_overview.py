@@ -0,0 +1,106 @@
+from app.core.supplier import graph_overview
+
+RATINGS = {
+    "overall_rating": "High",
+    "sanctions_rating": "High",
+    "government_political_rating": "Low",
+    "bribery_corruption_overall_rating": "No Alerts",
+    "other_adverse_media_rating": "Medium",
+    "financials_rating": "Low",
+    "additional_indicator_rating": "No Alerts",
+}
+
+
+class FakeDriver:
+    """
+    Answers execute_query with prepared record lists, in call order.
+    """
+
+    def __init__(self, *results: list[dict]) -> None:
+        self.results = list(results)
+        self.queries: list[tuple[str, dict]] = []
+
+    def session(self) -> "FakeDriver":
+        return self
+
+    async def __aenter__(self) -> "FakeDriver":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def execute_read(self, work):
+        return await work(self)
+
+    async def run(self, query: str, parameters: dict) -> "FakeDriver":
+        self.queries.append((query, parameters))
+        return self
+
+    async def data(self) -> list[dict]:
+        return self.results.pop(0)
+
+
+async def test_overview_clusters_suppliers_with_counts() -> None:
+    driver = FakeDriver([{
+        "client": {"id": "c1", "name": "Aramco", "type": "Company"},
+        "groups": [
+            {"value": "SA", "rating": "Low", "suppliers": 1},
+            {"value": "SA", "rating": "High", "suppliers": 2},
+            {"value": None, "rating": None, "suppliers": 1},
+        ],
+    }])
+
+    overview = await graph_overview.fetch_graph_overview(
+        {"client": "Aramco", "client_id": "c1", "group_by": "country", "country": ["SA"]}, driver
+    )
+
+    query, params = driver.queries[0]
+    assert params == {"client_id": "c1", "country": ["SA"], "group_by": "country"}
+    assert "s.group_by" not in query
+    assert overview["total_suppliers"] == 4
+    central, saudi_arabia, unknown = overview["nodes"]
+    assert central["node_category"] == "central" and "type" not in central
+    assert saudi_arabia["id"] == "cluster:country:SA"
+    assert (saudi_arabia["count"], saudi_arabia["ratings"]) == (3, {"Low": 1, "High": 2})
+    assert saudi_arabia["node_colour"] == graph_overview._convert_score_to_hex_gradient(0.5, "High")
+    assert unknown["cluster_value"] == graph_overview.UNKNOWN_CLUSTER
+    assert {"source": "cluster:country:SA", "target": "c1", "relationship_type": "SUPPLIER"} in overview["edges"]
+
+
+async def test_cluster_expansion_pages_trimmed_suppliers() -> None:
+    suppliers = [
+        {"supplier": {"id": f"s{index}", "name": f"Supplier {index}", "type": "organization", "bvd_id": "X", **RATINGS}}
+        for index in range(3)
+    ]
+    driver = FakeDriver(suppliers)
+
+    page = await graph_overview.expand_graph_cluster(
+        {"client_id": "c1", "group_by": "country", "cluster_value": "SA", "limit": 2, "cursor": "s"}, driver
+    )
+
+    query, params = driver.queries[0]
+    assert "s[$group_by] = $cluster_value" in query and "s.id > $cursor" in query
+    assert (params["limit"], params["cursor"], params["cluster_value"]) == (3, "s", "SA")
+    assert [node["id"] for node in page["nodes"]] == ["s0", "s1"]
+    assert page["next_cursor"] == "s1"
+    assert set(page["nodes"][0]) <= set(graph_overview.RENDER_FIELDS)
+    assert "bvd_id" not in page["nodes"][0] and "sanctions_rating" not in page["nodes"][0]
+    [scored] = graph_overview.score_direct_suppliers([{"id": "s0", **RATINGS}])
+    assert page["nodes"][0]["risk_intensity_score"] == scored["risk_intensity_score"]
+    assert page["edges"][0] == {"source": "s0", "target": "c1", "relationship_type": "SUPPLIER"}
+
+
+async def test_node_expansion_formats_neighbours_until_last_page() -> None:
+    driver = FakeDriver([
+        {"node": {"id": "i1", "name": "Person", "type": "individual", "pep_indicator": "true"}, "relationship_type": "MANAGEMENT_OF"},
+        {"node": {"id": "o1", "name": "Owner", "type": "organization"}, "relationship_type": "BENEFICIAL_OWNER_OF"},
+    ])
+
+    page = await graph_overview.expand_graph_node({"node_id": "s1", "limit": 5, "cursor": None}, driver)
+
+    person, owner = page["nodes"]
+    assert person["risk_indicator"] == "true" and person["node_risk_description"] == "Risks: PeP"
+    assert "pep_indicator" not in person
+    assert owner["node_category"] == "indirect"
+    assert page["edges"][1] == {"source": "o1", "target": "s1", "relationship_type": "BENEFICIAL OWNER"}
+    assert page["next_cursor"] is None
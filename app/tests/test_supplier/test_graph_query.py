@@ -0,0 +1,15 @@
+from app.core.supplier.graph import build_dynamic_query_for_direct_suppliers
+
+
+async def test_direct_supplier_query_aggregates_each_pattern_separately() -> None:
+    query, params = await build_dynamic_query_for_direct_suppliers("c1", {"country": ["SA"], "name": "string"})
+
+    assert params == {"client_id": "c1", "country": ["SA"]}
+    assert "OPTIONAL MATCH" not in query
+    assert query.count("CALL {") == 3
+    # Suppliers are collected before any neighbour pattern is expanded
+    assert query.index("collect(DISTINCT s) AS suppliers") < query.index("CALL {")
+    for column in ["supplierRelationships", "suppliers", "individualRelationships", "individuals",
+                   "individualRelationshipsCorpGroup", "individualsCorpGroup",
+                   "companyRelationshipsCorpGroup", "companyCorpGroup"]:
+        assert column in query.split("RETURN c AS client", 1)[1]
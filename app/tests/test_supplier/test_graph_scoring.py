@@ -0,0 +1,53 @@
+from app.core.supplier.graph import (
+    DEFAULT_NODE_COLOUR,
+    RATING_GRADIENTS,
+    _convert_score_to_hex_gradient,
+    _interpolate_rgb,
+    apply_direct_supplier_formatting,
+    score_direct_suppliers,
+)
+
+THEMES = [
+    "sanctions_rating",
+    "government_political_rating",
+    "bribery_corruption_overall_rating",
+    "other_adverse_media_rating",
+    "financials_rating",
+    "additional_indicator_rating",
+]
+
+
+def supplier(overall_rating, *ratings) -> dict:
+    return {"id": overall_rating, "overall_rating": overall_rating, **dict(zip(THEMES, ratings))}
+
+
+def test_batch_scores_scale_to_the_overall_rating_band() -> None:
+    nodes = [
+        supplier("High", "High", "High", "High", "High", "High", "High"),
+        supplier("Medium", "Medium", "Low", "No Alerts", "No Alerts", "No Alerts", "No Alerts"),
+        supplier("Low", "No Alerts", "No Alerts", "No Alerts", "No Alerts", "No Alerts", "No Alerts"),
+        supplier(None, "High"),  # Missing themes count as no alerts
+    ]
+
+    score_direct_suppliers(nodes)
+
+    # (5 * 3 + 1 * 3) / 130 of the Medium band 10..50
+    assert [node["risk_intensity_score"] for node in nodes] == [100, round(18 * 40 / 130 + 10), 0, round(30 * 10 / 130)]
+    assert nodes[0]["node_colour"] == _interpolate_rgb(*RATING_GRADIENTS["High"], 1.0)
+    assert nodes[2]["node_colour"] == _interpolate_rgb(*RATING_GRADIENTS["Low"], 0.0)
+    assert nodes[3]["node_colour"] == DEFAULT_NODE_COLOUR
+    assert all(node["node_size"] == 200 for node in nodes)
+
+
+def test_single_node_formatting_matches_batch() -> None:
+    node = supplier("Medium", "Low", "Medium", "High", "No Alerts", "Low", "Medium")
+
+    assert apply_direct_supplier_formatting(dict(node)) == score_direct_suppliers([dict(node)])[0]
+
+
+def test_palette_colour_is_close_to_exact_interpolation() -> None:
+    exact = _interpolate_rgb(*RATING_GRADIENTS["Medium"], 0.37)
+    palette = _convert_score_to_hex_gradient(0.37, "Medium")
+
+    assert all(abs(int(exact[i:i + 2], 16) - int(palette[i:i + 2], 16)) <= 1 for i in (1, 3, 5))
+    assert _convert_score_to_hex_gradient(0.5, None) == DEFAULT_NODE_COLOUR
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import ResourceModifiedError
+
+from app.core.supplier import report
+from app.core.utils.notification_hub import ENS_ID_STATUS_CHANNEL, NotificationHub
+
+
+def _blob(name: str, day: int, size: int = 100) -> SimpleNamespace:
+    return SimpleNamespace(name=name, size=size, etag=f"etag-{name}-{day}", last_modified=datetime(2025, 1, day))
+
+
+@pytest.fixture(autouse=True)
+def empty_index() -> None:
+    report.REPORT_INDEX.clear()
+
+
+async def test_indexed_report_is_downloaded_without_listing(monkeypatch: pytest.MonkeyPatch) -> None:
+    report.index_report_blobs("s1", [
+        _blob("ens1/old.pdf", 1),
+        _blob("ens1/new.pdf", 2, size=500),
+        _blob("ens1/new.docx", 3),
+        _blob("summary.csv", 4),
+    ])
+    streamed = []
+
+    async def find_latest_blob(*args, **kwargs):
+        raise AssertionError("listing should not be needed")
+
+    async def stream_blob(container_name, blob_name, offset=0, length=None, etag=None):
+        streamed.append((container_name, blob_name, offset, length, etag))
+        return iter([])
+
+    monkeypatch.setattr(report, "find_latest_blob", find_latest_blob)
+    monkeypatch.setattr(report, "stream_blob", stream_blob)
+
+    result = await report.report_download("s1", "ens1", "pdf", "bytes=100-")
+
+    assert streamed == [("s1", "ens1/new.pdf", 100, 400, "etag-ens1/new.pdf-2")]
+    assert (result["start"], result["end"], result["partial"]) == (100, 499, True)
+    assert ("s1", "", "csv") not in report.REPORT_INDEX
+
+
+async def test_changed_indexed_report_falls_back_to_listing(monkeypatch: pytest.MonkeyPatch) -> None:
+    report.index_report_blobs("s1", [_blob("ens1/new.pdf", 2)])
+    latest = _blob("ens1/newer.pdf", 5)
+
+    async def find_latest_blob(*args, **kwargs):
+        return latest
+
+    async def stream_blob(container_name, blob_name, offset=0, length=None, etag=None):
+        if etag != latest.etag:
+            raise ResourceModifiedError("changed")
+        return iter([])
+
+    monkeypatch.setattr(report, "find_latest_blob", find_latest_blob)
+    monkeypatch.setattr(report, "stream_blob", stream_blob)
+
+    result = await report.report_download("s1", "ens1", "pdf")
+
+    assert result["filename"] == "ens1/newer.pdf"
+    assert report.REPORT_INDEX.get(("s1", "ens1", "pdf"))["etag"] == latest.etag
+
+
+async def test_completed_report_notification_invalidates_its_ens_id() -> None:
+    async def unavailable(dsn: str):
+        raise OSError("connection refused")
+
+    report.index_report_blobs("s1", [_blob("ens1/new.pdf", 2), _blob("ens2/new.pdf", 2)])
+    hub = NotificationHub(dsn=lambda: "postgresql://test", connect=unavailable)
+    task = asyncio.create_task(report.run_report_index_invalidation(hub))
+    await asyncio.sleep(0)
+
+    hub.dispatch(ENS_ID_STATUS_CHANNEL, '{"session_id": "s1", "ens_id": "ens2", "report_generation_status": "IN_PROGRESS"}')
+    hub.dispatch(ENS_ID_STATUS_CHANNEL, '{"session_id": "s1", "ens_id": "ens1", "report_generation_status": "COMPLETED"}')
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert ("s1", "ens1", "pdf") not in report.REPORT_INDEX
+    assert ("s1", "ens2", "pdf") in report.REPORT_INDEX
+    task.cancel()
+    await hub.close()
@@ -0,0 +1,49 @@
+from app.core.supplier.graph import transform_graph_data
+
+RATINGS = {
+    "overall_rating": "Low",
+    "sanctions_rating": "No Alerts",
+    "government_political_rating": "No Alerts",
+    "bribery_corruption_overall_rating": "No Alerts",
+    "other_adverse_media_rating": "Low",
+    "financials_rating": "No Alerts",
+    "additional_indicator_rating": "No Alerts",
+}
+
+
+def graph_record() -> dict:
+    client = {"id": "c1", "name": "Aramco"}
+    supplier = {"id": "s1", "type": "organization", **RATINGS}
+    owner = {"id": "s2", "type": "organization"}
+    person = {"id": "i1", "type": "individual", "sanctions_indicator": "true"}
+    return {
+        "client": client,
+        "suppliers": [supplier],
+        "individuals": [person],
+        # s1 is also in the corporate group of s2, it stays a direct supplier
+        "companyCorpGroup": [owner, dict(supplier)],
+        "individualsCorpGroup": [dict(person)],
+        "supplierRelationships": [(supplier, "SUPPLIER_OF", client)],
+        "individualRelationships": [(person, "MANAGEMENT_OF", supplier)],
+        "individualRelationshipsCorpGroup": [(person, "SHAREHOLDER_OF", supplier)],
+        "companyRelationshipsCorpGroup": [(owner, "BENEFICIAL_OWNER_OF", supplier), (supplier, "SHAREHOLDER_OF", supplier)],
+    }
+
+
+async def test_transform_graph_data_dedups_and_formats_in_one_pass() -> None:
+    graph = await transform_graph_data([graph_record()], client_id="c1")
+
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    assert [node["id"] for node in graph["nodes"]] == ["s1", "i1", "s2", "c1"]
+    assert (nodes["s1"]["node_category"], nodes["s1"]["node_type"]) == ("direct", "organization")
+    assert "risk_intensity_score" in nodes["s1"] and "type" not in nodes["s1"]
+    assert nodes["i1"]["node_risk_description"] == "Risks: Sanctions/Watchlist Exposure"
+    assert nodes["s2"]["node_category"] == "indirect" and nodes["s2"]["risk_indicator"] == "false"
+    assert (nodes["c1"]["node_category"], nodes["c1"]["node_type"], nodes["c1"]["node_size"]) == ("central", "Company", 450)
+
+    # Duplicate source/target pairs keep the first relationship, self-loops are dropped
+    assert graph["edges"] == [
+        {"source": "s1", "target": "c1", "relationship_type": "SUPPLIER"},
+        {"source": "i1", "target": "s1", "relationship_type": "MANAGEMENT"},
+        {"source": "s2", "target": "s1", "relationship_type": "BENEFICIAL OWNER"},
+    ]
@@ -0,0 +1,180 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.supplier import supplier
+from app.models import FinalStatus, FinalValidatedStatus
+from app.schemas.requests import BulkPayload, SinglePayloadItem
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]) -> None:
+        self.rows = rows
+
+    def all(self) -> list[tuple]:
+        return self.rows
+
+    def fetchall(self) -> list[tuple]:
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows: list[tuple]) -> None:
+        self.rows = rows
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement) -> FakeResult:
+        self.statements.append(statement)
+        return FakeResult(self.rows)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        pass
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+@pytest.fixture
+def promoted(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    promoted_sessions: list[str] = []
+
+    async def promote_accepted_suppliers(session, session_id, commit=True) -> int:
+        promoted_sessions.append(session_id)
+        return 1
+
+    async def invalidate_graph_cache_for_session(session_id, session) -> int:
+        return 0
+
+    monkeypatch.setattr(supplier, "promote_accepted_suppliers", promote_accepted_suppliers)
+    monkeypatch.setattr(supplier, "invalidate_graph_cache_for_session", invalidate_graph_cache_for_session)
+    return promoted_sessions
+
+
+async def test_bulk_update_sets_final_status_per_validation_status(promoted: list[str]) -> None:
+    session = FakeSession([
+        (FinalValidatedStatus.AUTO_ACCEPT, 3),
+        (FinalValidatedStatus.AUTO_REJECT, 2),
+        (FinalValidatedStatus.REVIEW, 4),
+    ])
+
+    response = await supplier.update_suggestions_bulk(BulkPayload(session_id="s1", status="reject"), session)
+
+    sql = _sql(session.statements[0])
+    assert sql.startswith("WITH updated_rows AS \n(UPDATE upload_supplier_master_data SET")
+    assert (
+        "final_status=CASE WHEN (upload_supplier_master_data.final_validation_status = 'AUTO_ACCEPT') "
+        "THEN CAST('ACCEPTED' AS finalstatus) "
+        "WHEN (upload_supplier_master_data.final_validation_status = 'AUTO_REJECT') "
+        "THEN CAST('REJECTED' AS finalstatus) "
+        "ELSE CAST('REJECTED' AS finalstatus) END"
+    ) in sql
+    # Only REVIEW rows take the suggested values
+    assert (
+        "name=CASE WHEN (upload_supplier_master_data.final_validation_status = 'REVIEW') "
+        "THEN upload_supplier_master_data.suggested_name ELSE upload_supplier_master_data.name END"
+    ) in sql
+    assert "WHERE upload_supplier_master_data.session_id = 's1' AND upload_supplier_master_data.final_validation_status IN ('AUTO_ACCEPT', 'AUTO_REJECT', 'REVIEW')" in sql
+    assert "GROUP BY updated_rows.final_validation_status" in sql
+
+    assert (response["accepted_count"], response["rejected_count"], response["review_count"]) == (3, 2, 4)
+    assert response["message"] == "Updated 9 rows successfully."
+    assert promoted == ["s1"]
+    assert session.commits == 1
+
+
+async def test_bulk_accept_of_review_rows_sets_accepted(promoted: list[str]) -> None:
+    session = FakeSession([(FinalValidatedStatus.REVIEW, 1)])
+
+    await supplier.update_suggestions_bulk(BulkPayload(session_id="s1", status="accept"), session)
+
+    assert "ELSE CAST('ACCEPTED' AS finalstatus) END" in _sql(session.statements[0])
+    assert promoted == ["s1"]
+
+
+async def test_bulk_update_without_accepted_or_review_rows_skips_promotion(promoted: list[str]) -> None:
+    session = FakeSession([(FinalValidatedStatus.AUTO_REJECT, 5)])
+
+    response = await supplier.update_suggestions_bulk(BulkPayload(session_id="s1", status="accept"), session)
+
+    assert (response["accepted_count"], response["rejected_count"], response["review_count"]) == (0, 5, 0)
+    assert promoted == []
+    assert session.commits == 1
+
+
+def _decisions(*decisions: tuple[str, str]) -> list[SinglePayloadItem]:
+    return [SinglePayloadItem(ens_id=ens_id, status=status) for ens_id, status in decisions]
+
+
+async def test_single_update_applies_every_decision_in_one_statement(promoted: list[str]) -> None:
+    session = FakeSession([
+        ("e1", FinalValidatedStatus.REVIEW),
+        ("e2", FinalValidatedStatus.REVIEW),
+        ("e3", FinalValidatedStatus.AUTO_ACCEPT),
+        ("e4", FinalValidatedStatus.AUTO_REJECT),
+        ("e5", FinalValidatedStatus.REVIEW),
+    ])
+
+    response = await supplier.update_suggestions_single(
+        _decisions(("e1", "accept"), ("e2", "reject")), "s1", session
+    )
+
+    assert len(session.statements) == 1
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    accepted = "upload_supplier_master_data.ens_id = ANY (%(accepted_ens_ids)s::VARCHAR[])"
+    rejected = "upload_supplier_master_data.ens_id = ANY (%(rejected_ens_ids)s::VARCHAR[])"
+    review = "upload_supplier_master_data.final_validation_status = %(final_validation_status_1)s"
+    assert (
+        f"final_status=CASE WHEN ({rejected}) THEN CAST(%(param_1)s AS finalstatus) "
+        "WHEN (upload_supplier_master_data.final_validation_status = %(final_validation_status_2)s) THEN CAST(%(param_2)s AS finalstatus) "
+        "WHEN (upload_supplier_master_data.final_validation_status = %(final_validation_status_3)s) THEN CAST(%(param_3)s AS finalstatus) "
+        f"WHEN ({accepted} AND {review}) THEN CAST(%(param_4)s AS finalstatus) "
+        f"WHEN ({accepted}) THEN upload_supplier_master_data.final_status "
+        "ELSE CAST(%(param_5)s AS finalstatus) END"
+    ) in sql
+    assert f"name=CASE WHEN ({accepted} AND {review}) THEN upload_supplier_master_data.suggested_name" in sql
+    assert sql.endswith("WHERE upload_supplier_master_data.session_id = %(session_id_1)s "
+                        "RETURNING upload_supplier_master_data.ens_id, upload_supplier_master_data.final_validation_status")
+    assert compiled.params["accepted_ens_ids"] == ["e1"]
+    assert compiled.params["rejected_ens_ids"] == ["e2"]
+    assert [compiled.params[f"final_validation_status_{index}"] for index in (1, 2, 3)] == [
+        FinalValidatedStatus.REVIEW, FinalValidatedStatus.AUTO_ACCEPT, FinalValidatedStatus.AUTO_REJECT
+    ]
+    assert [compiled.params[f"param_{index}"] for index in range(1, 6)] == [
+        FinalStatus.REJECTED, FinalStatus.ACCEPTED, FinalStatus.REJECTED, FinalStatus.ACCEPTED, FinalStatus.REJECTED
+    ]
+
+    # Rows auto accepted by validation count as accepted, rows without a decision are rejected
+    assert sorted(response["accepted_ens_ids"]) == ["e1", "e3"]
+    assert sorted(response["rejected_ens_ids"]) == ["e2", "e4", "e5"]
+    assert promoted == ["s1"]
+    assert session.commits == 1
+
+
+async def test_single_update_rejects_an_ens_id_sent_with_both_decisions(promoted: list[str]) -> None:
+    session = FakeSession([("e1", FinalValidatedStatus.REVIEW)])
+
+    response = await supplier.update_suggestions_single(
+        _decisions(("e1", "reject"), ("e1", "accept"), ("e1", "accept")), "s1", session
+    )
+
+    # The rejection takes the first CASE branch, whatever the order in the payload
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert params["accepted_ens_ids"] == ["e1"]
+    assert params["rejected_ens_ids"] == ["e1"]
+    assert response["accepted_ens_ids"] == ["e1"]
+    assert response["rejected_ens_ids"] == ["e1"]
+
+
+async def test_single_update_without_accepted_rows_skips_promotion(promoted: list[str]) -> None:
+    session = FakeSession([("e1", FinalValidatedStatus.REVIEW), ("e2", FinalValidatedStatus.AUTO_REJECT)])
+
+    response = await supplier.update_suggestions_single(_decisions(("e1", "reject")), "s1", session)
+
+    assert response["accepted_ens_ids"] == []
+    assert sorted(response["rejected_ens_ids"]) == ["e1", "e2"]
+    assert promoted == []
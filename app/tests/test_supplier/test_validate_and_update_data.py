@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from app.core.supplier.supplier import validate_and_update_data
+
+session_id = "3f1c2d4e-0000-4000-8000-000000000000"
+user_id = "b75365d9-7bf9-4f54-add5-aeab333a087b"
+
+
+def _upload_rows() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "name": ["Acme", "Globex"],
+            "country": ["DE", "FR"],
+            "country_copy": ["Germany", "France"],
+            "national_id": [123, "FR-9"],
+        }
+    )
+
+
+def test_rows_are_prefixed_and_tagged_with_session() -> None:
+    rows = validate_and_update_data(_upload_rows(), user_id, session_id)
+
+    assert len(rows) == 2
+    assert rows[0]["uploaded_name"] == "Acme"
+    assert rows[0]["unmodified_name"] == "Acme"
+    assert rows[0]["uploaded_country"] == "DE"
+    assert rows[0]["unmodified_country"] == "Germany"
+    assert rows[0]["uploaded_national_id"] == "123"
+    assert rows[0]["session_id"] == session_id
+    assert rows[0]["user_id"] == user_id
+
+
+def test_every_row_gets_a_distinct_uuid4_ens_id() -> None:
+    rows = validate_and_update_data(_upload_rows(), user_id, session_id)
+
+    ens_ids = [row["ens_id"] for row in rows]
+    assert len(set(ens_ids)) == len(ens_ids)
+    assert all(ens_id[14] == "4" for ens_id in ens_ids)
+
+
+def test_all_rows_missing_mandatory_values_are_reported() -> None:
+    df = _upload_rows()
+    df.loc[0, "name"] = ""
+    df.loc[1, "national_id"] = None
+
+    with pytest.raises(ValueError) as e:
+        validate_and_update_data(df, user_id, session_id, first_row_number=11)
+
+    assert str(e.value).endswith("Missing values in row(s): 11, 12")
+
+
+def test_missing_mandatory_column_fails_every_row() -> None:
+    df = _upload_rows().drop(columns=["national_id"])
+
+    with pytest.raises(ValueError) as e:
+        validate_and_update_data(df, user_id, session_id)
+
+    assert str(e.value).endswith("Missing values in row(s): 1, 2")
@@ -0,0 +1,44 @@
+import base64
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
+
+from app.core.tprp import tprp
+
+ACCOUNT_KEY = base64.b64encode(b"0" * 32).decode()
+ROTATED_ACCOUNT_KEY = base64.b64encode(b"1" * 32).decode()
+
+
+def test_container_sas_is_reused_until_refresh_window() -> None:
+    tprp.SAS_URL_CACHE.clear()
+    with freeze_time(datetime(2025, 1, 1)) as frozen:
+        first = tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-1", 2)
+        frozen.tick(timedelta(days=6))
+        assert tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-1", 2) is first
+
+        frozen.tick(timedelta(days=2))
+        refreshed = tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-1", 2)
+
+    assert refreshed is not first
+    assert refreshed["sas_url"].startswith("https://account.blob.core.windows.net/session-1?")
+
+
+def test_container_sas_is_cached_per_container() -> None:
+    tprp.SAS_URL_CACHE.clear()
+    first = tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-1", 2)
+    second = tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-2", 2)
+
+    assert first["sas_url"] != second["sas_url"]
+
+
+def test_rotated_account_key_gets_a_new_container_sas() -> None:
+    tprp.SAS_URL_CACHE.clear()
+    first = tprp.get_container_sas_url("account", ACCOUNT_KEY, "session-1", 2)
+    rotated = tprp.get_container_sas_url("account", ROTATED_ACCOUNT_KEY, "session-1", 2)
+
+    assert rotated["sas_token"] != first["sas_token"]
+    assert tprp.get_container_sas_url("account", ROTATED_ACCOUNT_KEY, "session-1", 2) is rotated
+    cache_keys = []
+    tprp.SAS_URL_CACHE.invalidate(lambda key: cache_keys.append(key) or False)
+    assert len(cache_keys) == 2
+    assert not any(ACCOUNT_KEY in key or ROTATED_ACCOUNT_KEY in key for key in cache_keys)
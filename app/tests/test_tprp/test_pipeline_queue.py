@@ -0,0 +1,57 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.tprp import pipeline_queue
+from app.core.tprp.tprp import PipelineFailed
+from app.models import STATUS
+
+
+@pytest.fixture
+def job_updates(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    updates: list[dict] = []
+
+    async def update_owned_job(job_id, worker_id, **values):
+        updates.append(values)
+        return 1
+
+    @asynccontextmanager
+    async def get_async_session():
+        yield None
+
+    async def upsert_session_screening_status(data, session_id, session):
+        updates.append({"session_status": data[0]["overall_status"]})
+        return {"message": "Upsert completed"}
+
+    monkeypatch.setattr(pipeline_queue, "_update_owned_job", update_owned_job)
+    monkeypatch.setattr(pipeline_queue.database_session, "get_async_session", get_async_session)
+    monkeypatch.setattr(pipeline_queue, "upsert_session_screening_status", upsert_session_screening_status)
+    return updates
+
+
+def _job(attempts: int = 1) -> dict:
+    return {"id": 7, "session_id": "s1", "stage": None, "attempts": attempts, "max_attempts": 3}
+
+
+async def test_failed_session_fails_the_job_without_retry(monkeypatch: pytest.MonkeyPatch, job_updates: list[dict]) -> None:
+    async def run_tprp_pipeline(session_id, completed_stage=None, on_stage=None):
+        raise PipelineFailed("Supplier status is FAILED: Error supplier_master_data pipeline.")
+
+    monkeypatch.setattr(pipeline_queue, "run_tprp_pipeline", run_tprp_pipeline)
+
+    await pipeline_queue.run_job(_job(), "worker")
+
+    assert job_updates[0]["status"] == STATUS.FAILED
+    assert job_updates[1] == {"session_status": STATUS.FAILED}
+
+
+async def test_transient_error_requeues_the_job(monkeypatch: pytest.MonkeyPatch, job_updates: list[dict]) -> None:
+    async def run_tprp_pipeline(session_id, completed_stage=None, on_stage=None):
+        raise RuntimeError("Error triggering analysis pipeline: 503 Service Unavailable")
+
+    monkeypatch.setattr(pipeline_queue, "run_tprp_pipeline", run_tprp_pipeline)
+
+    await pipeline_queue.run_job(_job(), "worker")
+
+    assert len(job_updates) == 1
+    assert job_updates[0]["status"] == STATUS.QUEUED
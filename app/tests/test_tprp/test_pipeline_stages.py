@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.tprp import tprp
+
+
+async def test_pipeline_resumes_after_last_completed_stage(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def trigger_supplier_validation(session_id, auth_token):
+        calls.append("trigger_supplier_validation")
+        return {}
+
+    async def trigger_analysis(session_id, auth_token):
+        calls.append("trigger_analysis")
+        return {"status": "queued"}
+
+    monkeypatch.setattr(tprp, "trigger_supplier_validation", trigger_supplier_validation)
+    monkeypatch.setattr(tprp, "trigger_analysis", trigger_analysis)
+    completed: list[str] = []
+
+    async def on_stage(stage):
+        completed.append(stage)
+
+    await tprp.run_tprp_pipeline("s1", completed_stage="SUGGESTIONS_ACCEPTED", on_stage=on_stage)
+
+    assert calls == ["trigger_analysis"]
+    assert completed == ["ANALYSIS_TRIGGERED"]
+
+
+async def test_pipeline_raises_when_orchestration_call_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def trigger_supplier_validation(session_id, auth_token):
+        return {"error": "503 Service Unavailable"}
+
+    monkeypatch.setattr(tprp, "trigger_supplier_validation", trigger_supplier_validation)
+    completed: list[str] = []
+
+    async def on_stage(stage):
+        completed.append(stage)
+
+    with pytest.raises(RuntimeError):
+        await tprp.run_tprp_pipeline("s1", on_stage=on_stage)
+
+    assert completed == []